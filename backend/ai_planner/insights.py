@@ -1,7 +1,9 @@
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 import os
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from ai_planner.prompts import SYSTEM_MESSAGE, build_context
 
 async def generate_planning_insights(indicators: Dict, model: str = "gpt-5.2") -> Dict:
     """
@@ -18,75 +20,7 @@ async def generate_planning_insights(indicators: Dict, model: str = "gpt-5.2") -
     
     # Prepare context for AI
     try:
-        # Safely extract values with defaults
-        pop_density = indicators.get('population_density', {})
-        land_use = indicators.get('land_use', {})
-        road_network = indicators.get('road_network', {})
-        service_access = indicators.get('service_accessibility', {})
-        green_space = indicators.get('green_space', {})
-        
-        # Get most dense zone safely
-        zones = pop_density.get('zones', [])
-        most_dense_zone = f"{zones[0]['name']} ({zones[0]['density']:,} people/km²)" if zones else 'N/A'
-        
-        # Get coverage data safely
-        coverage = service_access.get('coverage', {})
-        hospitals_per_100k = coverage.get('hospitals_per_100k', 0)
-        
-        context = f"""
-You are an expert urban planner analyzing data for Nairobi, Kenya.
-
-Current Urban Indicators:
-
-1. Population Density:
-   - Total Population: {pop_density.get('total_population', 0):,}
-   - Average Density: {pop_density.get('avg_density', 0):.2f} people/km²
-   - Most Dense Zone: {most_dense_zone}
-
-2. Land Use:
-   - Built-up Area: {land_use.get('built_up_percentage', 0):.2f}%
-   - Residential: {land_use.get('residential_area_km2', 0):.2f} km²
-   - Commercial: {land_use.get('commercial_area_km2', 0):.2f} km²
-
-3. Road Network:
-   - Road Density: {road_network.get('road_density_km_per_km2', 0):.3f} km/km²
-   - Total Roads: {road_network.get('total_length_km', 0):.2f} km
-
-4. Service Accessibility:
-   - Accessibility Score: {service_access.get('accessibility_score', 0):.2f}/100
-   - Hospitals: {service_access.get('total_hospitals', 0)}
-   - Schools: {service_access.get('total_schools', 0)}
-   - Hospitals per 100k: {hospitals_per_100k:.2f}
-
-5. Green Space:
-   - Green Space Coverage: {green_space.get('green_space_percentage', 0):.2f}%
-   - Per Capita: {green_space.get('per_capita_m2', 0):.2f} m²/person
-
-Based on this data, provide:
-1. 3-5 critical planning issues or concerns
-2. 3-5 specific, actionable recommendations for urban planners
-
-Respond ONLY with valid JSON in this exact format:
-{{
-  "issues": [
-    {{
-      "title": "Issue title",
-      "severity": "high|medium|low",
-      "description": "Detailed description",
-      "affected_metric": "population_density|service_accessibility|etc"
-    }}
-  ],
-  "recommendations": [
-    {{
-      "title": "Recommendation title",
-      "priority": "high|medium|low",
-      "description": "Specific action to take",
-      "target_area": "Specific zone or citywide",
-      "estimated_impact": "Expected outcome"
-    }}
-  ]
-}}
-"""
+        context = build_context(indicators)
     except Exception as e:
         return {
             'error': f'Error preparing context: {str(e)}',
@@ -99,7 +33,7 @@ Respond ONLY with valid JSON in this exact format:
         chat = LlmChat(
             api_key=api_key,
             session_id="urban_planning_nairobi",
-            system_message="You are an expert urban planner with deep knowledge of African cities, rapid urbanization, and infrastructure planning. You provide data-driven, actionable insights."
+            system_message=SYSTEM_MESSAGE
         )
         
         # Select model/provider
@@ -0,0 +1,26 @@
+import hashlib
+import json
+import numpy as np
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def canonical_json(value) -> str:
+    """
+    Deterministic JSON for a config: sorted keys, no whitespace, numpy values
+    as plain numbers (ints and floats stay distinct, as they simulate differently)
+    """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_default)
+
+
+def canonical_hash(value) -> str:
+    """
+    SHA-256 hex digest of canonical_json(value)
+    """
+    return hashlib.sha256(canonical_json(value).encode('utf-8')).hexdigest()
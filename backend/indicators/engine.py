@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+from indicators.urban_metrics import (
+    calculate_population_density,
+    calculate_land_use_ratio,
+    calculate_road_density,
+    calculate_service_accessibility,
+    calculate_capacity_accessibility,
+    calculate_green_space_coverage
+)
+from spatial_analysis.projection import projections_for
+from spatial_analysis.registry import layer_fingerprint
+
+# Bump whenever an indicator's definition or output shape changes, so results
+# memoized (or persisted) under the old definition are not reused
+INDICATOR_SET_VERSION = 5
+
+# Indicator name -> (layers it reads, compute(data, projections))
+INDICATORS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'population_density': (
+        ('residential',),
+        lambda data, proj: calculate_population_density(data['residential'], columnar=True)
+    ),
+    'land_use': (
+        ('residential', 'commercial'),
+        lambda data, proj: calculate_land_use_ratio(
+            data['residential'], data['commercial'], proj.metric('residential'), proj.metric('commercial')
+        )
+    ),
+    'road_network': (
+        ('roads', 'residential'),
+        lambda data, proj: calculate_road_density(
+            data['roads'], proj.metric('roads'), columnar=True, residential_proj=proj.metric('residential')
+        )
+    ),
+    'service_accessibility': (
+        ('facilities', 'residential'),
+        lambda data, proj: calculate_service_accessibility(
+            data['facilities'], data['residential'],
+            proj.metric('facilities'), proj.metric('residential')
+        )
+    ),
+    'capacity_accessibility': (
+        ('facilities', 'residential'),
+        lambda data, proj: calculate_capacity_accessibility(
+            data['facilities'], data['residential'],
+            proj.metric('facilities'), proj.metric('residential'), columnar=True
+        )
+    ),
+    'green_space': (
+        ('green_space', 'residential'),
+        lambda data, proj: calculate_green_space_coverage(
+            data['green_space'], data['residential'],
+            proj.metric('green_space'), proj.metric('residential'), columnar=True
+        )
+    ),
+}
+
+
+class IndicatorEngine:
+    """
+    Incremental indicator computation. Each indicator is memoized on the
+    content hashes of the layers it reads, so after a layer changes only the
+    indicators depending on it are recomputed.
+
+    One engine can be shared by the API and the scenario simulator; memo
+    entries for several cities / dataset versions coexist up to `max_entries`.
+    Zone-level results are kept as ZoneTables (shape_tables gives the
+    JSON-ready form).
+    """
+
+    def __init__(self, indicators: Mapping[str, Tuple[Tuple[str, ...], Callable]] = None,
+                 max_entries: int = 256):
+        self.indicators = dict(INDICATORS if indicators is None else indicators)
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_recomputed = []
+        self.computed_count = 0
+        self.reused_count = 0
+
+    def dependencies(self) -> Dict[str, Tuple[str, ...]]:
+        return {name: inputs for name, (inputs, _) in self.indicators.items()}
+
+    def _layer_versions(self, data, layers: Iterable[str]) -> Dict[str, str]:
+        # Dataset builds carry precomputed hashes; plain dicts are hashed here
+        known = getattr(data, 'layer_versions', None) or {}
+        return {layer: known.get(layer) or layer_fingerprint(data[layer]) for layer in layers}
+
+    def compute(self, data, only: Iterable[str] = None) -> Dict:
+        """
+        Indicators for `data` (a dataset build or a dict of layers).
+        Unchanged indicators are served from the memo.
+        """
+        names = list(self.indicators) if only is None else list(only)
+        needed = {layer for name in names for layer in self.indicators[name][0]}
+        versions = self._layer_versions(data, needed)
+        projections = projections_for(data)
+
+        results = {}
+        recomputed = []
+        for name in names:
+            key = self._key(name, versions)
+            compute = self.indicators[name][1]
+
+            with self._lock:
+                result = self._memo.get(key)
+                if result is not None:
+                    self._memo.move_to_end(key)
+                    self.reused_count += 1
+
+            if result is None:
+                result = compute(data, projections)
+                recomputed.append(name)
+                with self._lock:
+                    self._memo[key] = result
+                    self.computed_count += 1
+                    while len(self._memo) > self.max_entries:
+                        self._memo.popitem(last=False)
+
+            results[name] = result
+
+        self.last_recomputed = recomputed
+        return results
+
+    def _key(self, name: str, versions: Dict[str, str]) -> tuple:
+        return (name, tuple(versions[layer] for layer in self.indicators[name][0]))
+
+    def cached(self, data) -> Optional[Dict]:
+        """
+        All indicators for `data` if every one of them is memoized, else None
+        (never computes)
+        """
+        versions = self._layer_versions(data, {layer for inputs, _ in self.indicators.values() for layer in inputs})
+        with self._lock:
+            results = {name: self._memo.get(self._key(name, versions)) for name in self.indicators}
+            if any(result is None for result in results.values()):
+                return None
+            for name in results:
+                self._memo.move_to_end(self._key(name, versions))
+            self.reused_count += len(results)
+        return results
+
+    def prime(self, data, results: Dict):
+        """
+        Memoize results computed elsewhere (e.g. loaded from a shared cache)
+        """
+        names = [name for name in results if name in self.indicators]
+        versions = self._layer_versions(data, {layer for name in names for layer in self.indicators[name][0]})
+        with self._lock:
+            for name in names:
+                self._memo[self._key(name, versions)] = results[name]
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+
+    def invalidate(self, names: Iterable[str] = None):
+        """
+        Forget memoized results (for the given indicators, or all)
+        """
+        with self._lock:
+            if names is None:
+                self._memo.clear()
+                return
+            names = set(names)
+            for key in [k for k in self._memo if k[0] in names]:
+                del self._memo[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'memo_entries': len(self._memo),
+                'computed': self.computed_count,
+                'reused': self.reused_count,
+                'last_recomputed': list(self.last_recomputed),
+                'indicator_set_version': INDICATOR_SET_VERSION
+            }
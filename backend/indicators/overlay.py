@@ -0,0 +1,25 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from indicators.accessibility import QUERY_CHUNK
+
+
+def zone_overlap_area(zones: np.ndarray, features: np.ndarray, chunk_size: int = QUERY_CHUNK) -> np.ndarray:
+    """
+    Area of `features` inside each zone (both metric-CRS polygon arrays).
+    Only zone / feature pairs whose geometries intersect, as found by an
+    STRtree bulk query, are intersected; areas are summed per zone with
+    bincount. Overlapping features are counted once each.
+    """
+    areas = np.zeros(len(zones))
+    if len(zones) == 0 or len(features) == 0:
+        return areas
+
+    tree = STRtree(features)
+    for start in range(0, len(zones), chunk_size):
+        block = zones[start:start + chunk_size]
+        zone_idx, feature_idx = tree.query(block, predicate='intersects')
+        overlap = shapely.area(shapely.intersection(block[zone_idx], features[feature_idx]))
+        areas[start:start + len(block)] = np.bincount(zone_idx, weights=overlap, minlength=len(block))
+    return areas
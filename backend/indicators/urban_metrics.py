@@ -1,9 +1,31 @@
 import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Point, box
 from typing import Dict, List
 
-def calculate_population_density(residential_gdf: gpd.GeoDataFrame) -> Dict:
+from indicators.accessibility import facility_counts, zone_accessibility_scores, two_step_floating_catchment
+from indicators.overlay import zone_overlap_area
+from indicators.zone_table import ZoneTable
+from spatial_analysis.projection import METRIC_EPSG, project_layer, projections_for
+
+# Zone-level results are returned as JSON-ready lists of row dicts; with
+# columnar=True they stay ZoneTables (as IndicatorEngine keeps them, for paging)
+
+def study_area_km2(*layers_proj: gpd.GeoDataFrame) -> float:
+    """
+    Area of the extent of metric-CRS layers: the study area that land use,
+    road density and green space figures are normalized by
+    """
+    geoms = np.concatenate([np.asarray(layer.geometry.values) for layer in layers_proj])
+    if len(geoms) == 0:
+        return 0.0
+    return float(shapely.area(shapely.box(*shapely.total_bounds(geoms)))) / 1e6
+
+def _area_km2(layer_proj: gpd.GeoDataFrame) -> np.ndarray:
+    return shapely.area(np.asarray(layer_proj.geometry.values)) / 1e6
+
+def calculate_population_density(residential_gdf: gpd.GeoDataFrame, columnar: bool = False) -> Dict:
     """
     Calculate population density metrics
     """
@@ -14,38 +36,42 @@ def calculate_population_density(residential_gdf: gpd.GeoDataFrame) -> Dict:
     total_area = residential_gdf['area_km2'].sum()
     avg_density = total_pop / total_area if total_area > 0 else 0
     
-    # Get zone-level metrics
-    zones = []
-    for _, row in residential_gdf.iterrows():
-        zones.append({
-            'name': row['name'],
-            'density': float(row['density']),
-            'population': int(row['population']),
-            'area_km2': float(row['area_km2'])
-        })
+    # Zone-level metrics, taken column-wise and ranked densest first
+    zones = ZoneTable({
+        'name': residential_gdf['name'].to_numpy(),
+        'density': residential_gdf['density'].to_numpy(dtype=float),
+        'population': residential_gdf['population'].to_numpy(dtype=np.int64),
+        'area_km2': residential_gdf['area_km2'].to_numpy(dtype=float)
+    }, sort_by='density', descending=True)
     
     return {
         'total_population': int(total_pop),
         'avg_density': round(avg_density, 2),
         'total_area_km2': round(total_area, 2),
-        'zones': sorted(zones, key=lambda x: x['density'], reverse=True)
+        'zones': zones if columnar else zones.to_records()
     }
 
 def calculate_land_use_ratio(residential_gdf: gpd.GeoDataFrame, 
-                            commercial_gdf: gpd.GeoDataFrame) -> Dict:
+                            commercial_gdf: gpd.GeoDataFrame,
+                            residential_proj: gpd.GeoDataFrame = None,
+                            commercial_proj: gpd.GeoDataFrame = None) -> Dict:
     """
     Calculate built-up vs open land ratio
+    Areas come from the zone geometries, over the study area of both layers.
     """
-    residential_area = residential_gdf['area_km2'].sum() if not residential_gdf.empty else 0
-    commercial_area = commercial_gdf['area_km2'].sum() if not commercial_gdf.empty else 0
+    if residential_proj is None:
+        residential_proj = project_layer(residential_gdf, METRIC_EPSG)
+    if commercial_proj is None:
+        commercial_proj = project_layer(commercial_gdf, METRIC_EPSG)
     
-    # Nairobi metro approximate area
-    total_metro_area = 696  # km²
+    residential_area = float(_area_km2(residential_proj).sum())
+    commercial_area = float(_area_km2(commercial_proj).sum())
+    total_area = study_area_km2(residential_proj, commercial_proj)
     
     built_up = residential_area + commercial_area
-    open_land = total_metro_area - built_up
+    open_land = max(total_area - built_up, 0)
     
-    built_up_pct = (built_up / total_metro_area) * 100 if total_metro_area > 0 else 0
+    built_up_pct = (built_up / total_area) * 100 if total_area > 0 else 0
     
     return {
         'residential_area_km2': round(residential_area, 2),
@@ -53,44 +79,50 @@ def calculate_land_use_ratio(residential_gdf: gpd.GeoDataFrame,
         'built_up_area_km2': round(built_up, 2),
         'open_land_km2': round(open_land, 2),
         'built_up_percentage': round(built_up_pct, 2),
-        'total_metro_area_km2': total_metro_area
+        'total_metro_area_km2': round(total_area, 2)
     }
 
-def calculate_road_density(roads_gdf: gpd.GeoDataFrame) -> Dict:
+def calculate_road_density(roads_gdf: gpd.GeoDataFrame,
+                           roads_proj: gpd.GeoDataFrame = None, columnar: bool = False,
+                           residential_proj: gpd.GeoDataFrame = None) -> Dict:
     """
     Calculate road density and connectivity metrics
+    (roads_proj: the roads layer already in the metric CRS, if cached).
+    Density is per km² of the study area of the roads and, if given, the
+    residential zones (metric CRS).
     """
     if roads_gdf.empty:
-        return {'total_length_km': 0, 'road_density': 0, 'roads': []}
+        return {'total_length_km': 0, 'road_density_km_per_km2': 0, 'major_roads_count': 0, 'roads': []}
     
     # Calculate total road length
     # Convert to meters, then to km
-    roads_projected = roads_gdf.to_crs("EPSG:32737")  # UTM Zone 37S for Nairobi
+    roads_projected = roads_proj if roads_proj is not None else project_layer(roads_gdf, METRIC_EPSG)
     total_length = roads_projected.geometry.length.sum() / 1000  # to km
     
-    # Approximate Nairobi metro area
-    metro_area = 696  # km²
-    road_density = total_length / metro_area
+    area_layers = (roads_projected,) if residential_proj is None else (roads_projected, residential_proj)
+    metro_area = study_area_km2(*area_layers)
+    road_density = total_length / metro_area if metro_area > 0 else 0
     
-    roads_list = []
-    for _, row in roads_gdf.iterrows():
-        roads_list.append({
-            'name': row['name'],
-            'type': row['type']
-        })
+    roads_list = ZoneTable({
+        'name': roads_gdf['name'].to_numpy(),
+        'type': roads_gdf['type'].to_numpy()
+    })
     
     return {
         'total_length_km': round(total_length, 2),
         'road_density_km_per_km2': round(road_density, 3),
         'major_roads_count': len(roads_gdf),
-        'roads': roads_list
+        'roads': roads_list if columnar else roads_list.to_records()
     }
 
 def calculate_service_accessibility(facilities_gdf: gpd.GeoDataFrame, 
-                                   residential_gdf: gpd.GeoDataFrame) -> Dict:
+                                   residential_gdf: gpd.GeoDataFrame,
+                                   facilities_proj: gpd.GeoDataFrame = None,
+                                   residential_proj: gpd.GeoDataFrame = None) -> Dict:
     """
     Calculate service accessibility index
     Based on proximity of healthcare and education to residential areas
+    (*_proj: the layers already in the metric CRS, if cached)
     """
     if facilities_gdf.empty or residential_gdf.empty:
         return {'accessibility_score': 0, 'coverage': {}}
@@ -101,27 +133,19 @@ def calculate_service_accessibility(facilities_gdf: gpd.GeoDataFrame,
     # Simple accessibility: count facilities within 5km of each residential zone
     service_radius = 5000  # 5km in meters
     
-    # Project to metric CRS
-    facilities_proj = facilities_gdf.to_crs("EPSG:32737")
-    residential_proj = residential_gdf.to_crs("EPSG:32737")
-    
-    access_scores = []
-    for _, res_zone in residential_proj.iterrows():
-        centroid = res_zone.geometry.centroid
-        
-        # Count nearby facilities
-        nearby_hospitals = sum(facilities_proj[facilities_proj['type'] == 'hospital'].geometry.distance(centroid) <= service_radius)
-        nearby_schools = sum(facilities_proj[facilities_proj['type'] == 'school'].geometry.distance(centroid) <= service_radius)
-        
-        # Simple score: normalized by population
-        pop = res_zone['population']
-        hospital_ratio = (nearby_hospitals * 1000) / pop if pop > 0 else 0
-        school_ratio = (nearby_schools * 1000) / pop if pop > 0 else 0
-        
-        zone_score = (hospital_ratio * 0.6 + school_ratio * 0.4) * 100
-        access_scores.append(zone_score)
-    
-    avg_score = np.mean(access_scores) if access_scores else 0
+    # Project to metric CRS (reuse cached projections when given)
+    if facilities_proj is None:
+        facilities_proj = project_layer(facilities_gdf, METRIC_EPSG)
+    if residential_proj is None:
+        residential_proj = project_layer(residential_gdf, METRIC_EPSG)
+    
+    # Count hospitals and schools within the radius of every zone centroid at once
+    counts = facility_counts(residential_proj, facilities_proj, service_radius, ('hospital', 'school'))
+    access_scores = zone_accessibility_scores(counts['hospital'], counts['school'],
+                                              residential_proj['population'].to_numpy())
+    
+    avg_score = np.mean(access_scores) if len(access_scores) else 0
+    total_pop = residential_gdf['population'].sum()
     
     return {
         'accessibility_score': round(min(avg_score, 100), 2),
@@ -130,44 +154,159 @@ def calculate_service_accessibility(facilities_gdf: gpd.GeoDataFrame,
         'hospital_capacity': int(hospitals['capacity'].sum()) if not hospitals.empty else 0,
         'school_capacity': int(schools['capacity'].sum()) if not schools.empty else 0,
         'coverage': {
-            'hospitals_per_100k': round((len(hospitals) * 100000) / residential_gdf['population'].sum(), 2) if not residential_gdf.empty else 0,
-            'schools_per_100k': round((len(schools) * 100000) / residential_gdf['population'].sum(), 2) if not residential_gdf.empty else 0
+            'hospitals_per_100k': round((len(hospitals) * 100000) / total_pop, 2) if total_pop > 0 else 0,
+            'schools_per_100k': round((len(schools) * 100000) / total_pop, 2) if total_pop > 0 else 0
+        }
+    }
+
+def calculate_capacity_accessibility(facilities_gdf: gpd.GeoDataFrame,
+                                    residential_gdf: gpd.GeoDataFrame,
+                                    facilities_proj: gpd.GeoDataFrame = None,
+                                    residential_proj: gpd.GeoDataFrame = None,
+                                    catchment_m: float = 5000, columnar: bool = False) -> Dict:
+    """
+    Capacity-aware accessibility: Gaussian two-step floating catchment (2SFCA)
+    Facility capacity (beds, school places) is shared among the population
+    within the catchment, so crowded catchments score lower than sparse ones.
+    Scores are capacity units per 1,000 residents.
+    """
+    facility_types = ('hospital', 'school')
+    if facilities_gdf.empty or residential_gdf.empty:
+        return {'catchment_km': catchment_m / 1000, 'citywide': {t: 0 for t in facility_types}, 'zones': []}
+    
+    if facilities_proj is None:
+        facilities_proj = project_layer(facilities_gdf, METRIC_EPSG)
+    if residential_proj is None:
+        residential_proj = project_layer(residential_gdf, METRIC_EPSG)
+    
+    centroids = residential_proj.geometry.centroid
+    zone_xy = np.column_stack([centroids.x.to_numpy(), centroids.y.to_numpy()])
+    population = residential_proj['population'].to_numpy(dtype=float)
+    total_pop = population.sum()
+    
+    facility_xy = np.column_stack([facilities_proj.geometry.x.to_numpy(), facilities_proj.geometry.y.to_numpy()])
+    facility_type = facilities_proj['type'].to_numpy()
+    capacity = facilities_proj['capacity'].to_numpy(dtype=float)
+    
+    per_type = {}
+    summary = {}
+    for ftype in facility_types:
+        mask = facility_type == ftype
+        scores = two_step_floating_catchment(zone_xy, population, facility_xy[mask], capacity[mask],
+                                             catchment_m) * 1000
+        per_type[ftype] = scores
+        unserved = scores == 0
+        summary[ftype] = {
+            # Population-weighted mean equals total reachable capacity / total population
+            'score_per_1000': round(float((scores * population).sum() / total_pop), 3) if total_pop > 0 else 0,
+            'median_zone_score': round(float(np.median(scores)), 3),
+            'zones_without_access': int(unserved.sum()),
+            'population_without_access': int(population[unserved].sum())
         }
+    
+    zones = ZoneTable({
+        'name': residential_gdf['name'].to_numpy(),
+        'hospital_score': np.round(per_type['hospital'], 3),
+        'school_score': np.round(per_type['school'], 3)
+    }, sort_by='hospital_score')
+    
+    return {
+        'method': '2SFCA (Gaussian decay)',
+        'catchment_km': catchment_m / 1000,
+        'citywide': summary,
+        'zones': zones if columnar else zones.to_records()
     }
 
-def calculate_green_space_coverage() -> Dict:
+def calculate_green_space_coverage(green_space_gdf: gpd.GeoDataFrame,
+                                  residential_gdf: gpd.GeoDataFrame,
+                                  green_space_proj: gpd.GeoDataFrame = None,
+                                  residential_proj: gpd.GeoDataFrame = None, columnar: bool = False) -> Dict:
     """
-    Estimate green space coverage for Nairobi
-    (Using approximate data for demo)
+    Green space coverage and per-capita green space, citywide and per zone
+    Per-zone values come from an area-weighted overlay of the green space
+    polygons on the residential zones (spatial-index candidate pairs only).
+    Zones are ranked by their deficit against the WHO minimum of 9 m²/person.
+    The study area is the extent of the residential and green space layers.
+    Citywide, per-space and per-zone areas all come from the projected
+    geometries; residential_green_km2 is the sum of the zones' green areas.
     """
-    # Known green spaces in Nairobi
-    green_spaces = [
-        {'name': 'Karura Forest', 'area_km2': 10.2},
-        {'name': 'Nairobi Arboretum', 'area_km2': 0.3},
-        {'name': 'Uhuru Park', 'area_km2': 0.13},
-        {'name': 'Central Park', 'area_km2': 0.04},
-        {'name': 'City Park', 'area_km2': 0.6},
-    ]
+    who_minimum_m2 = 9
+    total_pop = residential_gdf['population'].sum() if not residential_gdf.empty else 0
+    
+    if green_space_proj is None:
+        green_space_proj = project_layer(green_space_gdf, METRIC_EPSG)
+    if residential_proj is None:
+        residential_proj = project_layer(residential_gdf, METRIC_EPSG)
+    
+    zone_geoms = np.asarray(residential_proj.geometry.values)
+    green_geoms = np.asarray(green_space_proj.geometry.values)
+    zone_area_m2 = shapely.area(zone_geoms)
+    green_m2 = np.minimum(zone_overlap_area(zone_geoms, green_geoms), zone_area_m2)
+    space_km2 = shapely.area(green_geoms) / 1e6
+    total_green = space_km2.sum()
+    
+    study_area = study_area_km2(residential_proj, green_space_proj)
+    population = residential_gdf['population'].to_numpy(dtype=float)
     
-    total_green = sum(space['area_km2'] for space in green_spaces)
-    metro_area = 696  # km²
-    green_percentage = (total_green / metro_area) * 100
+    per_capita = np.divide(green_m2, population, out=np.zeros_like(green_m2), where=population > 0)
+    deficit = np.maximum(who_minimum_m2 * population - green_m2, 0)
+    below = (per_capita < who_minimum_m2) & (population > 0)
+    
+    zones = ZoneTable({
+        'name': residential_gdf['name'].to_numpy(),
+        'green_km2': np.round(green_m2 / 1e6, 3),
+        'coverage_pct': np.round(np.divide(green_m2, zone_area_m2, out=np.zeros_like(green_m2),
+                                           where=zone_area_m2 > 0) * 100, 2),
+        'per_capita_m2': np.round(per_capita, 2),
+        'deficit_m2': np.round(deficit).astype(np.int64)
+    }, sort_by='deficit_m2', descending=True)
+    
+    spaces = ZoneTable({
+        'name': green_space_gdf['name'].to_numpy(),
+        'type': green_space_gdf['type'].to_numpy(),
+        'area_km2': np.round(space_km2, 3)
+    })
     
     return {
-        'total_green_space_km2': round(total_green, 2),
-        'green_space_percentage': round(green_percentage, 2),
-        'spaces': green_spaces,
-        'per_capita_m2': round((total_green * 1000000) / 4500000, 2)  # Approx Nairobi pop: 4.5M
+        'total_green_space_km2': round(float(total_green), 2),
+        'green_space_percentage': round(float(total_green / study_area * 100), 2) if study_area > 0 else 0,
+        'study_area_km2': round(float(study_area), 2),
+        'residential_green_km2': round(float(green_m2.sum() / 1e6), 2),
+        'spaces': spaces if columnar else spaces.to_records(),
+        'per_capita_m2': round(float(total_green * 1000000 / total_pop), 2) if total_pop > 0 else 0,
+        'residential_coverage_pct': round(float(green_m2.sum() / zone_area_m2.sum() * 100), 2) if zone_area_m2.sum() > 0 else 0,
+        'zones_below_who_minimum': int(below.sum()),
+        'population_below_who_minimum': int(population[below].sum()),
+        'zones': zones if columnar else zones.to_records()
     }
 
 def calculate_all_indicators(data: Dict) -> Dict:
     """
     Calculate all urban indicators
+    Metric-CRS layers come from the dataset's projection cache, so each layer
+    is reprojected at most once per dataset version.
     """
+    projections = projections_for(data)
+    
     return {
         'population_density': calculate_population_density(data['residential']),
-        'land_use': calculate_land_use_ratio(data['residential'], data['commercial']),
-        'road_network': calculate_road_density(data['roads']),
-        'service_accessibility': calculate_service_accessibility(data['facilities'], data['residential']),
-        'green_space': calculate_green_space_coverage()
+        'land_use': calculate_land_use_ratio(
+            data['residential'], data['commercial'],
+            projections.metric('residential'), projections.metric('commercial')
+        ),
+        'road_network': calculate_road_density(
+            data['roads'], projections.metric('roads'), residential_proj=projections.metric('residential')
+        ),
+        'service_accessibility': calculate_service_accessibility(
+            data['facilities'], data['residential'],
+            projections.metric('facilities'), projections.metric('residential')
+        ),
+        'capacity_accessibility': calculate_capacity_accessibility(
+            data['facilities'], data['residential'],
+            projections.metric('facilities'), projections.metric('residential')
+        ),
+        'green_space': calculate_green_space_coverage(
+            data['green_space'], data['residential'],
+            projections.metric('green_space'), projections.metric('residential')
+        )
     }
\ No newline at end of file
@@ -0,0 +1,172 @@
+import numpy as np
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.encoders import ENCODERS_BY_TYPE
+
+
+class ZoneTable(Sequence):
+    """
+    Column-oriented per-zone (or per-feature) indicator results.
+
+    Columns are kept as the arrays they were taken from, plus a row order
+    (the indicator's default ranking). Sorting, paging and column selection
+    only produce a new order / column set; Python objects are built when the
+    table is serialized, and only for the rows and fields requested.
+
+    Indexing and iteration yield one dict per row in the current order, and
+    a table compares equal to its list of row dicts, so code written against
+    the former list-of-dicts output keeps working. jsonable_encoder (FastAPI
+    responses) encodes it as that list; json.dumps needs shape_tables first.
+    """
+
+    def __init__(self, columns: Dict[str, Iterable], sort_by: Optional[str] = None,
+                 descending: bool = False, order: Optional[np.ndarray] = None):
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        n_rows = lengths.pop() if lengths else 0
+
+        self.order = np.arange(n_rows) if order is None else np.asarray(order, dtype=np.int64)
+        if sort_by is not None:
+            self.order = self._sorted_order(sort_by, descending)
+
+    def _sorted_order(self, column: str, descending: bool) -> np.ndarray:
+        """
+        The current rows reordered by one column
+        """
+        if column not in self.columns:
+            raise ValueError(f"Unknown field '{column}'")
+        values = self.columns[column][self.order]
+        if not descending:
+            return self.order[np.argsort(values, kind='stable')]
+        if np.issubdtype(values.dtype, np.number):
+            # Stable on ties, like sorted(..., reverse=True)
+            return self.order[np.argsort(-values, kind='stable')]
+        return self.order[np.argsort(values, kind='stable')[::-1]]
+
+    def _view(self, columns: Dict[str, np.ndarray] = None, order: np.ndarray = None) -> 'ZoneTable':
+        return ZoneTable(self.columns if columns is None else columns,
+                         order=self.order if order is None else order)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._view(order=self.order[index])
+        row = self.order[index]
+        # tolist() gives plain Python values for numeric and object (str) columns alike
+        return {name: values[row:row + 1].tolist()[0] for name, values in self.columns.items()}
+
+    def __iter__(self):
+        return iter(self.to_records())
+
+    def __eq__(self, other):
+        if isinstance(other, ZoneTable):
+            other = other.to_records()
+        if not isinstance(other, list):
+            return NotImplemented
+        return self.to_records() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ZoneTable(rows={len(self)}, fields={self.fields})"
+
+    def sort(self, column: str, descending: bool = False) -> 'ZoneTable':
+        """
+        Rows of this view ordered by one column (raises ValueError if unknown)
+        """
+        return self._view(order=self._sorted_order(column, descending))
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> 'ZoneTable':
+        end = None if limit is None else offset + limit
+        return self._view(order=self.order[offset:end])
+
+    def select(self, fields: Iterable[str]) -> 'ZoneTable':
+        """
+        Only the given columns (unknown names are ignored)
+        """
+        return self._view(columns={name: self.columns[name] for name in fields if name in self.columns})
+
+    def to_records(self) -> List[Dict]:
+        names = list(self.columns)
+        values = [self.columns[name][self.order].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def to_columns(self) -> Dict[str, List]:
+        return {name: values[self.order].tolist() for name, values in self.columns.items()}
+
+
+def iter_tables(indicators):
+    """
+    Every ZoneTable nested in an indicator result
+    """
+    if isinstance(indicators, ZoneTable):
+        yield indicators
+    elif isinstance(indicators, Mapping):
+        for value in indicators.values():
+            yield from iter_tables(value)
+
+
+def shape_tables(indicators, sort_by: Optional[str] = None, descending: bool = False,
+                 offset: int = 0, limit: Optional[int] = None, fields: Optional[List[str]] = None,
+                 layout: str = 'records'):
+    """
+    JSON-ready copy of an indicator result: every ZoneTable inside it is
+    sorted, paged and projected, then serialized as a list of records or as
+    columns. Tables without the `sort_by` column keep their default order;
+    `name` is always kept when `fields` is given.
+    """
+    if isinstance(indicators, ZoneTable):
+        table = indicators
+        if sort_by is not None and sort_by in table.columns:
+            table = table.sort(sort_by, descending)
+        table = table.page(offset, limit)
+        if fields is not None:
+            table = table.select(['name'] + [f for f in fields if f != 'name'])
+        return table.to_columns() if layout == 'columns' else table.to_records()
+    if isinstance(indicators, Mapping):
+        return {key: shape_tables(value, sort_by, descending, offset, limit, fields, layout)
+                for key, value in indicators.items()}
+    return indicators
+
+
+def encode_tables(indicators):
+    """
+    BSON / JSON-safe form of an indicator result: ZoneTables become
+    {'__zone_table__': columns} in their current order, numpy scalars
+    become Python numbers
+    """
+    if isinstance(indicators, ZoneTable):
+        return {'__zone_table__': indicators.to_columns()}
+    if isinstance(indicators, dict):
+        return {key: encode_tables(value) for key, value in indicators.items()}
+    if isinstance(indicators, list):
+        return [encode_tables(value) for value in indicators]
+    if isinstance(indicators, np.generic):
+        return indicators.item()
+    return indicators
+
+
+def decode_tables(document):
+    """
+    Inverse of encode_tables
+    """
+    if isinstance(document, dict):
+        if set(document) == {'__zone_table__'}:
+            return ZoneTable(document['__zone_table__'])
+        return {key: decode_tables(value) for key, value in document.items()}
+    if isinstance(document, list):
+        return [decode_tables(value) for value in document]
+    return document
+
+
+# Serialize tables in FastAPI responses as their list of row dicts
+ENCODERS_BY_TYPE[ZoneTable] = ZoneTable.to_records
@@ -0,0 +1,16 @@
+from common.hashing import canonical_hash
+
+# Multiset hashes are sums of item hashes modulo 2^256: independent of item
+# order, and updated in O(1) when an item is added or removed
+MULTISET_MODULUS = 2 ** 256
+
+
+def item_hash(value) -> int:
+    return int(canonical_hash(value), 16)
+
+
+def multiset_hash(items) -> int:
+    """
+    Order-insensitive hash of a list of configs (duplicates counted)
+    """
+    return sum(item_hash(item) for item in items) % MULTISET_MODULUS
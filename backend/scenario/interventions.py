@@ -0,0 +1,176 @@
+from typing import Dict, List
+import numpy as np
+
+# Planning assumptions per intervention type, shared by the scalar and batch
+# simulation paths:
+#   cost                        default cost (USD) when the intervention gives none
+#   beneficiaries               people served, plus beneficiaries_per_capacity * capacity
+#   capacity                    default capacity
+#   access_gain                 accessibility score points (capped by deficit_share
+#                               of the remaining deficit, 100 - current score, if set)
+#   time_months                 implementation time
+#   equity / underserved_equity equity score, the latter when the current
+#                               accessibility score is below underserved_below
+#   service_radius_m            residential zones served when the intervention
+#                               is placed (see scenario.spatial_impact); None =
+#                               not spatially modelled
+INTERVENTIONS: Dict[str, Dict] = {
+    'hospital': {
+        # 5km service radius, avg 10,000 ppl/km2 (~785,000 people)
+        'cost': 3000000, 'beneficiaries': int(np.pi * (5**2) * 10000), 'beneficiaries_per_capacity': 0,
+        'capacity': 150, 'access_gain': 15.0, 'deficit_share': 0.2, 'time_months': 24,
+        'equity': 5.0, 'underserved_equity': 8.0, 'underserved_below': 5, 'service_radius_m': 5000
+    },
+    'brt': {
+        # Daily commuters
+        'cost': 50000000, 'beneficiaries': 150000, 'beneficiaries_per_capacity': 0,
+        'capacity': 0, 'access_gain': 8.0, 'deficit_share': None, 'time_months': 36,
+        'equity': 6.0, 'underserved_equity': 6.0, 'underserved_below': 0, 'service_radius_m': 1000
+    },
+    'park': {
+        # 2km radius (~150,000 people)
+        'cost': 3000000, 'beneficiaries': int(np.pi * (2**2) * 12000), 'beneficiaries_per_capacity': 0,
+        'capacity': 0, 'access_gain': 3.0, 'deficit_share': None, 'time_months': 18,
+        'equity': 7.0, 'underserved_equity': 7.0, 'underserved_below': 0, 'service_radius_m': 2000
+    },
+    'school': {
+        # Students + family members
+        'cost': 5000000, 'beneficiaries': 0, 'beneficiaries_per_capacity': 4,
+        'capacity': 1000, 'access_gain': 10.0, 'deficit_share': None, 'time_months': 30,
+        'equity': 9.0, 'underserved_equity': 9.0, 'underserved_below': 0, 'service_radius_m': 5000
+    },
+    'road': {
+        'cost': 10000000, 'beneficiaries': 80000, 'beneficiaries_per_capacity': 0,
+        'capacity': 0, 'access_gain': 5.0, 'deficit_share': None, 'time_months': 24,
+        'equity': 4.0, 'underserved_equity': 4.0, 'underserved_below': 0, 'service_radius_m': 1000
+    },
+    # Unknown intervention type - conservative estimates
+    'unknown': {
+        'cost': 1000000, 'beneficiaries': 10000, 'beneficiaries_per_capacity': 0,
+        'capacity': 0, 'access_gain': 2.0, 'deficit_share': None, 'time_months': 12,
+        'equity': 3.0, 'underserved_equity': 3.0, 'underserved_below': 0, 'service_radius_m': None
+    },
+}
+
+KNOWN_TYPES = tuple(t for t in INTERVENTIONS if t != 'unknown')
+TYPE_NAMES = KNOWN_TYPES + ('unknown',)
+TYPE_INDEX = {name: i for i, name in enumerate(TYPE_NAMES)}
+UNKNOWN_INDEX = TYPE_INDEX['unknown']
+
+
+def type_index(intervention_type) -> int:
+    """
+    Index of an intervention type, case-insensitive; missing, null and
+    non-string types are unknown
+    """
+    if not isinstance(intervention_type, str):
+        return UNKNOWN_INDEX
+    return TYPE_INDEX.get(intervention_type.lower(), UNKNOWN_INDEX)
+
+
+def resolve_effects(current_score: float) -> Dict[str, Dict]:
+    """
+    Per-type effects for a baseline accessibility score: the deficit cap on
+    access gain and the underserved equity bonus applied
+    """
+    effects = {}
+    for name, params in INTERVENTIONS.items():
+        access_gain = params['access_gain']
+        if params['deficit_share'] is not None:
+            access_gain = min(access_gain, (100 - current_score) * params['deficit_share'])
+        equity = params['underserved_equity'] if current_score < params['underserved_below'] else params['equity']
+        effects[name] = {**params, 'access_gain': access_gain, 'equity': equity}
+    return effects
+
+
+def effect_arrays(effects: Dict[str, Dict]) -> Dict[str, np.ndarray]:
+    """
+    The resolved effects as arrays indexed by type index
+    """
+    fields = ('cost', 'beneficiaries', 'beneficiaries_per_capacity', 'capacity',
+              'access_gain', 'time_months', 'equity')
+    return {field: np.array([effects[name][field] for name in TYPE_NAMES], dtype=float) for field in fields}
+
+
+class ScenarioBatch:
+    """
+    Many scenarios encoded as flat arrays, one entry per intervention:
+    owning scenario, type index, cost and capacity (NaN = type default).
+    Integer flags remember whether the given cost / capacity values were
+    ints, so batch totals come back with the same Python types as the
+    scalar path.
+    """
+
+    def __init__(self, n_scenarios: int, scenario_idx: np.ndarray, type_idx: np.ndarray,
+                 cost: np.ndarray = None, capacity: np.ndarray = None,
+                 cost_is_int: np.ndarray = None, capacity_is_int: np.ndarray = None):
+        n = len(type_idx)
+        self.n_scenarios = n_scenarios
+        self.scenario_idx = np.asarray(scenario_idx, dtype=np.int64)
+        self.type_idx = np.asarray(type_idx, dtype=np.int64)
+        self.cost = np.full(n, np.nan) if cost is None else np.asarray(cost, dtype=float)
+        self.capacity = np.full(n, np.nan) if capacity is None else np.asarray(capacity, dtype=float)
+        self.cost_is_int = np.ones(n, dtype=bool) if cost_is_int is None else np.asarray(cost_is_int, dtype=bool)
+        self.capacity_is_int = np.ones(n, dtype=bool) if capacity_is_int is None else np.asarray(capacity_is_int, dtype=bool)
+
+    @classmethod
+    def from_scenarios(cls, scenarios: List[Dict]) -> 'ScenarioBatch':
+        scenario_idx, type_idx, cost, capacity, cost_is_int, capacity_is_int = [], [], [], [], [], []
+        for i, scenario in enumerate(scenarios):
+            for intervention in scenario.get('interventions', []):
+                scenario_idx.append(i)
+                type_idx.append(type_index(intervention.get('type', '')))
+                c = intervention.get('cost')
+                k = intervention.get('capacity')
+                cost.append(np.nan if c is None else c)
+                capacity.append(np.nan if k is None else k)
+                cost_is_int.append(c is None or isinstance(c, int))
+                capacity_is_int.append(k is None or isinstance(k, int))
+        return cls(len(scenarios), np.array(scenario_idx, dtype=np.int64), np.array(type_idx, dtype=np.int64),
+                   np.array(cost, dtype=float), np.array(capacity, dtype=float),
+                   np.array(cost_is_int, dtype=bool), np.array(capacity_is_int, dtype=bool))
+
+    def __len__(self) -> int:
+        return self.n_scenarios
+
+
+def evaluate_batch(batch: ScenarioBatch, effects: Dict[str, Dict]) -> Dict[str, np.ndarray]:
+    """
+    Cost, beneficiaries, access gain, time, equity and confidence for every
+    scenario of a batch in one vectorized pass. Sums accumulate in
+    intervention order (bincount), matching the scalar loop exactly.
+    """
+    table = effect_arrays(effects)
+    n, s, t = batch.n_scenarios, batch.scenario_idx, batch.type_idx
+
+    cost = np.where(np.isnan(batch.cost), table['cost'][t], batch.cost)
+    capacity = np.where(np.isnan(batch.capacity), table['capacity'][t], batch.capacity)
+    beneficiaries = table['beneficiaries'][t] + table['beneficiaries_per_capacity'][t] * capacity
+
+    time_months = np.zeros(n)
+    np.maximum.at(time_months, s, table['time_months'][t])
+
+    count = np.bincount(s, minlength=n)
+    known = np.bincount(s, weights=t != UNKNOWN_INDEX, minlength=n)
+
+    # Only school beneficiaries depend on capacity, so only those flags matter
+    capacity_matters = table['beneficiaries_per_capacity'][t] != 0
+    return {
+        'n_interventions': count,
+        'total_cost': np.bincount(s, weights=cost, minlength=n),
+        'cost_is_int': np.bincount(s, weights=~batch.cost_is_int, minlength=n) == 0,
+        'beneficiaries': np.bincount(s, weights=beneficiaries, minlength=n),
+        'beneficiaries_is_int': np.bincount(s, weights=capacity_matters & ~batch.capacity_is_int, minlength=n) == 0,
+        'access_gain': np.bincount(s, weights=table['access_gain'][t], minlength=n),
+        'time_months': time_months,
+        'equity': np.bincount(s, weights=table['equity'][t], minlength=n),
+        'known_ratio': np.divide(known, count, out=np.zeros(n), where=count > 0)
+    }
+
+
+def confidence_levels(known_ratio: np.ndarray, n_interventions: np.ndarray) -> np.ndarray:
+    """
+    HIGH / MEDIUM / LOW from the share of known intervention types
+    """
+    levels = np.select([known_ratio >= 0.8, known_ratio >= 0.5], ['HIGH', 'MEDIUM'], 'LOW')
+    return np.where(n_interventions == 0, 'LOW', levels)
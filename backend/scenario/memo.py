@@ -0,0 +1,254 @@
+import threading
+from collections import Counter, OrderedDict
+from fractions import Fraction
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scenario.hashing import MULTISET_MODULUS, item_hash, multiset_hash
+from scenario.interventions import UNKNOWN_INDEX, type_index
+
+
+class ExactSum:
+    """
+    Order-independent running sum: ints add exactly, floats as exact
+    fractions, so adding and later removing a value leaves no rounding
+    residue. The value is an int while only ints are included, else the
+    exact total rounded once to a float.
+
+    ScenarioSimulator adds its floats left to right in list order (as does
+    the batch path), rounding at every step, so a float total here can
+    differ from simulate_scenario's in the last bits: effects are never
+    negative, so by at most a relative (n - 1) * 2**-53 for n interventions.
+    Ints, types, time and confidence are identical.
+    """
+
+    __slots__ = ('ints', 'fractions', 'floats')
+
+    def __init__(self):
+        self.ints = 0
+        self.fractions = Fraction(0)
+        self.floats = 0
+
+    def add(self, value, sign: int = 1):
+        if isinstance(value, int):
+            self.ints += sign * value
+        else:
+            self.fractions += sign * Fraction(value)
+            self.floats += sign
+
+    @property
+    def value(self):
+        return float(self.ints + self.fractions) if self.floats else self.ints
+
+    def copy(self) -> 'ExactSum':
+        other = ExactSum()
+        other.ints, other.fractions, other.floats = self.ints, self.fractions, self.floats
+        return other
+
+
+class ScenarioAggregate:
+    """
+    Running totals of a scenario's interventions as a multiset: adding or
+    removing one intervention updates cost, beneficiaries, access gain and
+    equity sums and the count of each implementation time (whose maximum is
+    the scenario time) in O(1).
+
+    Located interventions (simulator with a zone model) interact through the
+    shared zone state, so while any are present the totals come from one
+    full evaluation of the intervention list instead (computed once per
+    aggregate, in item hash order so the totals do not depend on the edit
+    history; they match simulate_scenario's up to float rounding).
+    """
+
+    SUMS = ('total_cost_usd', 'people_benefited', 'accessibility_gain', 'equity_impact_score')
+
+    def __init__(self):
+        self.items: Dict[int, List] = {}   # item hash -> [intervention, count]
+        self.n = 0
+        self.known = 0
+        self.located = 0
+        self.sums = {name: ExactSum() for name in self.SUMS}
+        self.times = Counter()
+        self.max_time = 0
+        self._full_totals = None
+
+    @classmethod
+    def build(cls, simulator, interventions: Iterable[Dict]) -> 'ScenarioAggregate':
+        """
+        Aggregate of a list; identical interventions are evaluated once
+        """
+        aggregate = cls()
+        distinct, counts = {}, Counter()
+        for intervention in interventions:
+            h = item_hash(intervention)
+            distinct.setdefault(h, intervention)
+            counts[h] += 1
+        for h, intervention in distinct.items():
+            aggregate._update(simulator, intervention, counts[h], h)
+        return aggregate
+
+    def copy(self) -> 'ScenarioAggregate':
+        other = ScenarioAggregate()
+        other.items = {h: list(entry) for h, entry in self.items.items()}
+        other.n, other.known, other.located = self.n, self.known, self.located
+        other.sums = {name: total.copy() for name, total in self.sums.items()}
+        other.times = self.times.copy()
+        other.max_time = self.max_time
+        return other
+
+    def interventions(self) -> List[Dict]:
+        return [self.items[h][0] for h in sorted(self.items) for _ in range(self.items[h][1])]
+
+    def _update(self, simulator, intervention: Dict, sign: int, h: int = None):
+        """
+        Add (sign > 0) or remove (sign < 0) |sign| copies of an intervention
+        """
+        h = item_hash(intervention) if h is None else h
+        entry = self.items.setdefault(h, [intervention, 0])
+        entry[1] += sign
+        if entry[1] == 0:
+            del self.items[h]
+        self.n += sign
+        self.known += sign * (type_index(intervention.get('type')) != UNKNOWN_INDEX)
+        self._full_totals = None
+
+        if simulator._locate(intervention) is not None:
+            self.located += sign
+            return
+        cost, beneficiaries, access_gain, time, equity = simulator._simulate_intervention(intervention)
+        for name, value in zip(self.SUMS, (cost, beneficiaries, access_gain, equity)):
+            self.sums[name].add(value, sign)
+
+        self.times[time] += sign
+        if sign > 0:
+            self.max_time = max(self.max_time, time)
+        elif self.times[time] <= 0:
+            del self.times[time]
+            if time == self.max_time:
+                self.max_time = max(self.times, default=0)  # distinct times: at most one per type
+
+    def add(self, simulator, intervention: Dict, h: int = None):
+        self._update(simulator, intervention, 1, h)
+
+    def remove(self, simulator, intervention: Dict, h: int = None):
+        self._update(simulator, intervention, -1, h)
+
+    def totals(self, simulator) -> Dict:
+        """
+        Totals in the form of ScenarioSimulator._scenario_totals
+        """
+        if self.located:
+            if self._full_totals is None:
+                self._full_totals = simulator._scenario_totals({'interventions': self.interventions()})
+            return self._full_totals
+
+        ratio = self.known / self.n if self.n else 0
+        confidence = 'LOW' if self.n == 0 else 'HIGH' if ratio >= 0.8 else 'MEDIUM' if ratio >= 0.5 else 'LOW'
+        return {
+            **{name: total.value for name, total in self.sums.items()},
+            'implementation_time_months': self.max_time,
+            'confidence_level': confidence
+        }
+
+
+class ScenarioMemo:
+    """
+    LRU cache of scenario aggregates keyed by (baseline version, order-
+    insensitive multiset hash of the intervention list). An edit derives
+    the new aggregate from the cached one of the scenario it was made on:
+    the key moves by the added / removed item hashes and the totals by their
+    effects. An edit therefore costs one copy of the cached aggregate
+    (O(distinct interventions), dict and counter copies only) plus O(1) per
+    added / removed intervention, instead of re-simulating every
+    intervention; the copy keeps the base scenario cached for further
+    edits. The baseline version must change whenever intervention
+    effects can (dataset, indicator set or simulator version). Totals
+    depend only on the intervention multiset, never on the edit history;
+    float sums may differ from simulate_scenario's in the last bits (see
+    ExactSum).
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, int], ScenarioAggregate]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.deltas = 0
+
+    @staticmethod
+    def key_hex(h: int) -> str:
+        return f"{h:064x}"
+
+    def _get(self, key) -> Optional[ScenarioAggregate]:
+        with self._lock:
+            aggregate = self._entries.get(key)
+            if aggregate is not None:
+                self._entries.move_to_end(key)
+            return aggregate
+
+    def _put(self, key, aggregate: ScenarioAggregate):
+        with self._lock:
+            self._entries[key] = aggregate
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evaluate(self, simulator, version: str, interventions: List[Dict]) -> Tuple[int, ScenarioAggregate, bool]:
+        """
+        (hash, aggregate, served_from_cache) of an intervention list
+        """
+        h = multiset_hash(interventions)
+        aggregate = self._get((version, h))
+        if aggregate is not None:
+            self.hits += 1
+            return h, aggregate, True
+        self.misses += 1
+        aggregate = ScenarioAggregate.build(simulator, interventions)
+        self._put((version, h), aggregate)
+        return h, aggregate, False
+
+    def edit(self, simulator, version: str, base_key: str = None, interventions: List[Dict] = None,
+             add: List[Dict] = (), remove: List[Dict] = ()) -> Dict:
+        """
+        Scenario after adding / removing interventions, starting from a
+        cached scenario (`base_key` from an earlier result) or from the
+        `interventions` list. Raises KeyError when the base is neither cached
+        nor given, ValueError when removing an intervention not in it.
+        """
+        base = self._get((version, int(base_key, 16))) if base_key is not None else None
+        if base is not None:
+            self.hits += 1
+            h = int(base_key, 16)
+        elif interventions is not None:
+            h, base, _ = self.evaluate(simulator, version, interventions)
+        else:
+            raise KeyError("Unknown base scenario key; send the intervention list")
+
+        if not add and not remove:
+            return {'key': self.key_hex(h), 'aggregate': base, 'delta': False}
+
+        removed = Counter(item_hash(intervention) for intervention in remove)
+        for item, count in removed.items():
+            if base.items.get(item, (None, 0))[1] < count:
+                raise ValueError("Cannot remove an intervention that is not in the scenario")
+
+        new_h = (h + sum(item_hash(i) for i in add) - sum(removed.elements())) % MULTISET_MODULUS
+        cached = self._get((version, new_h))
+        if cached is not None:
+            self.hits += 1
+            return {'key': self.key_hex(new_h), 'aggregate': cached, 'delta': False}
+
+        aggregate = base.copy()
+        for intervention in add:
+            aggregate.add(simulator, intervention)
+        for intervention in remove:
+            aggregate.remove(simulator, intervention)
+        self.deltas += 1
+        self._put((version, new_h), aggregate)
+        return {'key': self.key_hex(new_h), 'aggregate': aggregate, 'delta': True}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._entries)
+        return {'entries': entries, 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses, 'deltas': self.deltas}
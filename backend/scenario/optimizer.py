@@ -0,0 +1,304 @@
+import asyncio
+import time
+from math import gcd
+from functools import reduce
+from typing import AsyncIterator, Dict, List, Optional
+import numpy as np
+
+from scenario.interventions import KNOWN_TYPES
+
+# Objectives a portfolio can maximize -> per-intervention value index in
+# ScenarioSimulator._simulate_intervention's (cost, beneficiaries, access_gain, time, equity)
+OBJECTIVES = {'beneficiaries': 1, 'accessibility': 2, 'equity': 4}
+
+# Exact DP is used while (binary-split items x budget units) stays below this
+DP_MAX_CELLS = 20_000_000
+
+# Local search: perturbation rounds per worker, and swap moves sampled per step
+SEARCH_ROUNDS = 200
+MAX_SWAP_MOVES = 250_000
+
+
+class PortfolioProblem:
+    """
+    Intervention kinds (one per candidate) with cost, value, time and the
+    maximum number of units, filtered to those that fit the deadline.
+    Plain arrays, so the problem pickles cheaply into worker processes.
+    """
+
+    def __init__(self, candidates: List[Dict], costs, values, months, max_counts,
+                 budget: float, deadline_months: Optional[float] = None):
+        months = np.asarray(months, dtype=float)
+        fits = np.ones(len(candidates), dtype=bool) if deadline_months is None else months <= deadline_months
+        fits &= (np.asarray(costs, dtype=float) <= budget) & (np.asarray(max_counts) > 0)
+        self.candidates = [c for c, keep in zip(candidates, fits) if keep]
+        self.costs = np.asarray(costs, dtype=float)[fits]
+        self.values = np.asarray(values, dtype=float)[fits]
+        self.months = months[fits]
+        self.max_counts = np.asarray(max_counts, dtype=np.int64)[fits]
+        self.budget = float(budget)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def total(self, counts: np.ndarray):
+        return float(counts @ self.values), float(counts @ self.costs)
+
+
+def build_problem(simulator, objective: str, budget: float, deadline_months: Optional[float] = None,
+                  candidates: Optional[List[Dict]] = None, max_per_type: int = 5) -> PortfolioProblem:
+    """
+    Candidate interventions (default: every known type at its default
+    parameters, up to `max_per_type` units each) valued with the simulator's
+    intervention effects
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}")
+    if candidates is None:
+        candidates = [{'type': t, 'max_count': max_per_type} for t in KNOWN_TYPES]
+
+    effects = [simulator._simulate_intervention(c) for c in candidates]
+    if any(not e[0] > 0 for e in effects):
+        raise ValueError("Every candidate intervention needs a positive cost")
+    return PortfolioProblem(
+        candidates,
+        costs=[e[0] for e in effects],
+        values=[e[OBJECTIVES[objective]] for e in effects],
+        months=[e[3] for e in effects],
+        max_counts=[c.get('max_count', max_per_type) for c in candidates],
+        budget=budget,
+        deadline_months=deadline_months
+    )
+
+
+def greedy_portfolio(problem: PortfolioProblem, counts: np.ndarray = None) -> np.ndarray:
+    """
+    Fill the remaining budget by value per dollar
+    """
+    counts = np.zeros(len(problem), dtype=np.int64) if counts is None else counts.copy()
+    remaining = problem.budget - counts @ problem.costs
+    for i in np.argsort(-(problem.values / problem.costs), kind='stable'):
+        if problem.values[i] <= 0:
+            continue
+        take = min(problem.max_counts[i] - counts[i], int(remaining // problem.costs[i]))
+        if take > 0:
+            counts[i] += take
+            remaining -= take * problem.costs[i]
+    return counts
+
+
+def _binary_split(max_counts: np.ndarray):
+    """
+    Bounded counts as 0/1 pieces of 1, 2, 4, ... units (plus remainder)
+    """
+    kinds, units = [], []
+    for i, m in enumerate(max_counts):
+        k = 1
+        while m > 0:
+            piece = min(k, m)
+            kinds.append(i)
+            units.append(piece)
+            m -= piece
+            k *= 2
+    return np.array(kinds, dtype=np.int64), np.array(units, dtype=np.int64)
+
+
+def dp_capacity(problem: PortfolioProblem):
+    """
+    (cost unit, capacity in units, integer weights) when costs are whole
+    dollars and the DP table fits DP_MAX_CELLS, else None
+    """
+    if not np.all(problem.costs == np.round(problem.costs)):
+        return None
+    int_costs = problem.costs.astype(np.int64)
+    unit = reduce(gcd, int_costs.tolist(), 0) or 1
+    capacity = int(problem.budget // unit)
+    pieces = int(sum(int(m).bit_length() for m in problem.max_counts))
+    if pieces * (capacity + 1) > DP_MAX_CELLS:
+        return None
+    return unit, capacity, int_costs // unit
+
+
+def knapsack_portfolio(problem: PortfolioProblem) -> Optional[np.ndarray]:
+    """
+    Exact bounded knapsack by dynamic programming over budget units, one
+    vectorized row update per binary-split piece. Among optimal portfolios
+    the cheapest is returned. None if the space is too large for the DP.
+    """
+    spec = dp_capacity(problem)
+    if spec is None:
+        return None
+    _, capacity, weights = spec
+
+    kinds, units = _binary_split(problem.max_counts)
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(kinds), capacity + 1), dtype=bool)
+    for p, (kind, n) in enumerate(zip(kinds, units)):
+        w, v = int(weights[kind] * n), problem.values[kind] * n
+        if w > capacity or v <= 0:
+            continue
+        candidate = best[:capacity + 1 - w] + v
+        improves = candidate > best[w:]
+        best[w:] = np.where(improves, candidate, best[w:])
+        taken[p, w:] = improves
+
+    counts = np.zeros(len(problem), dtype=np.int64)
+    c = int(np.argmax(best))
+    for p in range(len(kinds) - 1, -1, -1):
+        if taken[p, c]:
+            counts[kinds[p]] += units[p]
+            c -= int(weights[kinds[p]] * units[p])
+    return counts
+
+
+def _best_move(problem: PortfolioProblem, counts: np.ndarray, rng: np.random.Generator):
+    """
+    Best feasible improving single move (add one unit, drop one, or swap one
+    for another), evaluated for all moves at once. None at a local optimum.
+    """
+    _, cost = problem.total(counts)
+    slack = problem.budget - cost
+
+    can_add = (counts < problem.max_counts) & (problem.costs <= slack + 1e-9)
+    can_drop = counts > 0
+
+    add_i = np.flatnonzero(can_add)
+    moves = [(add_i, np.full(len(add_i), -1), problem.values[add_i])]
+
+    # Swaps: drop j, add i (sampled when the move set is very large)
+    add_any = np.flatnonzero(counts < problem.max_counts)
+    drop_j = np.flatnonzero(can_drop)
+    if len(add_any) and len(drop_j):
+        if len(add_any) * len(drop_j) > MAX_SWAP_MOVES:
+            size = MAX_SWAP_MOVES
+            ii, jj = rng.choice(add_any, size), rng.choice(drop_j, size)
+        else:
+            ii, jj = (a.ravel() for a in np.meshgrid(add_any, drop_j))
+        ok = (ii != jj) & (problem.costs[ii] - problem.costs[jj] <= slack + 1e-9)
+        ii, jj = ii[ok], jj[ok]
+        moves.append((ii, jj, problem.values[ii] - problem.values[jj]))
+
+    add = np.concatenate([m[0] for m in moves])
+    drop = np.concatenate([m[1] for m in moves])
+    gain = np.concatenate([m[2] for m in moves])
+    if len(gain) == 0 or gain.max() <= 1e-12:
+        return None
+    k = int(np.argmax(gain))
+    return add[k], drop[k]
+
+
+def local_search(problem: PortfolioProblem, seed: int = 0, rounds: int = SEARCH_ROUNDS,
+                 start: np.ndarray = None) -> np.ndarray:
+    """
+    Hill climbing with random restarts around the incumbent: climb to a local
+    optimum, drop a random share of the portfolio, add a random unit, refill
+    greedily, repeat
+    """
+    rng = np.random.default_rng(seed)
+    counts = greedy_portfolio(problem) if start is None else start.copy()
+    best, best_value = counts.copy(), problem.total(counts)[0]
+
+    for _ in range(rounds):
+        while (move := _best_move(problem, counts, rng)) is not None:
+            add, drop = move
+            counts[add] += 1
+            if drop >= 0:
+                counts[drop] -= 1
+        value = problem.total(counts)[0]
+        if value > best_value + 1e-9:
+            best, best_value = counts.copy(), value
+
+        # Perturb the incumbent: drop some units, force one unit of a random
+        # kind in (else the greedy refill rebuilds the same portfolio), refill
+        counts = best.copy()
+        held = np.flatnonzero(counts)
+        if len(held):
+            for j in rng.choice(held, size=rng.integers(1, len(held) + 1), replace=False):
+                counts[j] = rng.integers(0, counts[j] + 1)
+        slack = problem.budget - counts @ problem.costs
+        room = np.flatnonzero((counts < problem.max_counts) & (problem.costs <= slack + 1e-9) & (problem.values > 0))
+        if len(room):
+            counts[rng.choice(room)] += 1
+        counts = greedy_portfolio(problem, counts)
+    return best
+
+
+def search_worker(problem: PortfolioProblem, seed: int, rounds: int, start=None) -> List[int]:
+    """
+    Process-pool entry point: one independent local search
+    """
+    return local_search(problem, seed=seed, rounds=rounds,
+                        start=None if start is None else np.asarray(start, dtype=np.int64)).tolist()
+
+
+def portfolio_interventions(problem: PortfolioProblem, counts) -> List[Dict]:
+    interventions = []
+    for candidate, n in zip(problem.candidates, counts):
+        intervention = {k: v for k, v in candidate.items() if k != 'max_count'}
+        interventions.extend(dict(intervention) for _ in range(int(n)))
+    return interventions
+
+
+def describe_portfolio(simulator, problem: PortfolioProblem, counts, objective: str, method: str) -> Dict:
+    """
+    Portfolio with its full scenario metrics (batch path)
+    """
+    interventions = portfolio_interventions(problem, counts)
+    metrics = simulator.simulate_batch([{'interventions': interventions}])[0]
+    if metrics['cost_per_beneficiary'] == float('inf'):
+        metrics['cost_per_beneficiary'] = None  # empty portfolio (not valid JSON as inf)
+    return {
+        'method': method,
+        'objective': objective,
+        'objective_value': problem.total(np.asarray(counts))[0],
+        'selection': [
+            {'candidate': {k: v for k, v in candidate.items() if k != 'max_count'}, 'count': int(n)}
+            for candidate, n in zip(problem.candidates, counts) if n
+        ],
+        'interventions': interventions,
+        'metrics': metrics
+    }
+
+
+async def optimize_stream(simulator, problem: PortfolioProblem, objective: str, pools,
+                          workers: int = None, rounds: int = 3) -> AsyncIterator[Dict]:
+    """
+    Portfolio search streamed as events: the greedy start first, then the
+    exact DP optimum when the space is small enough; otherwise `rounds`
+    rounds of parallel local searches in the process pool (one per worker,
+    restarted from the incumbent), reporting each improvement as soon as a
+    worker returns it
+    """
+    started = time.perf_counter()
+    best = greedy_portfolio(problem)
+    best_value = problem.total(best)[0]
+
+    def improved(method: str, counts) -> Dict:
+        return {'event': 'improved', 'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+                **describe_portfolio(simulator, problem, counts, objective, method)}
+
+    yield improved('greedy', best)
+
+    exact = await pools.run_in_thread(knapsack_portfolio, problem)
+    if exact is not None:
+        if problem.total(exact)[0] > best_value + 1e-9:
+            best, best_value = exact, problem.total(exact)[0]
+        yield improved('dynamic_programming', exact)
+        yield {'event': 'done', 'method': 'dynamic_programming', 'exact': True, 'objective_value': best_value}
+        return
+
+    workers = workers or pools.process_workers
+    for r in range(rounds):
+        tasks = [
+            pools.run_in_process(search_worker, problem, r * workers + w, SEARCH_ROUNDS,
+                                 None if (r == 0 and w == 0) else best.tolist())
+            for w in range(workers)
+        ]
+        for task in asyncio.as_completed(tasks):
+            counts = np.asarray(await task, dtype=np.int64)
+            value = problem.total(counts)[0]
+            if value > best_value + 1e-9:
+                best, best_value = counts, value
+                yield improved('local_search', counts)
+
+    yield {'event': 'done', 'method': 'local_search', 'exact': False, 'objective_value': best_value}
@@ -0,0 +1,78 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Tuple
+
+
+class IndicatorOverlay(Mapping):
+    """
+    Read-only view of baseline indicators with a scenario's changed fields on
+    top. Only the changes are stored (as a nested dict mirroring the paths
+    they replace); everything else is read through from the shared baseline,
+    so memory per scenario is proportional to its delta. Nested mappings are
+    returned as overlays too, so the baseline cannot be modified through a view.
+
+    Compares equal to, and serializes (dict(), jsonable_encoder, to_dict)
+    to, the dict a deep copy with the changes applied would give; zone
+    tables in it encode as their row lists either way.
+    """
+
+    __slots__ = ('_base', '_changes')
+
+    def __init__(self, base: Mapping, changes: Dict = None):
+        self._base = base
+        self._changes = changes or {}
+
+    def __getitem__(self, key):
+        if key in self._changes:
+            change = self._changes[key]
+            base = self._base.get(key)
+            if isinstance(change, dict) and isinstance(base, Mapping):
+                return IndicatorOverlay(base, change)
+            return change
+        value = self._base[key]
+        return IndicatorOverlay(value) if isinstance(value, Mapping) else value
+
+    def __iter__(self) -> Iterator:
+        yield from self._base
+        for key in self._changes:
+            if key not in self._base:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._base) + sum(1 for key in self._changes if key not in self._base)
+
+    def __repr__(self) -> str:
+        return f"IndicatorOverlay({len(self)} fields, changes={self._changes!r})"
+
+    @property
+    def changes(self) -> Dict:
+        return self._changes
+
+    def set(self, path: Tuple[str, ...], value: Any) -> 'IndicatorOverlay':
+        """
+        New overlay with the field at `path` replaced; only the change dicts
+        along the path are copied
+        """
+        changes = dict(self._changes)
+        node = changes
+        for key in path[:-1]:
+            node[key] = dict(node.get(key) or {})
+            node = node[key]
+        node[path[-1]] = value
+        return IndicatorOverlay(self._base, changes)
+
+    def to_dict(self) -> Dict:
+        """
+        Plain dict with the changes applied. Unchanged subtrees are the
+        baseline objects themselves (shared, not copied): treat as read-only.
+        """
+        return _merge(self._base, self._changes)
+
+
+def _merge(base: Mapping, changes: Dict) -> Dict:
+    merged = dict(base)
+    for key, change in changes.items():
+        if isinstance(change, dict) and isinstance(base.get(key), Mapping):
+            merged[key] = _merge(base[key], change)
+        else:
+            merged[key] = change
+    return merged
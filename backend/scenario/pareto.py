@@ -0,0 +1,154 @@
+from bisect import bisect_right
+from typing import Dict, List, Sequence
+import numpy as np
+
+# Scenario metrics compared on the frontier, and the direction each improves in
+PARETO_OBJECTIVES: Dict[str, str] = {
+    'total_cost_usd': 'min',
+    'people_benefited': 'max',
+    'equity_impact_score': 'max',
+    'implementation_time_months': 'min',
+}
+
+
+def objective_matrix(metrics: List[Dict], objectives: Sequence[str]) -> np.ndarray:
+    """
+    (scenarios x objectives) matrix with every objective to be minimized
+    (maximized metrics negated)
+    """
+    points = np.array([[m[name] for name in objectives] for m in metrics], dtype=float).reshape(len(metrics), -1)
+    signs = np.array([1.0 if PARETO_OBJECTIVES[name] == 'min' else -1.0 for name in objectives])
+    return points * signs
+
+
+def _ranks_2d(points: np.ndarray) -> np.ndarray:
+    """
+    Fronts of distinct, lexicographically sorted 2-D points in one sweep:
+    a point is dominated by a front iff the front's smallest second
+    objective so far is <= its own. Those minima increase with the front
+    index, so each point's front is a bisection: O(n log n).
+    """
+    ranks = np.empty(len(points), dtype=np.int64)
+    minima: List[float] = []
+    for i, y in enumerate(points[:, 1].tolist()):
+        front = bisect_right(minima, y)
+        if front == len(minima):
+            minima.append(y)
+        else:
+            minima[front] = y
+        ranks[i] = front
+    return ranks
+
+
+def _ranks_ens(points: np.ndarray) -> np.ndarray:
+    """
+    Efficient non-dominated sort with binary search (ENS-BS) of distinct,
+    lexicographically sorted points: every dominator of a point precedes it,
+    and a point dominated by some member of front f is dominated by a member
+    of every earlier front, so its front is found by bisection over the
+    fronts. A check first compares against the front's per-objective minimum
+    (O(k) rejection), then scans the members column by column, vectorized.
+    """
+    n, k = points.shape
+    ranks = np.empty(n, dtype=np.int64)
+    members: List[np.ndarray] = []   # per front: (k, capacity) column-major buffer
+    minima: List[np.ndarray] = []
+    sizes: List[int] = []
+
+    def dominated_by(front: int, p: np.ndarray) -> bool:
+        if np.any(p < minima[front]):
+            return False
+        columns = members[front][:, :sizes[front]]
+        mask = columns[0] <= p[0]
+        for j in range(1, k):
+            mask &= columns[j] <= p[j]
+        return bool(mask.any())  # distinct points: <= everywhere is domination
+
+    for i in range(n):
+        p = points[i]
+        lo, hi = 0, len(members)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if dominated_by(mid, p):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(members):
+            members.append(np.empty((k, 64)))
+            minima.append(p.copy())
+            sizes.append(0)
+        if sizes[lo] == members[lo].shape[1]:
+            members[lo] = np.concatenate([members[lo], np.empty_like(members[lo])], axis=1)
+        members[lo][:, sizes[lo]] = p
+        np.minimum(minima[lo], p, out=minima[lo])
+        sizes[lo] += 1
+        ranks[i] = lo
+    return ranks
+
+
+def non_dominated_ranks(points: np.ndarray) -> np.ndarray:
+    """
+    Pareto front index (0 = non-dominated) of every row of a minimization
+    matrix. Identical rows are ranked once (and share a front); the distinct
+    rows are sorted lexicographically and swept: exactly O(n log n) for two
+    objectives, ENS-BS for more.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    unique, inverse = np.unique(points, axis=0, return_inverse=True)  # lexicographically sorted
+    if unique.shape[1] == 1:
+        ranks = np.arange(len(unique), dtype=np.int64)
+    elif unique.shape[1] == 2:
+        ranks = _ranks_2d(unique)
+    else:
+        ranks = _ranks_ens(unique)
+    return ranks[inverse.ravel()]
+
+
+def crowding_distance(points: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """
+    NSGA-II crowding distance of each point within its front: the sum over
+    objectives of the normalized gap between its neighbours; the extreme
+    points of a front (and fronts of one or two points) get inf. All fronts
+    are handled together, one sort per objective.
+    """
+    n, k = points.shape
+    distance = np.zeros(n)
+    if n == 0:
+        return distance
+    for j in range(k):
+        values = points[:, j]
+        order = np.lexsort((values, ranks))
+        v, r = values[order], ranks[order]
+        first = np.r_[True, r[1:] != r[:-1]]
+        last = np.r_[r[1:] != r[:-1], True]
+
+        # Per-front objective span, broadcast to members
+        front_start = np.flatnonzero(first)
+        front_end = np.flatnonzero(last)
+        span = np.repeat(v[front_end] - v[front_start], front_end - front_start + 1)
+
+        gap = np.zeros(n)
+        interior = ~(first | last)
+        idx = np.flatnonzero(interior)
+        gap[idx] = np.divide(v[idx + 1] - v[idx - 1], span[idx], out=np.zeros(len(idx)), where=span[idx] > 0)
+        gap[first | last] = np.inf
+        distance[order] += gap
+    return distance
+
+
+def pareto_ranking(metrics: List[Dict], objectives: Sequence[str] = tuple(PARETO_OBJECTIVES)) -> Dict[str, np.ndarray]:
+    """
+    Front rank (1 = Pareto frontier), crowding distance and the overall
+    ranking (by front, then most isolated first, then input order) of
+    scenario metrics
+    """
+    unknown = [name for name in objectives if name not in PARETO_OBJECTIVES]
+    if unknown or not objectives:
+        raise ValueError(f"objectives must be a non-empty subset of {', '.join(PARETO_OBJECTIVES)}")
+    points = objective_matrix(metrics, objectives)
+    ranks = non_dominated_ranks(points)
+    crowding = crowding_distance(points, ranks)
+    order = np.lexsort((np.arange(len(points)), -crowding, ranks))
+    return {'rank': ranks + 1, 'crowding_distance': crowding, 'order': order}
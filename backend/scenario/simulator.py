@@ -1,14 +1,43 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 import numpy as np
-from copy import deepcopy
+
+from scenario.interventions import (
+    TYPE_NAMES, UNKNOWN_INDEX, ScenarioBatch, confidence_levels, evaluate_batch, resolve_effects, type_index
+)
+from scenario.overlay import IndicatorOverlay
+from scenario.pareto import PARETO_OBJECTIVES, pareto_ranking
+from scenario.spatial_impact import ImpactState, SpatialImpactModel, spatial_impact_model
+from scenario.uncertainty import MC_TOLERANCE, PERCENTILES, merge_uncertainty, monte_carlo
+
+# Bumped whenever simulation results change, so persisted scenario jobs of an
+# older model are not served as duplicates
+SIMULATOR_VERSION = 2
 
 class ScenarioSimulator:
     """
     Simulates urban planning scenarios and calculates impact metrics
     """
     
-    def __init__(self, baseline_indicators: Dict):
+    def __init__(self, baseline_indicators: Dict, engine=None, spatial: SpatialImpactModel = None):
         self.baseline = baseline_indicators
+        self.engine = engine
+        # Zone-level model for interventions with a location (None: table effects only)
+        self.spatial = spatial
+        
+        # Intervention effects depend on the current accessibility deficit
+        current_score = self.baseline.get('service_accessibility', {}).get('accessibility_score', 0)
+        self.effects = resolve_effects(current_score)
+    
+    @classmethod
+    def from_layers(cls, data, engine=None) -> 'ScenarioSimulator':
+        """
+        Build a simulator whose baseline comes from an IndicatorEngine, so
+        indicators already computed for these layers (e.g. by the API) are reused
+        """
+        if engine is None:
+            from indicators.engine import IndicatorEngine
+            engine = IndicatorEngine()
+        return cls(engine.compute(data), engine=engine, spatial=spatial_impact_model(data))
     
     def simulate_scenario(self, scenario_config: Dict) -> Dict:
         """
@@ -20,12 +49,20 @@ class ScenarioSimulator:
                 'description': str,
                 'interventions': [
                     {'type': 'hospital', 'location': 'Kibera', 'capacity': 150, 'cost': 3000000},
-                    {'type': 'brt', 'route': 'CBD-Eastleigh', 'length_km': 15, 'cost': 50000000},
+                    {'type': 'brt', 'route': ['Kibera', [36.8172, -1.2864], 'Eastleigh'], 'cost': 50000000},
                     etc.
                 ]
             }
+        
+        Interventions with a location (zone name or [lon, lat]; a route for
+        lines) are placed on the zone model when the simulator has one
+        """
+        return self._scenario_result(scenario_config, self._scenario_totals(scenario_config))
+    
+    def _scenario_totals(self, scenario_config: Dict) -> Dict:
+        """
+        Aggregated intervention totals of one scenario (scalar path)
         """
-        simulated = deepcopy(self.baseline)
         interventions = scenario_config.get('interventions', [])
         
         total_cost = 0
@@ -34,141 +71,176 @@ class ScenarioSimulator:
         implementation_time_months = 0
         equity_impact_score = 0
         
-        for intervention in interventions:
-            cost, beneficiaries, access_gain, time, equity = self._simulate_intervention(intervention)
+        for cost, beneficiaries, access_gain, time, equity in self._simulate_interventions(interventions):
             total_cost += cost
             total_beneficiaries += beneficiaries
             accessibility_gain += access_gain
             implementation_time_months = max(implementation_time_months, time)  # Parallel execution
             equity_impact_score += equity
         
-        # Calculate derived metrics
-        cost_per_beneficiary = total_cost / total_beneficiaries if total_beneficiaries > 0 else float('inf')
-        
-        # Update simulated indicators
-        if 'service_accessibility' in simulated:
-            simulated['service_accessibility']['accessibility_score'] = min(
-                simulated['service_accessibility']['accessibility_score'] + accessibility_gain,
+        return {
+            'total_cost_usd': total_cost,
+            'people_benefited': total_beneficiaries,
+            'accessibility_gain': accessibility_gain,
+            'equity_impact_score': equity_impact_score,
+            'implementation_time_months': implementation_time_months,
+            'confidence_level': self._calculate_confidence(interventions)
+        }
+    
+    def _scenario_result(self, scenario_config: Dict, totals: Dict) -> Dict:
+        """
+        Scenario output from its aggregated intervention totals
+        """
+        # Copy-on-write view of the shared baseline holding only the changed fields
+        simulated = IndicatorOverlay(self.baseline)
+        if 'service_accessibility' in self.baseline:
+            simulated = simulated.set(('service_accessibility', 'accessibility_score'), min(
+                self.baseline['service_accessibility']['accessibility_score'] + totals['accessibility_gain'],
                 100
-            )
+            ))
         
         return {
             'name': scenario_config['name'],
             'description': scenario_config['description'],
-            'interventions': interventions,
-            'metrics': {
-                'total_cost_usd': total_cost,
-                'people_benefited': total_beneficiaries,
-                'accessibility_gain': accessibility_gain,
-                'cost_per_beneficiary': cost_per_beneficiary,
-                'equity_impact_score': equity_impact_score,
-                'implementation_time_months': implementation_time_months,
-                'confidence_level': self._calculate_confidence(interventions)
-            },
+            'interventions': scenario_config.get('interventions', []),
+            'metrics': self.metrics(totals),
             'projected_indicators': simulated
         }
     
-    def _simulate_intervention(self, intervention: Dict) -> Tuple[float, int, float, int, float]:
+    @staticmethod
+    def metrics(totals: Dict) -> Dict:
+        """
+        Scenario metrics (with derived cost per beneficiary) from its totals
+        """
+        total_cost = totals['total_cost_usd']
+        total_beneficiaries = totals['people_benefited']
+        return {
+            'total_cost_usd': total_cost,
+            'people_benefited': total_beneficiaries,
+            'accessibility_gain': totals['accessibility_gain'],
+            'cost_per_beneficiary': total_cost / total_beneficiaries if total_beneficiaries > 0 else float('inf'),
+            'equity_impact_score': totals['equity_impact_score'],
+            'implementation_time_months': totals['implementation_time_months'],
+            'confidence_level': totals['confidence_level']
+        }
+    
+    def _simulate_interventions(self, interventions: List[Dict]) -> List[Tuple[float, int, float, int, float]]:
+        """
+        Effects of a scenario's interventions in order; located ones share one
+        ImpactState, so each sees the facilities placed before it
+        """
+        state = self.spatial.new_state() if self.spatial is not None else None
+        return [self._simulate_intervention(intervention, state) for intervention in interventions]
+    
+    def _simulate_intervention(self, intervention: Dict,
+                               state: ImpactState = None) -> Tuple[float, int, float, int, float]:
         """
         Simulate single intervention and return (cost, beneficiaries, access_gain, time_months, equity_score)
+        Effects come from the shared INTERVENTIONS table (see scenario.interventions); with a
+        zone model and a location, beneficiaries and accessibility gain come from the
+        residential zones in the intervention's service radius instead
         """
-        int_type = intervention.get('type', '').lower()
-        
-        if int_type == 'hospital':
-            capacity = intervention.get('capacity', 150)
-            location = intervention.get('location', '')
-            cost = intervention.get('cost', 3000000)
-            
-            # Estimate beneficiaries: 5km service radius, avg 10,000 ppl/km2
-            beneficiaries = int(np.pi * (5**2) * 10000)  # ~785,000 people
-            
-            # Accessibility gain depends on current deficit
-            current_score = self.baseline.get('service_accessibility', {}).get('accessibility_score', 0)
-            access_gain = min(15.0, (100 - current_score) * 0.2)  # Up to 15 points
-            
-            # Implementation time
-            time_months = 24  # 2 years for Level 4 hospital
-            
-            # Equity impact: higher in underserved areas
-            equity = 8.0 if current_score < 5 else 5.0
-            
-            return (cost, beneficiaries, access_gain, time_months, equity)
+        type_name = TYPE_NAMES[type_index(intervention.get('type', ''))]
+        params = self.effects[type_name]
+        cost = intervention.get('cost', params['cost'])
+        capacity = intervention.get('capacity', params['capacity'])
         
-        elif int_type == 'brt':
-            length_km = intervention.get('length_km', 15)
-            cost = intervention.get('cost', 50000000)
-            
-            # Beneficiaries: corridor population + commuters
-            beneficiaries = 150000  # Daily commuters
-            
-            # Accessibility gain (mobility improvement)
-            access_gain = 8.0
-            
-            # Implementation time
-            time_months = 36  # 3 years for BRT
-            
-            # Equity: moderate (serves multiple zones)
-            equity = 6.0
-            
-            return (cost, beneficiaries, access_gain, time_months, equity)
+        geometry = self._locate(intervention, params)
+        if geometry is not None:
+            state = state if state is not None else self.spatial.new_state()
+            beneficiaries, access_gain = state.place(type_name, geometry, params, capacity)
+            return (cost, beneficiaries, access_gain, params['time_months'], params['equity'])
         
-        elif int_type == 'park':
-            area_hectares = intervention.get('area_hectares', 8)
-            cost = intervention.get('cost', 3000000)
-            
-            # Beneficiaries: 2km radius
-            beneficiaries = int(np.pi * (2**2) * 12000)  # ~150,000
-            
-            # Accessibility gain (quality of life)
-            access_gain = 3.0
-            
-            # Implementation time
-            time_months = 18  # 1.5 years
-            
-            # Equity: high in dense areas
-            equity = 7.0
-            
-            return (cost, beneficiaries, access_gain, time_months, equity)
+        beneficiaries = params['beneficiaries']
+        if params['beneficiaries_per_capacity']:
+            beneficiaries = capacity * params['beneficiaries_per_capacity']
         
-        elif int_type == 'school':
-            capacity = intervention.get('capacity', 1000)
-            cost = intervention.get('cost', 5000000)
-            
-            # Beneficiaries: students + families
-            beneficiaries = capacity * 4  # Students + family members
-            
-            # Accessibility gain
-            access_gain = 10.0
-            
-            # Implementation time
-            time_months = 30
-            
-            # Equity
-            equity = 9.0  # Education critical for equity
-            
-            return (cost, beneficiaries, access_gain, time_months, equity)
+        return (cost, beneficiaries, params['access_gain'], params['time_months'], params['equity'])
+    
+    def _locate(self, intervention: Dict, params: Dict = None):
+        """
+        Metric geometry of a spatially modelled intervention, else None
+        """
+        if self.spatial is None:
+            return None
+        params = params or self.effects[TYPE_NAMES[type_index(intervention.get('type', ''))]]
+        if params['service_radius_m'] is None:
+            return None
+        return self.spatial.locate(intervention)
+    
+    def evaluate_batch(self, batch: ScenarioBatch) -> Dict[str, np.ndarray]:
+        """
+        Per-scenario totals for an encoded batch, as arrays (one vectorized pass)
+        """
+        return evaluate_batch(batch, self.effects)
+    
+    def simulate_batch(self, scenarios: Union[List[Dict], ScenarioBatch]) -> List[Dict]:
+        """
+        Metrics for many scenarios at once, identical (values and types) to
+        the 'metrics' of simulate_scenario for each. Scenarios with located
+        interventions (zone model only) take the scalar path.
+        """
+        batch = scenarios if isinstance(scenarios, ScenarioBatch) else ScenarioBatch.from_scenarios(scenarios)
+        totals = self.evaluate_batch(batch)
+        confidence = confidence_levels(totals['known_ratio'], totals['n_interventions']).tolist()
+        columns = zip(
+            (totals['n_interventions'] == 0).tolist(), totals['total_cost'].tolist(), totals['cost_is_int'].tolist(),
+            totals['beneficiaries'].tolist(), totals['beneficiaries_is_int'].tolist(), totals['access_gain'].tolist(),
+            totals['equity'].tolist(), totals['time_months'].astype(np.int64).tolist(), confidence
+        )
         
-        elif int_type == 'road':
-            length_km = intervention.get('length_km', 5)
-            cost = intervention.get('cost', 10000000)
-            
-            # Beneficiaries
-            beneficiaries = 80000
-            
-            # Accessibility gain
-            access_gain = 5.0
-            
-            # Implementation time
-            time_months = 24
-            
-            # Equity
-            equity = 4.0
-            
-            return (cost, beneficiaries, access_gain, time_months, equity)
+        metrics = []
+        for empty, cost, cost_is_int, beneficiaries, beneficiaries_is_int, access, equity, months, level in columns:
+            cost = int(cost) if cost_is_int else cost
+            beneficiaries = int(beneficiaries) if beneficiaries_is_int else beneficiaries
+            metrics.append({
+                'total_cost_usd': cost,
+                'people_benefited': beneficiaries,
+                'accessibility_gain': 0 if empty else access,
+                'cost_per_beneficiary': cost / beneficiaries if beneficiaries > 0 else float('inf'),
+                'equity_impact_score': 0 if empty else equity,
+                'implementation_time_months': months,
+                'confidence_level': level
+            })
         
-        else:
-            # Unknown intervention type - conservative estimates
-            return (intervention.get('cost', 1000000), 10000, 2.0, 12, 3.0)
+        if self.spatial is not None and not isinstance(scenarios, ScenarioBatch):
+            for i, scenario in enumerate(scenarios):
+                if any(self._locate(intervention) is not None for intervention in scenario.get('interventions', [])):
+                    metrics[i] = self.metrics(self._scenario_totals(scenario))
+        return metrics
+    
+    def simulate_uncertainty(self, scenario_config: Dict, n_draws: int = 100_000,
+                             uncertainty: Dict = None, percentiles=PERCENTILES,
+                             tolerance: float = MC_TOLERANCE, seed: int = 0,
+                             budget_usd: float = None, deadline_months: float = None) -> Dict:
+        """
+        Monte Carlo mode: cost, timeline and beneficiaries of each intervention
+        drawn from the distributions in `uncertainty` (overrides merged into
+        scenario.uncertainty.UNCERTAINTY) around their planned values, with
+        percentile bands of the scenario totals. Stops early once the bands
+        converge; see scenario.uncertainty.monte_carlo.
+        """
+        interventions = scenario_config.get('interventions', [])
+        planned = self._simulate_interventions(interventions)
+        bands = monte_carlo(
+            {
+                'cost': [p[0] for p in planned],
+                'beneficiaries': [p[1] for p in planned],
+                'time_months': [p[3] for p in planned]
+            },
+            [TYPE_NAMES[type_index(i.get('type', ''))] for i in interventions],
+            uncertainty=merge_uncertainty(uncertainty),
+            n_draws=n_draws,
+            percentiles=percentiles,
+            tolerance=tolerance,
+            seed=seed,
+            budget_usd=budget_usd,
+            deadline_months=deadline_months
+        )
+        planned_metrics = self.simulate_batch([scenario_config])[0]
+        if planned_metrics['cost_per_beneficiary'] == float('inf'):
+            planned_metrics['cost_per_beneficiary'] = None  # no beneficiaries (not valid JSON as inf)
+        return {'name': scenario_config.get('name'), 'planned': planned_metrics, **bands}
     
     def _calculate_confidence(self, interventions: List[Dict]) -> str:
         """
@@ -178,8 +250,7 @@ class ScenarioSimulator:
             return 'LOW'
         
         # Known intervention types have higher confidence
-        known_types = {'hospital', 'brt', 'park', 'school', 'road'}
-        known_count = sum(1 for i in interventions if i.get('type', '').lower() in known_types)
+        known_count = sum(1 for i in interventions if type_index(i.get('type')) != UNKNOWN_INDEX)
         
         confidence_ratio = known_count / len(interventions)
         
@@ -197,7 +268,21 @@ class ScenarioSimulator:
         if not scenarios:
             return {'error': 'No scenarios provided'}
         
-        simulated_scenarios = [self.simulate_scenario(s) for s in scenarios]
+        return self.summarize_comparison(self.simulate_results(scenarios))
+    
+    def simulate_results(self, scenarios: List[Dict]) -> List[Dict]:
+        """
+        Full simulate_scenario output for many scenarios, with the metrics
+        from one vectorized batch
+        """
+        return [self._scenario_result(s, m) for s, m in zip(scenarios, self.simulate_batch(scenarios))]
+    
+    def summarize_comparison(self, simulated_scenarios: List[Dict]) -> Dict:
+        """
+        Best options across already simulated scenarios
+        """
+        if not simulated_scenarios:
+            return {'error': 'No scenarios provided'}
         
         # Extract metrics for comparison
         metrics = [s['metrics'] for s in simulated_scenarios]
@@ -233,13 +318,54 @@ class ScenarioSimulator:
                 }
             },
             'summary': {
-                'total_scenarios': len(scenarios),
+                'total_scenarios': len(simulated_scenarios),
                 'total_beneficiaries': total_beneficiaries,
                 'total_cost_usd': total_cost,
                 'avg_confidence': self._avg_confidence(metrics)
             }
         }
     
+    def pareto_frontier(self, scenarios: List[Dict], objectives: List[str] = None,
+                        frontier_only: bool = True, offset: int = 0, limit: int = 100) -> Dict:
+        """
+        Multi-objective comparison for large scenario sets: metrics from one
+        batch evaluation, non-dominated front ranks over the objectives
+        (default: cost, beneficiaries, equity, time) and crowding distances.
+        Scenarios are ordered by front, then crowding distance (most distinct
+        trade-off first); the frontier (or, with frontier_only=False, the full
+        ranking) is returned a page at a time.
+        """
+        objectives = list(objectives or PARETO_OBJECTIVES)
+        metrics = self.simulate_batch(scenarios)
+        ranking = pareto_ranking(metrics, objectives)
+        rank, crowding, order = ranking['rank'], ranking['crowding_distance'], ranking['order']
+        if frontier_only:
+            order = order[rank[order] == 1]
+        
+        page = []
+        for i in order[offset:offset + limit].tolist():
+            scenario_metrics = dict(metrics[i])
+            if scenario_metrics['cost_per_beneficiary'] == float('inf'):
+                scenario_metrics['cost_per_beneficiary'] = None  # no beneficiaries (not valid JSON as inf)
+            page.append({
+                'index': i,
+                'name': scenarios[i].get('name'),
+                'rank': int(rank[i]),
+                'crowding_distance': float(crowding[i]) if np.isfinite(crowding[i]) else None,  # None = front boundary
+                'metrics': scenario_metrics
+            })
+        
+        return {
+            'objectives': {name: PARETO_OBJECTIVES[name] for name in objectives},
+            'total_scenarios': len(scenarios),
+            'fronts': int(rank.max()) if len(rank) else 0,
+            'frontier_size': int((rank == 1).sum()),
+            'total': len(order),
+            'offset': offset,
+            'limit': limit,
+            'scenarios': page
+        }
+    
     def _avg_confidence(self, metrics: List[Dict]) -> str:
         """
         Calculate average confidence across scenarios
@@ -0,0 +1,186 @@
+import math
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from indicators.accessibility import facility_counts, zone_accessibility_scores
+from scenario.interventions import INTERVENTIONS, TYPE_NAMES, type_index
+from spatial_analysis.projection import METRIC_EPSG, WGS84_EPSG, get_transformer, projections_for
+
+# Facility types counted by the service accessibility indicator, and the
+# radius it counts them in (calculate_service_accessibility)
+ACCESS_FACILITIES = ('hospital', 'school')
+ACCESS_RADIUS_M = 5000
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+class SpatialImpactModel:
+    """
+    Residential zones of one dataset build, prepared for placing
+    interventions: zone centroids in an STRtree, population, and the per-zone
+    facility counts and accessibility scores of the service accessibility
+    indicator. Shared and read-only; each scenario records its changes in an
+    ImpactState.
+    """
+
+    def __init__(self, residential_proj, facilities_proj):
+        self.names = residential_proj['name'].to_numpy()
+        self.zone_index = {}
+        for i, name in enumerate(self.names.tolist()):
+            self.zone_index.setdefault(name, i)
+        self.centroids = np.asarray(residential_proj.geometry.centroid.values)
+        self.population = residential_proj['population'].to_numpy(dtype=float)
+        self.tree = STRtree(self.centroids)
+
+        counts = facility_counts(residential_proj, facilities_proj, ACCESS_RADIUS_M, ACCESS_FACILITIES)
+        self.counts = np.column_stack([counts[t] for t in ACCESS_FACILITIES]).astype(float)
+        self.score_sum = float(self.scores(np.arange(len(self)), self.counts).sum())
+        self._to_metric = get_transformer(WGS84_EPSG, METRIC_EPSG)
+
+    def __len__(self) -> int:
+        return len(self.centroids)
+
+    def scores(self, zones: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Indicator accessibility scores of `zones` given their facility counts
+        """
+        return zone_accessibility_scores(counts[:, 0], counts[:, 1], self.population[zones])
+
+    def citywide_score(self, score_sum: float) -> float:
+        return min(score_sum / len(self), 100) if len(self) else 0.0
+
+    def _point(self, place):
+        """
+        Metric point for a residential zone name or a [lon, lat] pair;
+        ValueError for anything else
+        """
+        if isinstance(place, str):
+            i = self.zone_index.get(place)
+            if i is None:
+                raise ValueError(f"Unknown residential zone {place!r}")
+            return self.centroids[i]
+        if isinstance(place, (list, tuple)) and len(place) == 2 and all(_is_number(v) for v in place):
+            lon, lat = float(place[0]), float(place[1])
+            if -180 <= lon <= 180 and -90 <= lat <= 90:
+                x, y = self._to_metric.transform(lon, lat)
+                return shapely.Point(x, y)
+        raise ValueError(f"Location must be a residential zone name or [lon, lat], got {place!r}")
+
+    def locate(self, intervention: Dict):
+        """
+        Metric geometry of an intervention: `route` as a list of zone names /
+        [lon, lat] points (a line), else `location` as a zone name or
+        [lon, lat], else `lon` / `lat`. None when it gives no location;
+        ValueError when the location it gives cannot be resolved, rather than
+        falling back to the citywide table effects.
+        """
+        route = intervention.get('route')
+        if route is not None:
+            if not isinstance(route, (list, tuple)) or len(route) < 2:
+                raise ValueError("route must list at least two zone names / [lon, lat] points")
+            points = [self._point(p) for p in route]
+            return shapely.linestrings(shapely.get_coordinates(np.array(points, dtype=object)))
+
+        if intervention.get('location') is not None:
+            return self._point(intervention['location'])
+        if intervention.get('lon') is not None or intervention.get('lat') is not None:
+            return self._point([intervention.get('lon'), intervention.get('lat')])
+        return None
+
+    def affected(self, geometry, radius: float) -> np.ndarray:
+        """
+        Zones whose centroid lies within `radius` of the geometry: one STRtree
+        query, O(log n + affected zones)
+        """
+        return np.sort(self.tree.query(geometry, predicate='dwithin', distance=radius))
+
+    def new_state(self) -> 'ImpactState':
+        return ImpactState(self)
+
+
+class ImpactState:
+    """
+    One scenario's changes to the shared zone state, kept sparse: the zones
+    touched so far (sorted) with their added facilities, and the running
+    change of the summed zone scores. Placing a facility updates only the
+    zones in its service radius, so it costs O(affected zones) rather than a
+    rerun of the indicator pipeline.
+    """
+
+    def __init__(self, model: SpatialImpactModel):
+        self.model = model
+        self.touched = np.zeros(0, dtype=np.int64)
+        self.added = np.zeros((0, len(ACCESS_FACILITIES)))
+        self.score_delta = 0.0
+
+    def citywide_score(self) -> float:
+        return self.model.citywide_score(self.model.score_sum + self.score_delta)
+
+    def add_facility(self, facility_type: str, zones: np.ndarray) -> float:
+        """
+        Count one more facility for `zones`; returns the citywide score gain
+        """
+        merged = np.union1d(self.touched, zones)
+        added = np.zeros((len(merged), len(ACCESS_FACILITIES)))
+        added[np.searchsorted(merged, self.touched)] = self.added
+        self.touched, self.added = merged, added
+
+        position = np.searchsorted(merged, zones)
+        counts = self.model.counts[zones] + added[position]
+        before = self.model.scores(zones, counts)
+        counts[:, ACCESS_FACILITIES.index(facility_type)] += 1
+        added[position, ACCESS_FACILITIES.index(facility_type)] += 1
+
+        previous = self.citywide_score()
+        self.score_delta += float((self.model.scores(zones, counts) - before).sum())
+        return self.citywide_score() - previous
+
+    def place(self, intervention_type: str, geometry, params: Dict, capacity) -> Tuple[int, float]:
+        """
+        (beneficiaries, accessibility gain) of an intervention at `geometry`:
+        residents of the zones within its service radius (capped by capacity
+        for capacity-based types), and for indicator facilities the change of
+        the citywide accessibility score; other types keep the table gain
+        """
+        zones = self.model.affected(geometry, params['service_radius_m'])
+        beneficiaries = int(round(self.model.population[zones].sum()))
+        if params['beneficiaries_per_capacity']:
+            beneficiaries = min(beneficiaries, capacity * params['beneficiaries_per_capacity'])
+
+        if intervention_type in ACCESS_FACILITIES:
+            return beneficiaries, self.add_facility(intervention_type, zones)
+        return beneficiaries, params['access_gain']
+
+
+def check_locations(model: Optional[SpatialImpactModel], scenarios: Iterable[Dict]):
+    """
+    Raise ValueError for the first spatially modelled intervention whose
+    location cannot be resolved (as simulating it would); nothing to check
+    without a zone model
+    """
+    if model is None:
+        return
+    for scenario in scenarios:
+        for intervention in scenario.get('interventions', []):
+            if INTERVENTIONS[TYPE_NAMES[type_index(intervention.get('type'))]]['service_radius_m'] is not None:
+                model.locate(intervention)
+
+
+def spatial_impact_model(data) -> Optional[SpatialImpactModel]:
+    """
+    SpatialImpactModel for a dataset (cached per dataset version) or a plain
+    dict of layers; None without residential and facility layers
+    """
+    if 'residential' not in data or 'facilities' not in data:
+        return None
+    projections = projections_for(data)
+
+    def build():
+        return SpatialImpactModel(projections.metric('residential'), projections.metric('facilities'))
+
+    derived = getattr(data, 'derived', None)
+    return derived(('spatial_impact',), build) if derived is not None else build()
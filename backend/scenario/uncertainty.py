@@ -0,0 +1,183 @@
+from copy import deepcopy
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Default uncertainty of each intervention parameter, as a multiplier on the
+# planned value. Costs are right-skewed (median on plan, overruns more likely
+# than savings), timelines slip more than they shrink, beneficiary estimates
+# are symmetric. Per-type entries override the defaults.
+UNCERTAINTY: Dict[str, Dict] = {
+    'default': {
+        'cost': {'distribution': 'lognormal', 'sigma': 0.25},
+        'time_months': {'distribution': 'triangular', 'low': 0.9, 'mode': 1.0, 'high': 1.5},
+        'beneficiaries': {'distribution': 'normal', 'cv': 0.2},
+    },
+    # Large transport projects overrun more
+    'brt': {
+        'cost': {'distribution': 'lognormal', 'sigma': 0.4},
+        'time_months': {'distribution': 'triangular', 'low': 0.9, 'mode': 1.1, 'high': 2.0},
+    },
+    'road': {
+        'cost': {'distribution': 'lognormal', 'sigma': 0.35},
+    },
+    # Unknown types: wide bands
+    'unknown': {
+        'cost': {'distribution': 'lognormal', 'sigma': 0.5},
+        'time_months': {'distribution': 'triangular', 'low': 0.8, 'mode': 1.0, 'high': 2.5},
+        'beneficiaries': {'distribution': 'normal', 'cv': 0.5},
+    },
+}
+
+# Distribution -> required parameters
+DISTRIBUTIONS = {
+    'lognormal': ('sigma',),
+    'normal': ('cv',),
+    'triangular': ('low', 'mode', 'high'),
+    'uniform': ('low', 'high'),
+    'fixed': (),
+}
+PARAMETERS = ('cost', 'time_months', 'beneficiaries')
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Draws per batch, and the relative change of every reported percentile
+# between batches below which the estimate counts as converged
+MC_BATCH = 10_000
+MC_TOLERANCE = 0.005
+MC_MIN_DRAWS = 20_000
+
+
+def merge_uncertainty(overrides: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    UNCERTAINTY with caller overrides ({type or 'default': {parameter: spec}}),
+    validated up front so a bad spec fails before any sampling
+    """
+    merged = deepcopy(UNCERTAINTY)
+    for key, params in (overrides or {}).items():
+        if not isinstance(params, dict):
+            raise ValueError(f"Uncertainty for '{key}' must map parameters to distribution specs")
+        for parameter, spec in params.items():
+            if parameter not in PARAMETERS:
+                raise ValueError(f"Unknown uncertain parameter '{parameter}'")
+            if not isinstance(spec, dict):
+                raise ValueError(f"Uncertainty of {key}.{parameter} must be a distribution spec object")
+            kind = spec.get('distribution', 'fixed')
+            if kind not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution '{kind}'")
+            missing = [name for name in DISTRIBUTIONS[kind] if name not in spec]
+            if missing:
+                raise ValueError(f"{kind} distribution for {key}.{parameter} needs {', '.join(missing)}")
+        merged.setdefault(key, {}).update(params)
+    return merged
+
+
+def _parameter_spec(uncertainty: Dict, intervention_type: str, parameter: str) -> Dict:
+    return uncertainty.get(intervention_type, {}).get(parameter) or uncertainty['default'][parameter]
+
+
+def sample_multipliers(rng: np.random.Generator, spec: Dict, size) -> np.ndarray:
+    """
+    Multipliers drawn from one parameter distribution
+    """
+    kind = spec.get('distribution', 'fixed')
+    if kind == 'lognormal':
+        return rng.lognormal(0.0, spec['sigma'], size)
+    if kind == 'normal':
+        return np.maximum(rng.normal(1.0, spec['cv'], size), 0.0)
+    if kind == 'triangular':
+        return rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+    if kind == 'uniform':
+        return rng.uniform(spec['low'], spec['high'], size)
+    if kind == 'fixed':
+        return np.ones(size)
+    raise ValueError(f"Unknown distribution '{kind}'")
+
+
+def _draw_batch(rng, planned: Dict[str, np.ndarray], specs: Dict[str, List[Dict]], n: int) -> Dict[str, np.ndarray]:
+    """
+    Scenario totals for `n` joint draws; one column per intervention
+    """
+    drawn = {}
+    for parameter, values in planned.items():
+        columns = [values[j] * sample_multipliers(rng, spec, n) for j, spec in enumerate(specs[parameter])]
+        drawn[parameter] = np.column_stack(columns) if columns else np.zeros((n, 0))
+
+    cost = drawn['cost'].sum(axis=1)
+    beneficiaries = drawn['beneficiaries'].sum(axis=1)
+    months = drawn['time_months'].max(axis=1) if drawn['time_months'].shape[1] else np.zeros(n)
+    return {
+        'total_cost_usd': cost,
+        'people_benefited': beneficiaries,
+        'implementation_time_months': months,
+        'cost_per_beneficiary': np.divide(cost, beneficiaries, out=np.full(n, np.inf), where=beneficiaries > 0)
+    }
+
+
+def monte_carlo(planned: Dict[str, Sequence[float]], intervention_types: Sequence[str],
+                uncertainty: Dict[str, Dict] = None, n_draws: int = 100_000,
+                percentiles: Sequence[float] = PERCENTILES, tolerance: float = MC_TOLERANCE,
+                batch_size: int = MC_BATCH, min_draws: int = MC_MIN_DRAWS, seed: int = 0,
+                budget_usd: float = None, deadline_months: float = None) -> Dict:
+    """
+    Monte Carlo outcome bands for one scenario.
+
+    `planned` holds the planned cost, beneficiaries and time_months of each
+    intervention (from the shared intervention table). Draws are generated
+    `batch_size` at a time, fully vectorized; sampling stops after `n_draws`
+    or, past `min_draws`, once no reported percentile moved by more than
+    `tolerance` (relative) in the last batch.
+    """
+    uncertainty = uncertainty or UNCERTAINTY
+    rng = np.random.default_rng(seed)
+    planned = {parameter: np.asarray(values, dtype=float) for parameter, values in planned.items()}
+    specs = {
+        parameter: [_parameter_spec(uncertainty, t, parameter) for t in intervention_types]
+        for parameter in planned
+    }
+
+    samples: Dict[str, List[np.ndarray]] = {}
+    previous = None
+    drawn = 0
+    converged = False
+    while drawn < n_draws:
+        n = min(batch_size, n_draws - drawn)
+        for metric, values in _draw_batch(rng, planned, specs, n).items():
+            samples.setdefault(metric, []).append(values)
+        drawn += n
+
+        bands = np.array([
+            np.percentile(np.concatenate(values), percentiles)
+            for metric, values in samples.items() if metric != 'cost_per_beneficiary'
+        ])
+        if previous is not None and drawn >= min_draws:
+            change = np.abs(bands - previous) / np.maximum(np.abs(previous), 1e-12)
+            if change.max() <= tolerance:
+                converged = True
+                break
+        previous = bands
+
+    result = {}
+    for metric, values in samples.items():
+        values = np.concatenate(values)
+        finite = values[np.isfinite(values)]
+        summary = {'mean': float(finite.mean()) if len(finite) else None}
+        if len(finite):
+            summary.update({f'p{p:g}': float(v) for p, v in zip(percentiles, np.percentile(finite, percentiles))})
+        result[metric] = summary
+
+    probabilities = {}
+    total_cost = np.concatenate(samples['total_cost_usd'])
+    months = np.concatenate(samples['implementation_time_months'])
+    if budget_usd is not None:
+        probabilities['within_budget'] = float((total_cost <= budget_usd).mean())
+    if deadline_months is not None:
+        probabilities['within_deadline'] = float((months <= deadline_months).mean())
+
+    return {
+        'draws': drawn,
+        'converged': converged,
+        'tolerance': tolerance,
+        'percentiles': list(percentiles),
+        'metrics': result,
+        'probabilities': probabilities
+    }
@@ -1,34 +1,97 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+import asyncio
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import uuid
+import json
+from functools import partial
 from datetime import datetime, timezone
 import sys
 
 # Add backend directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from spatial_analysis.nairobi_data import generate_nairobi_sample_data, convert_to_geojson
-from indicators.urban_metrics import calculate_all_indicators
+from spatial_analysis.registry import registry
+from spatial_analysis.synthetic_city import generate_synthetic_city
+from spatial_analysis.serialization import (
+    CITY_LAYERS, accepts_gzip, cached_geojson, city_geojson, etag_matches, geojson_etag, layer_geojson,
+    layer_to_geojson_bytes, splice_city_payload
+)
+from spatial_analysis.spatial_index import parse_bbox, query_layer
+from spatial_analysis.tiles import TileCache, MAX_ZOOM
+from spatial_analysis.road_network import network_accessibility, isochrone_layer
+from spatial_analysis.hexgrid import city_hexgrid
+from indicators.engine import INDICATOR_SET_VERSION, IndicatorEngine
+from indicators.zone_table import iter_tables, shape_tables
 from ai_planner.insights import generate_planning_insights
 from ai_planner.recommendations import generate_specific_recommendations
 from reports.pdf_generator import generate_city_report
+from workers.pools import WorkerPools, TaskTimeoutError
+from storage.indicator_cache import IndicatorCache
+from scenario.simulator import SIMULATOR_VERSION, ScenarioSimulator
+from scenario.spatial_impact import check_locations, spatial_impact_model
+from scenario.memo import ScenarioMemo
+from scenario.optimizer import build_problem, optimize_stream
+from storage.indicator_history import IndicatorHistory
+from storage.scenario_jobs import ScenarioJobStore
+from storage.insights_cache import InsightsCache
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (short server selection timeout: caches fall back to
+# computing rather than stalling requests when MongoDB is unreachable)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=int(os.environ.get('MONGO_TIMEOUT_MS', '3000')))
 db = client[os.environ['DB_NAME']]
 
+# Optional synthetic city for load / scale testing (e.g. SYNTHETIC_CITY_ZONES=100000)
+if os.environ.get('SYNTHETIC_CITY_ZONES'):
+    registry.register('synthetic', partial(
+        generate_synthetic_city,
+        n_zones=int(os.environ['SYNTHETIC_CITY_ZONES']),
+        seed=int(os.environ.get('SYNTHETIC_CITY_SEED', '0'))
+    ))
+
+# Process / thread pools for CPU-bound work (sized by WORKER_PROCESSES,
+# WORKER_THREADS, TASK_TIMEOUT_SECONDS)
+pools = WorkerPools.from_env()
+
+# Incremental indicator engine shared by all endpoints
+indicator_engine = IndicatorEngine()
+
+# Indicator results materialized in MongoDB, shared across API workers
+indicator_cache = IndicatorCache(db, ttl_seconds=int(os.environ.get('INDICATOR_CACHE_TTL_SECONDS', str(7 * 24 * 3600))))
+
+# Snapshot of every fresh indicator computation, for history queries
+indicator_history = IndicatorHistory(db)
+
+# Scenario simulation jobs (status, progress, results), deduplicated by config hash
+scenario_jobs = ScenarioJobStore(db, ttl_seconds=int(os.environ.get('SCENARIO_JOB_TTL_SECONDS', str(7 * 24 * 3600))))
+SCENARIO_JOB_CHUNK = int(os.environ.get('SCENARIO_JOB_CHUNK', '500'))
+scenario_tasks = set()  # running job tasks (kept referenced until done)
+
+# Scenario aggregates for incremental (add / remove one intervention) edits
+scenario_memo = ScenarioMemo(max_entries=int(os.environ.get('SCENARIO_MEMO_ENTRIES', '4096')))
+
+# LLM insights (memory LRU + MongoDB), keyed by indicator prompt, model and prompt version
+insights_cache = InsightsCache(
+    db,
+    max_entries=int(os.environ.get('INSIGHTS_CACHE_ENTRIES', '256')),
+    ttl_seconds=int(os.environ.get('INSIGHTS_CACHE_TTL_SECONDS', str(24 * 3600)))
+)
+
+# Vector tile cache (bounded LRU, keyed by dataset version)
+tile_cache = TileCache(max_bytes=int(os.environ.get('TILE_CACHE_MAX_MB', '64')) * 1024 * 1024)
+
 # Create the main app
 app = FastAPI(title="UrbanPulse AI")
 
@@ -48,6 +111,113 @@ class AIInsightsRequest(BaseModel):
     indicators: Dict
     model: Optional[str] = "gpt-5.2"
 
+class PortfolioRequest(BaseModel):
+    city_id: str = "nairobi"
+    budget_usd: float = Field(gt=0)
+    deadline_months: Optional[float] = None
+    objective: str = "equity"
+    max_per_type: int = Field(default=5, ge=1, le=1000)
+    candidates: Optional[List[Dict]] = None
+    workers: Optional[int] = Field(default=None, ge=1, le=64)
+
+class ScenarioConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    name: str
+    description: str = ""
+    interventions: List[Dict] = []
+
+class SimulateRequest(BaseModel):
+    city_id: str = "nairobi"
+    scenario: ScenarioConfig
+
+class CompareRequest(BaseModel):
+    city_id: str = "nairobi"
+    # The payload and summarized result are stored as one MongoDB document (16 MB)
+    scenarios: List[ScenarioConfig] = Field(min_length=1, max_length=1000)
+
+class ScenarioEditRequest(BaseModel):
+    city_id: str = "nairobi"
+    base_key: Optional[str] = Field(default=None, pattern=r"^[0-9a-f]{64}$")
+    interventions: Optional[List[Dict]] = None
+    add: List[Dict] = []
+    remove: List[Dict] = []
+
+class ParetoRequest(BaseModel):
+    city_id: str = "nairobi"
+    scenarios: List[ScenarioConfig] = Field(min_length=1, max_length=200_000)
+    objectives: Optional[List[str]] = None
+    frontier_only: bool = True
+    offset: int = Field(default=0, ge=0)
+    limit: int = Field(default=100, ge=1, le=5000)
+
+class UncertaintyRequest(BaseModel):
+    city_id: str = "nairobi"
+    scenario: Dict
+    n_draws: int = Field(default=100_000, ge=1000, le=2_000_000)
+    tolerance: float = Field(default=0.005, ge=0, le=0.5)
+    uncertainty: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None  # {type or 'default': {parameter: spec}}
+    seed: int = 0
+    budget_usd: Optional[float] = None
+    deadline_months: Optional[float] = None
+
+def get_dataset(city_id: str):
+    """Resolve a city to its current shared dataset build, or 404"""
+    try:
+        return registry.get(city_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="City not found")
+
+async def load_dataset(city_id: str):
+    """get_dataset, building the dataset on a worker thread if it is not cached yet"""
+    dataset = registry.peek(city_id)
+    if dataset is not None:
+        return dataset
+    return await pools.run_in_thread(get_dataset, city_id)
+
+async def geojson_response(request: Request, version: str, build) -> Response:
+    """
+    Serve cached GeoJSON bytes as-is: gzip when the client accepts it, with
+    an ETag per dataset version and encoding so unchanged layers are not resent
+    """
+    compressed = accepts_gzip(request.headers.get('accept-encoding'))
+    etag = geojson_etag(version, compressed)
+    headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+
+    if compressed:
+        headers['Content-Encoding'] = 'gzip'
+    content = await pools.run_in_thread(build, compressed)
+    return Response(content=content, media_type="application/geo+json", headers=headers)
+
+async def compute_indicators(data) -> Dict:
+    """
+    Indicators for a dataset build: the in-process engine memo first, then
+    the shared MongoDB cache, and only then the geospatial pipeline (whose
+    results are also recorded as a history snapshot)
+    """
+    indicators, tier = await indicator_cache.resolve(
+        indicator_engine, data, lambda: pools.run_in_thread(indicator_engine.compute, data)
+    )
+    if tier == 'computed':
+        await indicator_history.record(data.city_id, data.version, indicators)
+    return indicators
+
+async def scenario_simulator(data) -> ScenarioSimulator:
+    """Simulator on a dataset's indicators, with its zone model for located interventions"""
+    indicators = await compute_indicators(data)
+    return ScenarioSimulator(indicators, engine=indicator_engine,
+                             spatial=await pools.run_in_thread(spatial_impact_model, data))
+
+def parse_viewport(bbox: Optional[str], fields: Optional[str]):
+    """Validate bbox / fields query parameters"""
+    try:
+        bounds = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    return bounds, field_list
+
 # Routes
 @api_router.get("/")
 async def root():
@@ -69,48 +239,195 @@ async def get_available_cities():
     }
 
 @api_router.get("/city/{city_id}/data")
-async def get_city_data(city_id: str):
-    """Get spatial data for a city"""
-    if city_id != "nairobi":
-        raise HTTPException(status_code=404, detail="City not found")
+async def get_city_data(city_id: str, request: Request,
+                        bbox: Optional[str] = None, zoom: Optional[int] = None,
+                        tolerance: Optional[float] = None, fields: Optional[str] = None):
+    """Get spatial data for a city, optionally restricted to a viewport"""
+    data = await load_dataset(city_id)
+    
+    if bbox is None and zoom is None and tolerance is None and fields is None:
+        # GeoJSON is serialized once per dataset version and served as raw bytes
+        return await geojson_response(request, data.version,
+                                lambda compressed: city_geojson(data, compressed=compressed))
+    
+    # Viewport query: only the features returned by the spatial index are serialized
+    bounds, field_list = parse_viewport(bbox, fields)
+    payload = await pools.run_in_thread(lambda: splice_city_payload(data.city_id, {
+        layer: layer_to_geojson_bytes(query_layer(data, layer, bounds, zoom, tolerance, field_list))
+        for layer in CITY_LAYERS if layer in data
+    }))
+    return Response(content=payload, media_type="application/geo+json")
+
+@api_router.get("/city/{city_id}/layers/{layer}")
+async def get_city_layer(city_id: str, layer: str, request: Request,
+                         bbox: Optional[str] = None, zoom: Optional[int] = None,
+                         tolerance: Optional[float] = None, fields: Optional[str] = None):
+    """Get a single spatial layer for a city as GeoJSON"""
+    data = await load_dataset(city_id)
+    if layer not in CITY_LAYERS or layer not in data:
+        raise HTTPException(status_code=404, detail="Layer not found")
+    
+    if bbox is None and zoom is None and tolerance is None and fields is None:
+        return await geojson_response(request, f"{data.version}-{layer}",
+                                lambda compressed: layer_geojson(data, layer, compressed=compressed))
     
-    # Generate Nairobi data
-    data = generate_nairobi_sample_data()
+    bounds, field_list = parse_viewport(bbox, fields)
+    payload = await pools.run_in_thread(
+        lambda: layer_to_geojson_bytes(query_layer(data, layer, bounds, zoom, tolerance, field_list))
+    )
+    return Response(content=payload, media_type="application/geo+json")
+
+@api_router.get("/city/{city_id}/tiles/{layer}/{z}/{x}/{y}.pbf")
+async def get_city_tile(city_id: str, layer: str, z: int, x: int, y: int):
+    """Get a Mapbox Vector Tile for one city layer"""
+    data = await load_dataset(city_id)
+    if layer not in CITY_LAYERS or layer not in data:
+        raise HTTPException(status_code=404, detail="Layer not found")
+    if not (0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+    
+    tile = await pools.run_in_thread(tile_cache.get_or_render, data, layer, z, x, y)
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={'ETag': f'"{data.version}"', 'Cache-Control': 'public, max-age=3600'}
+    )
+
+@api_router.get("/city/{city_id}/network/accessibility")
+async def get_network_accessibility(city_id: str, facility_type: str = "hospital"):
+    """Road-network travel time from each residential zone to the nearest facility"""
+    data = await load_dataset(city_id)
+    if facility_type not in set(data['facilities']['type']):
+        raise HTTPException(status_code=404, detail="Facility type not found")
+    
+    result = await pools.run_in_thread(network_accessibility, data, facility_type)
+    return {"city": data.city_id, "dataset_version": data.version, **result}
+
+@api_router.get("/city/{city_id}/network/isochrones")
+async def get_network_isochrones(city_id: str, request: Request,
+                                 facility_type: str = "hospital", minutes: str = "10,20,30"):
+    """Travel-time isochrone polygons (GeoJSON) around all facilities of a type"""
+    data = await load_dataset(city_id)
+    if facility_type not in set(data['facilities']['type']):
+        raise HTTPException(status_code=404, detail="Facility type not found")
+    try:
+        thresholds = tuple(sorted({float(m) for m in minutes.split(',') if m.strip()}))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="minutes must be a comma-separated list of numbers")
+    if not thresholds or thresholds[0] <= 0 or len(thresholds) > 10:
+        raise HTTPException(status_code=400, detail="Provide 1-10 positive minute thresholds")
     
-    # Convert to GeoJSON
+    return await geojson_response(
+        request, f"{data.version}-iso-{facility_type}-{','.join(map(str, thresholds))}",
+        lambda compressed: cached_geojson(
+            data, ('geojson', 'isochrones', facility_type, thresholds),
+            lambda: isochrone_layer(data, facility_type, thresholds), compressed, bounded=True
+        )
+    )
+
+@api_router.get("/city/{city_id}/hexgrid")
+async def get_city_hexgrid(city_id: str, size_m: float = 500):
+    """Population density surface on a hexagonal grid, as parallel per-cell arrays"""
+    if not 100 <= size_m <= 10000:
+        raise HTTPException(status_code=400, detail="size_m must be between 100 and 10000")
+    data = await load_dataset(city_id)
+    try:
+        result = await pools.run_in_thread(city_hexgrid, data, size_m)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"city": data.city_id, "dataset_version": data.version, **result}
+
+@api_router.get("/city/{city_id}/dataset")
+async def get_city_dataset_info(city_id: str):
+    """Get version and layer summary of the city's current dataset build"""
+    return (await load_dataset(city_id)).info()
+
+@api_router.post("/city/{city_id}/reload")
+async def reload_city_dataset(city_id: str):
+    """Rebuild a city's layers from source (e.g. after the source data changed)"""
+    if not registry.has_city(city_id):
+        raise HTTPException(status_code=404, detail="City not found")
+    previous = registry.peek(city_id)
+    dataset = await pools.run_in_thread(registry.reload, city_id)
     return {
-        "city": "nairobi",
-        "layers": {
-            "residential": convert_to_geojson(data['residential']),
-            "commercial": convert_to_geojson(data['commercial']),
-            "facilities": convert_to_geojson(data['facilities']),
-            "roads": convert_to_geojson(data['roads'])
-        }
+        **dataset.info(),
+        'previous_version': previous.version if previous else None,
+        'changed': previous is None or previous.version != dataset.version
     }
 
 @api_router.get("/city/{city_id}/indicators")
-async def get_city_indicators(city_id: str):
-    """Calculate urban indicators for a city"""
-    if city_id != "nairobi":
+async def get_city_indicators(city_id: str, limit: Optional[int] = None, offset: int = 0,
+                              sort_by: Optional[str] = None, fields: Optional[str] = None,
+                              layout: str = "records"):
+    """
+    Calculate urban indicators for a city
+    Zone-level tables are sorted (sort_by=column, -column for descending),
+    paged (offset / limit; limit=0 returns the summaries only) and projected
+    (fields) before serialization; layout=columns returns them as arrays
+    """
+    if (limit is not None and limit < 0) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit and offset must be non-negative")
+    if layout not in ("records", "columns"):
+        raise HTTPException(status_code=400, detail="layout must be 'records' or 'columns'")
+    
+    data = await load_dataset(city_id)
+    indicators = await compute_indicators(data)
+    
+    descending = sort_by is not None and sort_by.startswith('-')
+    sort_column = sort_by.lstrip('-') if sort_by else None
+    if sort_column and not any(sort_column in table.columns for table in iter_tables(indicators)):
+        raise HTTPException(status_code=400, detail=f"Unknown sort field '{sort_column}'")
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    
+    shaped = await pools.run_in_thread(
+        shape_tables, indicators, sort_column, descending, offset, limit, field_list, layout
+    )
+    return {
+        "city": data.city_id,
+        "dataset_version": data.version,
+        "indicators": shaped
+    }
+
+@api_router.get("/city/{city_id}/indicators/history")
+async def get_indicator_history(city_id: str, indicator: Optional[str] = None, metric: Optional[str] = None,
+                                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                bucket: str = "day", bin_size: int = 1, limit: int = 500):
+    """
+    Indicator snapshots over time, downsampled server-side into time buckets
+    (bucket=minute|hour|day|week|month|year, bin_size units per bucket).
+    metric (dotted path, e.g. citywide.hospital.score_per_1000) returns
+    mean / min / max / last per bucket instead of the last snapshot.
+    """
+    if not registry.has_city(city_id):
         raise HTTPException(status_code=404, detail="City not found")
+    if not 1 <= limit <= 5000 or bin_size < 1:
+        raise HTTPException(status_code=400, detail="limit must be 1-5000 and bin_size positive")
     
-    # Generate data and calculate indicators
-    data = generate_nairobi_sample_data()
-    indicators = calculate_all_indicators(data)
+    try:
+        points = await indicator_history.query(city_id, indicator=indicator, metric=metric, start=start,
+                                               end=end, bucket=bucket, bin_size=bin_size, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PyMongoError as e:
+        logging.error(f"Indicator history query failed: {e}")
+        raise HTTPException(status_code=503, detail="Indicator history unavailable")
     
     return {
-        "city": "nairobi",
-        "indicators": indicators
+        "city": city_id,
+        "indicator": indicator,
+        "metric": metric,
+        "bucket": bucket,
+        "bin_size": bin_size,
+        "points": points
     }
 
 @api_router.post("/ai/insights")
 async def get_ai_insights(request: AIInsightsRequest):
     """Generate AI-powered planning insights with explainability"""
     try:
-        # Generate AI insights
-        insights = await generate_planning_insights(
-            indicators=request.indicators,
-            model=request.model
+        # Generate AI insights (cached per indicator prompt and model)
+        insights, insights_cached = await insights_cache.get_or_generate(
+            request.indicators, request.model, generate_planning_insights
         )
         
         # Generate specific recommendations
@@ -127,6 +444,7 @@ async def get_ai_insights(request: AIInsightsRequest):
             'explainability': {
                 'indicators_analyzed': list(request.indicators.keys()),
                 'analysis_timestamp': datetime.now(timezone.utc).isoformat(),
+                'insights_cached': insights_cached,
                 'confidence_notes': 'Confidence levels based on data completeness and indicator quality',
                 'assumptions': [
                     'Service radius: 5km for hospitals, 3km for schools',
@@ -143,21 +461,20 @@ async def get_ai_insights(request: AIInsightsRequest):
 @api_router.get("/city/{city_id}/report")
 async def generate_report(city_id: str):
     """Generate and download PDF planning report"""
-    if city_id != "nairobi":
-        raise HTTPException(status_code=404, detail="City not found")
+    data = await load_dataset(city_id)
     
     try:
-        # Get data and indicators
-        data = generate_nairobi_sample_data()
-        indicators = calculate_all_indicators(data)
+        # Get indicators for the shared dataset build
+        indicators = await compute_indicators(data)
         
         # Generate AI insights and recommendations
-        ai_insights = await generate_planning_insights(indicators, model="gpt-5.2")
+        ai_insights, _ = await insights_cache.get_or_generate(indicators, "gpt-5.2", generate_planning_insights)
         recommendations = generate_specific_recommendations(indicators)
         
-        # Generate PDF
-        pdf_buffer = generate_city_report(
-            city_name="Nairobi",
+        # Generate PDF in the process pool (ReportLab / matplotlib hold the GIL)
+        pdf_buffer = await pools.run_in_process(
+            generate_city_report,
+            city_name=data.city_id,
             indicators=indicators,
             insights=ai_insights,
             recommendations=recommendations
@@ -168,16 +485,199 @@ async def generate_report(city_id: str):
             pdf_buffer,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename=UrbanPulse_Nairobi_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
+                "Content-Disposition": f"attachment; filename=UrbanPulse_{data.city_id.title()}_Report_{datetime.now().strftime('%Y%m%d')}.pdf"
             }
         )
+    except TaskTimeoutError:
+        raise
     except Exception as e:
         logging.error(f"Error generating report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def run_scenario_job(job_id: str, kind: str, data, scenarios: List[Dict]):
+    """
+    Background job: simulate `scenarios` on the thread pool in chunks,
+    recording progress after each, then store the result
+    """
+    try:
+        await scenario_jobs.start(job_id)
+        simulator = await scenario_simulator(data)
+        results = []
+        for start in range(0, len(scenarios), SCENARIO_JOB_CHUNK):
+            results.extend(await pools.run_in_thread(
+                simulator.simulate_results, scenarios[start:start + SCENARIO_JOB_CHUNK]
+            ))
+            await scenario_jobs.progress(job_id, len(results))
+        result = results[0] if kind == 'simulate' else simulator.summarize_comparison(results)
+        await scenario_jobs.complete(job_id, result)
+    except Exception as e:
+        logging.error(f"Scenario job {job_id} failed: {e}")
+        try:
+            await scenario_jobs.fail(job_id, str(e))
+        except PyMongoError as store_error:
+            logging.error(f"Could not record failure of scenario job {job_id}: {store_error}")
+
+async def submit_scenario_job(kind: str, city_id: str, scenarios: List[Dict]) -> JSONResponse:
+    """
+    Queue a scenario job (or attach to the identical existing one) and
+    return its id right away; unresolvable intervention locations are
+    rejected before anything is queued
+    """
+    data = await load_dataset(city_id)
+    try:
+        await pools.run_in_thread(lambda: check_locations(spatial_impact_model(data), scenarios))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scenario: {e}")
+    payload = scenarios[0] if kind == 'simulate' else scenarios
+    try:
+        job_id, created = await scenario_jobs.submit(kind, data.city_id, data.version, INDICATOR_SET_VERSION,
+                                                     SIMULATOR_VERSION, payload, total=len(scenarios))
+    except PyMongoError as e:
+        logging.error(f"Scenario job store unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Scenario job store unavailable")
+    
+    if created:
+        task = asyncio.create_task(run_scenario_job(job_id, kind, data, scenarios))
+        scenario_tasks.add(task)
+        task.add_done_callback(scenario_tasks.discard)
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "deduplicated": not created,
+        "status_url": f"/api/scenario/jobs/{job_id}"
+    })
+
+@api_router.post("/scenario/simulate")
+async def simulate_scenario(request: SimulateRequest):
+    """Queue a scenario simulation; poll /scenario/jobs/{job_id} for the result"""
+    return await submit_scenario_job('simulate', request.city_id, [request.scenario.model_dump()])
+
+@api_router.post("/scenario/compare")
+async def compare_scenarios(request: CompareRequest):
+    """Queue a comparison of several scenarios; poll /scenario/jobs/{job_id} for the result"""
+    return await submit_scenario_job('compare', request.city_id, [s.model_dump() for s in request.scenarios])
+
+@api_router.get("/scenario/jobs/{job_id}")
+async def get_scenario_job(job_id: str):
+    """Status, progress and (once completed) result of a scenario job"""
+    try:
+        job = await scenario_jobs.get(job_id)
+    except PyMongoError as e:
+        logging.error(f"Scenario job store unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Scenario job store unavailable")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job["job_id"] = job.pop("_id")
+    return job
+
+@api_router.post("/scenario/optimize")
+async def optimize_portfolio(request: PortfolioRequest):
+    """
+    Search for the intervention portfolio that maximizes an objective
+    (equity, beneficiaries or accessibility) within budget and deadline.
+    Streams NDJSON events: each improved portfolio as it is found, then "done".
+    """
+    data = await load_dataset(request.city_id)
+    simulator = await scenario_simulator(data)
+    try:
+        problem = build_problem(simulator, request.objective, request.budget_usd, request.deadline_months,
+                                request.candidates, request.max_per_type)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid portfolio request: {e}")
+    
+    async def events():
+        try:
+            async for event in optimize_stream(simulator, problem, request.objective, pools, request.workers):
+                yield json.dumps(event, default=float) + "\n"
+        except TaskTimeoutError as e:
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@api_router.post("/scenario/evaluate")
+async def evaluate_scenario_edit(request: ScenarioEditRequest):
+    """
+    Metrics of a scenario being edited. Send the intervention list once, then
+    the returned key with the interventions to add / remove: edits on a
+    cached scenario update its totals incrementally instead of re-simulating.
+    """
+    data = await load_dataset(request.city_id)
+    simulator = await scenario_simulator(data)
+    version = f"{data.version}:{INDICATOR_SET_VERSION}:{SIMULATOR_VERSION}"
+    try:
+        edited = await pools.run_in_thread(
+            scenario_memo.edit, simulator, version, request.base_key, request.interventions,
+            request.add, request.remove
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=409, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    aggregate = edited['aggregate']
+    metrics = simulator.metrics(aggregate.totals(simulator))
+    if metrics['cost_per_beneficiary'] == float('inf'):
+        metrics['cost_per_beneficiary'] = None  # no beneficiaries (not valid JSON as inf)
+    return {
+        "key": edited['key'],
+        "incremental": edited['delta'],
+        "n_interventions": aggregate.n,
+        "metrics": metrics
+    }
+
+@api_router.post("/scenario/pareto")
+async def scenario_pareto(request: ParetoRequest):
+    """
+    Pareto frontier of a scenario set over cost, beneficiaries, equity and
+    time (or the chosen objectives): front ranks, crowding distances, paged
+    """
+    data = await load_dataset(request.city_id)
+    simulator = await scenario_simulator(data)
+    scenarios = [s.model_dump() for s in request.scenarios]
+    try:
+        return await pools.run_in_thread(
+            simulator.pareto_frontier, scenarios, request.objectives,
+            request.frontier_only, request.offset, request.limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Pareto request: {e}")
+
+@api_router.post("/scenario/uncertainty")
+async def simulate_uncertainty(request: UncertaintyRequest):
+    """
+    Monte Carlo outcome bands for a scenario: percentiles of total cost,
+    beneficiaries, timeline and cost per beneficiary under uncertain
+    intervention parameters, plus the chance of meeting budget / deadline
+    """
+    data = await load_dataset(request.city_id)
+    simulator = await scenario_simulator(data)
+    try:
+        return await pools.run_in_thread(
+            simulator.simulate_uncertainty, request.scenario,
+            n_draws=request.n_draws, uncertainty=request.uncertainty, tolerance=request.tolerance,
+            seed=request.seed, budget_usd=request.budget_usd, deadline_months=request.deadline_months
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid uncertainty request: {e}")
+
+@api_router.get("/system/workers")
+async def get_worker_metrics():
+    """Worker pool sizes, queue depth and latency counters"""
+    return {
+        **pools.metrics(),
+        'tile_cache': tile_cache.stats(),
+        'indicator_engine': indicator_engine.stats(),
+        'indicator_cache': indicator_cache.stats(),
+        'scenario_memo': scenario_memo.stats(),
+        'insights_cache': insights_cache.stats()
+    }
+
 # Include router
 app.include_router(api_router)
 
+@app.exception_handler(TaskTimeoutError)
+async def task_timeout_handler(request: Request, exc: TaskTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -193,9 +693,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def ensure_db_indexes():
+    try:
+        await indicator_cache.ensure_indexes()
+        await indicator_history.ensure_indexes()
+        await scenario_jobs.ensure_indexes()
+        await insights_cache.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Could not create MongoDB indexes: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    pools.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,205 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+from typing import Dict
+
+from spatial_analysis.projection import METRIC_EPSG, WGS84_EPSG, get_transformer
+
+SQRT3 = np.sqrt(3)
+
+# Upper bound on lattice cells generated for one surface
+MAX_CELLS = 2_000_000
+
+# Zone / cell pairs clipped per vectorized block, and the largest ring clipped
+# in numpy (zones with more vertices, holes or several parts go through GEOS)
+CLIP_CHUNK = 50000
+MAX_CLIP_VERTICES = 64
+
+
+def hex_centers(q: np.ndarray, r: np.ndarray, size: float):
+    """
+    Metric centers of pointy-top hexagons at axial coordinates (q, r);
+    `size` is the hexagon circumradius
+    """
+    return size * SQRT3 * (q + r / 2), size * 1.5 * r
+
+
+def hex_polygons(q: np.ndarray, r: np.ndarray, size: float) -> np.ndarray:
+    x, y = hex_centers(q, r, size)
+    angles = np.deg2rad(30 + 60 * np.arange(7))
+    ring = np.stack([x[:, None] + size * np.cos(angles), y[:, None] + size * np.sin(angles)], axis=-1)
+    return shapely.polygons(ring)
+
+
+def point_to_hex(x: np.ndarray, y: np.ndarray, size: float):
+    """
+    Axial (q, r) of the hexagon containing each point (vectorized cube rounding)
+    """
+    qf = (SQRT3 / 3 * x - y / 3) / size
+    rf = (2 / 3 * y) / size
+    sf = -qf - rf
+    q, r, s = np.round(qf), np.round(rf), np.round(sf)
+    dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    q = np.where(fix_q, -r - s, q)
+    r = np.where(fix_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+
+def covering_lattice(bounds, size: float):
+    """
+    Axial coordinates of all hexagons that can overlap a bounding box
+    """
+    minx, miny, maxx, maxy = bounds
+    r_range = np.arange(np.floor(miny / (1.5 * size)) - 1, np.ceil(maxy / (1.5 * size)) + 2)
+    width = size * SQRT3
+    q_min = np.floor(minx / width - r_range.max() / 2) - 1
+    q_max = np.ceil(maxx / width - r_range.min() / 2) + 1
+    if len(r_range) * (q_max - q_min + 1) > MAX_CELLS:
+        raise ValueError("Hexagon size too small for this city extent")
+
+    q, r = np.meshgrid(np.arange(q_min, q_max + 1), r_range)
+    q, r = q.ravel(), r.ravel()
+    x, y = hex_centers(q, r, size)
+    keep = (x >= minx - width) & (x <= maxx + width) & (y >= miny - 2 * size) & (y <= maxy + 2 * size)
+    return q[keep].astype(np.int64), r[keep].astype(np.int64)
+
+
+def _clip_areas(rings: np.ndarray, centers: np.ndarray, size: float) -> np.ndarray:
+    """
+    Area of each ring clipped to the hexagon around the matching center.
+    Sutherland-Hodgman against the six hexagon half-planes, vectorized over
+    pairs; rings are (pairs, vertices, 2), padded by repeating the last vertex.
+    Concave rings are clipped correctly for area purposes (the degenerate
+    edges Sutherland-Hodgman leaves behind enclose no area).
+    """
+    pts = rings - centers[:, None, :]
+    apothem = size * SQRT3 / 2
+    for angle in np.deg2rad(60 * np.arange(6)):
+        d = pts[..., 0] * np.cos(angle) + pts[..., 1] * np.sin(angle) - apothem
+        nxt, d_nxt = np.roll(pts, -1, axis=1), np.roll(d, -1, axis=1)
+        inside = d <= 0
+        crossing = inside != (d_nxt <= 0)
+        t = np.divide(d, d - d_nxt, out=np.zeros_like(d), where=crossing)[..., None]
+
+        # Each edge emits its start vertex (if inside) and its crossing point
+        out = np.stack([pts, pts + (nxt - pts) * t], axis=2).reshape(len(pts), -1, 2)
+        valid = np.stack([inside, crossing], axis=2).reshape(len(pts), -1)
+        count = valid.sum(axis=1)
+        order = np.argsort(~valid, axis=1, kind='stable')[:, :max(int(count.max()), 1)]
+        slot = np.minimum(np.arange(order.shape[1]), np.maximum(count, 1)[:, None] - 1)
+        pts = np.take_along_axis(out, np.take_along_axis(order, slot, axis=1)[..., None], axis=1)
+        pts[count == 0] = 0
+
+    x, y = pts[..., 0], pts[..., 1]
+    return 0.5 * np.abs((x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1))
+
+
+def overlap_areas(zones: np.ndarray, zone_idx: np.ndarray, cell_q: np.ndarray, cell_r: np.ndarray,
+                  size: float) -> np.ndarray:
+    """
+    Intersection area of each (zone, hexagon cell) pair
+    """
+    areas = np.zeros(len(zone_idx))
+    n_coords = shapely.get_num_coordinates(zones)
+    simple = (shapely.get_type_id(zones) == shapely.GeometryType.POLYGON) \
+        & (shapely.get_num_interior_rings(zones) == 0) & (n_coords <= MAX_CLIP_VERTICES + 1)
+    cells = np.column_stack(hex_centers(cell_q, cell_r, size))
+
+    # Simple rings: numpy clipping, blocked by ring length to limit padding
+    rings = shapely.get_exterior_ring(zones[simple])
+    coords, ring_idx = shapely.get_coordinates(rings, return_index=True)
+    n_vertices = np.bincount(ring_idx, minlength=len(rings)) - 1
+    starts = np.concatenate([[0], np.cumsum(n_vertices + 1)[:-1]])
+    zone_ring = np.full(len(zones), -1)
+    zone_ring[simple] = np.arange(len(rings))
+
+    pair_ring = zone_ring[zone_idx]
+    fast = np.flatnonzero(pair_ring >= 0)
+    fast = fast[np.argsort(n_vertices[pair_ring[fast]], kind='stable')]
+    for start in range(0, len(fast), CLIP_CHUNK):
+        block = fast[start:start + CLIP_CHUNK]
+        ring = pair_ring[block]
+        width = int(n_vertices[ring].max())
+        offset = np.minimum(np.arange(width), n_vertices[ring][:, None] - 1)
+        areas[block] = _clip_areas(coords[starts[ring][:, None] + offset], cells[block], size)
+
+    # Everything else: exact GEOS overlay
+    slow = np.flatnonzero(pair_ring < 0)
+    if len(slow):
+        polygons = hex_polygons(cell_q[slow], cell_r[slow], size)
+        areas[slow] = shapely.area(shapely.intersection(zones[zone_idx[slow]], polygons))
+    return areas
+
+
+def _cell_keys(q: np.ndarray, r: np.ndarray) -> np.ndarray:
+    return (q.astype(np.int64) << 32) ^ (r.astype(np.int64) & 0xFFFFFFFF)
+
+
+def population_hexgrid(residential_proj, facilities_proj, size_m: float) -> Dict:
+    """
+    Spread zone populations onto a hexagon lattice by area-weighted overlap
+    and count facilities per cell. Only non-empty cells are returned, as
+    parallel arrays.
+    """
+    zones = np.asarray(residential_proj.geometry.values)
+    population = residential_proj['population'].to_numpy(dtype=float)
+    q, r = covering_lattice(shapely.total_bounds(zones), size_m)
+    cells = hex_polygons(q, r, size_m)
+
+    # Candidate (zone, cell) pairs from the index, overlap areas vectorized over pairs
+    zone_idx, cell_idx = STRtree(cells).query(zones, predicate='intersects')
+    overlap = overlap_areas(zones, zone_idx, q[cell_idx], r[cell_idx], size_m)
+    zone_area = shapely.area(zones)
+    share = np.divide(overlap, zone_area[zone_idx], out=np.zeros_like(overlap), where=zone_area[zone_idx] > 0)
+    cell_population = np.bincount(cell_idx, weights=population[zone_idx] * share, minlength=len(cells))
+
+    # Facilities: bin points directly to their hexagon
+    keys = _cell_keys(q, r)
+    order = np.argsort(keys)
+    fq, fr = point_to_hex(facilities_proj.geometry.x.to_numpy(), facilities_proj.geometry.y.to_numpy(), size_m)
+    fkeys = _cell_keys(fq, fr)
+    pos = np.clip(np.searchsorted(keys[order], fkeys), 0, len(keys) - 1)
+    on_lattice = keys[order][pos] == fkeys
+    facility_cell = order[pos[on_lattice]]
+    facility_type = facilities_proj['type'].to_numpy()[on_lattice]
+    facility_counts = {
+        ftype: np.bincount(facility_cell[facility_type == ftype], minlength=len(cells))
+        for ftype in np.unique(facilities_proj['type'].to_numpy())
+    }
+
+    occupied = cell_population > 0
+    for counts in facility_counts.values():
+        occupied |= counts > 0
+
+    cell_area_km2 = 1.5 * SQRT3 * size_m ** 2 / 1e6
+    x, y = hex_centers(q[occupied], r[occupied], size_m)
+    lon, lat = get_transformer(METRIC_EPSG, WGS84_EPSG).transform(x, y)
+
+    return {
+        'cell_size_m': size_m,
+        'cell_area_km2': round(cell_area_km2, 4),
+        'crs': f"EPSG:{METRIC_EPSG}",
+        'cells': int(occupied.sum()),
+        'total_population': int(round(cell_population.sum())),
+        'q': q[occupied].tolist(),
+        'r': r[occupied].tolist(),
+        'lon': np.round(lon, 6).tolist(),
+        'lat': np.round(lat, 6).tolist(),
+        'population': np.round(cell_population[occupied]).astype(np.int64).tolist(),
+        'density': np.round(cell_population[occupied] / cell_area_km2, 1).tolist(),
+        'facilities': {ftype: counts[occupied].tolist() for ftype, counts in facility_counts.items()}
+    }
+
+
+def city_hexgrid(dataset, size_m: float) -> Dict:
+    """
+    Hex-grid surface for a dataset, cached per dataset version and cell size
+    (in the dataset's bounded LRU: any size in range can be requested)
+    """
+    return dataset.derived(('hexgrid', float(size_m)), lambda: population_hexgrid(
+        dataset.projections.get('residential', METRIC_EPSG),
+        dataset.projections.get('facilities', METRIC_EPSG),
+        float(size_m)
+    ), bounded=True)
@@ -106,17 +106,44 @@ def generate_nairobi_sample_data():
             'type': 'major_road'
         })
     
+    # Green spaces (parks and urban forest)
+    green_spaces = [
+        {'name': 'Karura Forest', 'type': 'forest', 'center': (-1.2400, 36.8330), 'area_km2': 10.2},
+        {'name': 'Nairobi Arboretum', 'type': 'park', 'center': (-1.2750, 36.8050), 'area_km2': 0.3},
+        {'name': 'Uhuru Park', 'type': 'park', 'center': (-1.2890, 36.8170), 'area_km2': 0.13},
+        {'name': 'Central Park', 'type': 'park', 'center': (-1.2850, 36.8190), 'area_km2': 0.04},
+        {'name': 'City Park', 'type': 'park', 'center': (-1.2630, 36.8280), 'area_km2': 0.6},
+    ]
+    
+    green_features = []
+    for space in green_spaces:
+        size = np.sqrt(space['area_km2']) / 111
+        polygon = Polygon([
+            (space['center'][1] - size/2, space['center'][0] - size/2),
+            (space['center'][1] + size/2, space['center'][0] - size/2),
+            (space['center'][1] + size/2, space['center'][0] + size/2),
+            (space['center'][1] - size/2, space['center'][0] + size/2),
+        ])
+        green_features.append({
+            'geometry': polygon,
+            'name': space['name'],
+            'type': space['type'],
+            'area_km2': space['area_km2']
+        })
+    
     # Convert to GeoDataFrames
     residential_gdf = gpd.GeoDataFrame(residential_features, crs="EPSG:4326")
     commercial_gdf = gpd.GeoDataFrame(commercial_features, crs="EPSG:4326")
     facilities_gdf = gpd.GeoDataFrame(facility_features, crs="EPSG:4326")
     roads_gdf = gpd.GeoDataFrame(road_features, crs="EPSG:4326")
+    green_space_gdf = gpd.GeoDataFrame(green_features, crs="EPSG:4326")
     
     return {
         'residential': residential_gdf,
         'commercial': commercial_gdf,
         'facilities': facilities_gdf,
-        'roads': roads_gdf
+        'roads': roads_gdf,
+        'green_space': green_space_gdf
     }
 
 def convert_to_geojson(gdf):
@@ -0,0 +1,77 @@
+import threading
+from functools import lru_cache
+from typing import Dict, Mapping
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from pyproj import CRS, Transformer
+
+WGS84_EPSG = 4326
+METRIC_EPSG = 32737  # UTM Zone 37S for Nairobi
+WEB_MERCATOR_EPSG = 3857
+
+
+@lru_cache(maxsize=64)
+def get_transformer(src_epsg: int, dst_epsg: int) -> Transformer:
+    """
+    Shared pyproj Transformer per CRS pair (construction is the expensive part)
+    """
+    return Transformer.from_crs(CRS.from_epsg(src_epsg), CRS.from_epsg(dst_epsg), always_xy=True)
+
+
+def project_layer(gdf: gpd.GeoDataFrame, epsg: int) -> gpd.GeoDataFrame:
+    """
+    Reproject a layer with a cached transformer; all coordinates of the layer
+    go through a single vectorized transform call
+    """
+    src_epsg = gdf.crs.to_epsg()
+    if src_epsg == epsg:
+        return gdf
+
+    transformer = get_transformer(src_epsg, epsg)
+    geoms = shapely.transform(np.asarray(gdf.geometry.values), transformer.transform, interleaved=False)
+    return gdf.set_geometry(gpd.GeoSeries(geoms, index=gdf.index, crs=f"EPSG:{epsg}"))
+
+
+class ProjectionCache:
+    """
+    Projected copies of a dataset's layers, keyed by (dataset version, layer,
+    EPSG code). The WGS84 source layers are served as-is, so every consumer
+    gets either the original or one shared reprojection.
+    """
+
+    def __init__(self, layers: Mapping[str, gpd.GeoDataFrame], version: str = None):
+        self.layers = layers
+        self.version = version
+        self._projected: Dict[tuple, gpd.GeoDataFrame] = {}
+        self._lock = threading.Lock()
+
+    def get(self, layer: str, epsg: int = METRIC_EPSG) -> gpd.GeoDataFrame:
+        source = self.layers[layer]
+        if source.crs is not None and source.crs.to_epsg() == epsg:
+            return source
+
+        key = (self.version, layer, epsg)
+        with self._lock:
+            projected = self._projected.get(key)
+        if projected is None:
+            projected = project_layer(source, epsg)
+            with self._lock:
+                projected = self._projected.setdefault(key, projected)
+        return projected
+
+    def metric(self, layer: str) -> gpd.GeoDataFrame:
+        return self.get(layer, METRIC_EPSG)
+
+    def wgs84(self, layer: str) -> gpd.GeoDataFrame:
+        return self.get(layer, WGS84_EPSG)
+
+
+def projections_for(data) -> ProjectionCache:
+    """
+    The dataset's shared projection cache, or a throwaway one for a plain
+    dict of layers
+    """
+    projections = getattr(data, 'projections', None)
+    return projections if projections is not None else ProjectionCache(data)
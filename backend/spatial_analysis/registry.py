@@ -0,0 +1,195 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Callable, Dict, Optional
+
+import geopandas as gpd
+import pandas as pd
+
+from spatial_analysis.nairobi_data import generate_nairobi_sample_data
+from spatial_analysis.projection import ProjectionCache
+
+
+def layer_fingerprint(gdf: gpd.GeoDataFrame) -> str:
+    """
+    Content hash of a single layer (geometry WKB + attribute values + CRS)
+    """
+    digest = hashlib.sha256()
+    digest.update(str(gdf.crs).encode())
+    digest.update(','.join(map(str, gdf.columns)).encode())
+
+    for wkb in gdf.geometry.to_wkb():
+        digest.update(wkb if wkb is not None else b'\x00')
+
+    attributes = gdf.drop(columns=gdf.geometry.name)
+    if not attributes.empty:
+        digest.update(pd.util.hash_pandas_object(attributes, index=True).values.tobytes())
+
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(layer_versions: Dict[str, str]) -> str:
+    """
+    Combine per-layer hashes into a short dataset version string
+    """
+    digest = hashlib.sha256()
+    for name in sorted(layer_versions):
+        digest.update(f"{name}={layer_versions[name]};".encode())
+    return digest.hexdigest()[:16]
+
+
+class CityDataset:
+    """
+    One build of a city's layers, identified by its content hash. The layers
+    are shared by every request and must be treated as read-only.
+    Anything derived from the layers (serialized GeoJSON, spatial indexes,
+    projected copies, ...) is memoized on the dataset itself via `derived`,
+    so it is dropped together with the build when the city is reloaded.
+    Values keyed by request parameters (a hexgrid cell size, isochrone
+    thresholds, ...) go in a bounded LRU instead (`bounded=True`), so
+    arbitrary parameters cannot grow a build without limit.
+    """
+
+    # Parameter-keyed values kept per build
+    max_variants = 32
+
+    def __init__(self, city_id: str, layers: Dict[str, gpd.GeoDataFrame]):
+        self.city_id = city_id
+        self.layers = MappingProxyType(dict(layers))
+        self.layer_versions = MappingProxyType({name: layer_fingerprint(gdf) for name, gdf in self.layers.items()})
+        self.version = dataset_fingerprint(self.layer_versions)
+        self.projections = ProjectionCache(self.layers, self.version)
+        self.built_at = datetime.now(timezone.utc)
+        self._derived = {}
+        self._variants = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, layer: str) -> gpd.GeoDataFrame:
+        return self.layers[layer]
+
+    def __contains__(self, layer: str) -> bool:
+        return layer in self.layers
+
+    def keys(self):
+        return self.layers.keys()
+
+    def derived(self, key, factory: Callable, bounded: bool = False):
+        """
+        Return a value computed from this build, computing it at most once
+        (while it stays among the `max_variants` most recently used, if bounded)
+        """
+        store = self._variants if bounded else self._derived
+        with self._lock:
+            if key in store:
+                if bounded:
+                    store.move_to_end(key)
+                return store[key]
+        value = factory()
+        with self._lock:
+            value = store.setdefault(key, value)
+            if bounded:
+                store.move_to_end(key)
+                while len(store) > self.max_variants:
+                    store.popitem(last=False)
+            return value
+
+    def info(self) -> Dict:
+        return {
+            'city': self.city_id,
+            'version': self.version,
+            'built_at': self.built_at.isoformat(),
+            'layers': {
+                name: {'features': len(gdf), 'version': self.layer_versions[name][:16]}
+                for name, gdf in self.layers.items()
+            }
+        }
+
+
+class DatasetRegistry:
+    """
+    Builds each city's layers once and hands the same read-only build to
+    every caller until the city is explicitly invalidated or reloaded
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Dict[str, gpd.GeoDataFrame]]] = {}
+        self._datasets: Dict[str, CityDataset] = {}
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, city_id: str, loader: Callable[[], Dict[str, gpd.GeoDataFrame]]):
+        """
+        Register (or replace) the loader that builds a city's layers
+        """
+        with self._lock:
+            self._loaders[city_id] = loader
+            self._build_locks.setdefault(city_id, threading.Lock())
+            self._datasets.pop(city_id, None)
+
+    def has_city(self, city_id: str) -> bool:
+        return city_id in self._loaders
+
+    def cities(self):
+        return list(self._loaders)
+
+    def get(self, city_id: str) -> CityDataset:
+        """
+        Return the current build for a city, building it on first use.
+        Raises KeyError for unknown cities.
+        """
+        dataset = self._datasets.get(city_id)
+        if dataset is not None:
+            return dataset
+
+        if city_id not in self._loaders:
+            raise KeyError(city_id)
+
+        # One build per city at a time; concurrent callers wait for it
+        with self._build_locks[city_id]:
+            dataset = self._datasets.get(city_id)
+            if dataset is None:
+                dataset = CityDataset(city_id, self._loaders[city_id]())
+                with self._lock:
+                    self._datasets[city_id] = dataset
+        return dataset
+
+    def peek(self, city_id: str) -> Optional[CityDataset]:
+        """
+        Current build for a city without triggering a build
+        """
+        return self._datasets.get(city_id)
+
+    def invalidate(self, city_id: str = None):
+        """
+        Drop the cached build for one city (or all cities); the next `get`
+        rebuilds from source
+        """
+        with self._lock:
+            if city_id is None:
+                self._datasets.clear()
+            else:
+                self._datasets.pop(city_id, None)
+
+    def reload(self, city_id: str) -> CityDataset:
+        """
+        Rebuild a city from source immediately. The version only changes if
+        the rebuilt layers actually differ.
+        """
+        if city_id not in self._loaders:
+            raise KeyError(city_id)
+
+        with self._build_locks[city_id]:
+            dataset = CityDataset(city_id, self._loaders[city_id]())
+            with self._lock:
+                current = self._datasets.get(city_id)
+                if current is not None and current.version == dataset.version:
+                    return current
+                self._datasets[city_id] = dataset
+        return dataset
+
+
+# Process-wide registry used by the API
+registry = DatasetRegistry()
+registry.register('nairobi', generate_nairobi_sample_data)
@@ -0,0 +1,289 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from shapely import STRtree
+from typing import Dict, Iterable, List
+
+from spatial_analysis.projection import METRIC_EPSG
+
+# Assumed travel speeds (km/h) by road type
+ROAD_SPEEDS_KMH = {'major_road': 40.0, 'street': 20.0}
+DEFAULT_SPEED_KMH = 25.0
+
+# Off-network legs (zone centroid / facility to the nearest road node) are walked
+WALK_SPEED_KMH = 5.0
+
+# Road vertices closer than this are merged into one graph node
+NODE_SNAP_M = 1.0
+
+# Grid resolution of isochrone polygons
+ISOCHRONE_CELL_M = 250.0
+
+
+def _minutes(distance_m: np.ndarray, speed_kmh) -> np.ndarray:
+    return distance_m / 1000 / speed_kmh * 60
+
+
+class RoadGraph:
+    """
+    Undirected road graph in CSR form built from a metric-CRS roads layer.
+    Nodes are road vertices and crossings (merged within NODE_SNAP_M), edge
+    weights are travel minutes at the road type's speed. The lines are noded
+    first: roads crossing mid-segment are joined at the crossing, as if they
+    shared a vertex there (grade separations are not modelled).
+    """
+
+    def __init__(self, roads_proj: gpd.GeoDataFrame):
+        geoms = np.asarray(roads_proj.geometry.values)
+        coords, line_idx = shapely.get_coordinates(geoms, return_index=True)
+
+        # Consecutive vertices of the same line form a segment
+        same_line = line_idx[1:] == line_idx[:-1]
+        seg_start, seg_end = coords[:-1][same_line], coords[1:][same_line]
+        seg_line = line_idx[:-1][same_line]
+        edge_start, edge_end, edge_seg = _node_segments(seg_start, seg_end)
+
+        keys = np.round(np.concatenate([edge_start, edge_end]) / NODE_SNAP_M).astype(np.int64)
+        unique_keys, node_of_point = np.unique(keys, axis=0, return_inverse=True)
+        node_of_point = node_of_point.ravel()
+        self.node_xy = unique_keys * NODE_SNAP_M
+        self.n_nodes = len(unique_keys)
+
+        u, v = node_of_point[:len(edge_start)], node_of_point[len(edge_start):]
+        lengths = np.hypot(*(edge_end - edge_start).T)
+        speeds = roads_proj['type'].map(ROAD_SPEEDS_KMH).fillna(DEFAULT_SPEED_KMH).to_numpy(dtype=float)
+        minutes = _minutes(lengths, speeds[seg_line[edge_seg]])
+
+        # Keep the fastest of parallel edges (csr_matrix would sum duplicates)
+        keep = u != v
+        u, v, minutes = u[keep], v[keep], minutes[keep]
+        a, b = np.minimum(u, v), np.maximum(u, v)
+        order = np.lexsort((minutes, b, a))
+        a, b, minutes = a[order], b[order], minutes[order]
+        first = np.ones(len(a), dtype=bool)
+        first[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+        self.edges = np.column_stack([a[first], b[first]])
+        self.edge_minutes = np.maximum(minutes[first], 1e-9)
+
+        self.total_length_km = float(lengths.sum() / 1000)
+        self.node_tree = STRtree(shapely.points(self.node_xy)) if self.n_nodes else None
+
+    def snap(self, xy: np.ndarray):
+        """
+        Nearest graph node and straight-line distance (m) for each point
+        """
+        nearest = self.node_tree.query_nearest(shapely.points(xy), return_distance=True, all_matches=False)
+        (point_idx, node_idx), distance = nearest
+        nodes = np.empty(len(xy), dtype=np.int64)
+        dist = np.empty(len(xy))
+        nodes[point_idx] = node_idx
+        dist[point_idx] = distance
+        return nodes, dist
+
+    def travel_time_field(self, source_xy: np.ndarray) -> np.ndarray:
+        """
+        Minutes from the nearest source to every node, in a single Dijkstra
+        run: all sources hang off one virtual super-source whose edge
+        weights are the walking time onto the network
+        """
+        times = np.full(self.n_nodes, np.inf)
+        if self.n_nodes == 0 or len(source_xy) == 0:
+            return times
+
+        source_nodes, access_m = self.snap(source_xy)
+
+        # Several sources may snap to one node; keep the shortest access leg
+        access = np.full(self.n_nodes, np.inf)
+        np.minimum.at(access, source_nodes, _minutes(access_m, WALK_SPEED_KMH))
+        entry_nodes = np.flatnonzero(np.isfinite(access))
+
+        super_source = self.n_nodes
+        rows = np.concatenate([self.edges[:, 0], np.full(len(entry_nodes), super_source)])
+        cols = np.concatenate([self.edges[:, 1], entry_nodes])
+        weights = np.concatenate([self.edge_minutes, np.maximum(access[entry_nodes], 1e-9)])
+        graph = csr_matrix((weights, (rows, cols)), shape=(self.n_nodes + 1, self.n_nodes + 1))
+
+        distances = dijkstra(graph, directed=False, indices=super_source)
+        return distances[:self.n_nodes]
+
+    def point_travel_times(self, xy: np.ndarray, node_times: np.ndarray) -> np.ndarray:
+        """
+        Minutes to reach each point: network time to its nearest node plus
+        the walk from there
+        """
+        if self.n_nodes == 0:
+            return np.full(len(xy), np.inf)
+        nodes, walk_m = self.snap(xy)
+        return node_times[nodes] + _minutes(walk_m, WALK_SPEED_KMH)
+
+    def isochrones(self, node_times: np.ndarray, thresholds: Iterable[float]) -> List:
+        """
+        One polygon per threshold covering the road corridors reachable
+        within that many minutes, rasterized to ISOCHRONE_CELL_M grid cells
+        """
+        edge_time = np.maximum(node_times[self.edges[:, 0]], node_times[self.edges[:, 1]])
+        segments = shapely.linestrings(np.stack([self.node_xy[self.edges[:, 0]], self.node_xy[self.edges[:, 1]]], axis=1))
+        samples, sample_edge = shapely.get_coordinates(shapely.segmentize(segments, ISOCHRONE_CELL_M), return_index=True)
+
+        polygons = []
+        for minutes in thresholds:
+            points = np.vstack([samples[edge_time[sample_edge] <= minutes], self.node_xy[node_times <= minutes]])
+            polygons.append(_cells_to_polygon(np.floor(points / ISOCHRONE_CELL_M).astype(np.int64), ISOCHRONE_CELL_M))
+        return polygons
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+
+def _node_segments(start: np.ndarray, end: np.ndarray):
+    """
+    Split straight segments at every point where another segment crosses or
+    ends on them (and at the ends of collinear overlaps). Intersections are
+    solved in closed form for all bounding-box candidate pairs at once.
+    Returns the pieces' start and end points and the segment each came from.
+    """
+    n = len(start)
+    if n == 0:
+        return start, end, np.zeros(0, dtype=np.int64)
+    segments = shapely.linestrings(np.stack([start, end], axis=1))
+    i, j = STRtree(segments).query(segments)
+    pair = i < j
+    i, j = i[pair], j[pair]
+
+    direction = end - start
+    length = np.hypot(*direction.T)
+    p, r, s = start[i], direction[i], direction[j]
+    qp = start[j] - p
+    denom = _cross(r, s)
+    parallel = np.abs(denom) <= 1e-12 * length[i] * length[j]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = _cross(qp, s) / denom
+        u = _cross(qp, r) / denom
+    eps = 1e-9
+    crossing = ~parallel & (t >= -eps) & (t <= 1 + eps) & (u >= -eps) & (u <= 1 + eps)
+    crossing &= ((t > eps) & (t < 1 - eps)) | ((u > eps) & (u < 1 - eps))  # not just a shared end
+    crossing_xy = p[crossing] + t[crossing, None] * r[crossing]
+
+    # Collinear overlaps: the ends of each segment split the other
+    collinear = parallel & (np.abs(_cross(qp, r)) <= 1e-6 * length[i])
+    ci, cj = i[collinear], j[collinear]
+
+    point_seg = np.concatenate([np.arange(n), i[crossing], j[crossing], ci, ci, cj, cj, np.arange(n)])
+    point_xy = np.concatenate([start, crossing_xy, crossing_xy, start[cj], end[cj], start[ci], end[ci], end])
+
+    # Order each segment's points by their position along it
+    position = np.einsum('ij,ij->i', point_xy - start[point_seg], direction[point_seg])
+    position /= np.maximum(length * length, 1e-12)[point_seg]
+    position[:n], position[-n:] = 0.0, 1.0
+    on_segment = (position >= 0) & (position <= 1)
+    point_seg, point_xy, position = point_seg[on_segment], point_xy[on_segment], position[on_segment]
+    order = np.lexsort((position, point_seg))
+    point_seg, point_xy = point_seg[order], point_xy[order]
+
+    piece = point_seg[1:] == point_seg[:-1]
+    return point_xy[:-1][piece], point_xy[1:][piece], point_seg[:-1][piece]
+
+
+def _cells_to_polygon(cells: np.ndarray, cell_size: float):
+    """
+    Outline of a set of grid cells. The raster boundary (cell sides between
+    filled and empty cells) is polygonized directly, which avoids unioning
+    one box per cell.
+    """
+    if len(cells) == 0:
+        return shapely.Polygon()
+
+    origin = cells.min(axis=0) - 1
+    ij = cells - origin
+    raster = np.zeros((ij[:, 1].max() + 2, ij[:, 0].max() + 2), dtype=bool)
+    raster[ij[:, 1], ij[:, 0]] = True
+
+    rows, cols = np.nonzero(raster[1:, :] != raster[:-1, :])
+    horizontal = np.stack([np.column_stack([cols, rows + 1]), np.column_stack([cols + 1, rows + 1])], axis=1)
+    rows, cols = np.nonzero(raster[:, 1:] != raster[:, :-1])
+    vertical = np.stack([np.column_stack([cols + 1, rows]), np.column_stack([cols + 1, rows + 1])], axis=1)
+
+    boundary = shapely.linestrings((np.concatenate([horizontal, vertical]) + origin) * cell_size)
+    faces = shapely.get_parts(shapely.polygonize(boundary))
+
+    # polygonize also returns the holes as faces; keep the filled ones
+    inside = np.floor(shapely.get_coordinates(shapely.point_on_surface(faces)) / cell_size).astype(np.int64) - origin
+    return shapely.multipolygons(faces[raster[inside[:, 1], inside[:, 0]]])
+
+
+def road_graph(dataset) -> RoadGraph:
+    """
+    Road graph of a dataset, built once per dataset version
+    """
+    return dataset.derived(('road_graph',), lambda: RoadGraph(dataset.projections.get('roads', METRIC_EPSG)))
+
+
+def facility_travel_times(dataset, facility_type: str) -> np.ndarray:
+    """
+    Travel-time field (minutes per graph node) to the nearest facility of a
+    type, cached per dataset version
+    """
+    def build():
+        facilities = dataset.projections.get('facilities', METRIC_EPSG)
+        selected = facilities[facilities['type'] == facility_type]
+        return road_graph(dataset).travel_time_field(shapely.get_coordinates(np.asarray(selected.geometry.values)))
+
+    return dataset.derived(('travel_time', facility_type), build)
+
+
+def network_accessibility(dataset, facility_type: str, thresholds=(15, 30, 60)) -> Dict:
+    """
+    Road-network travel time from every residential zone to its nearest
+    facility of a type, with population coverage at the given thresholds
+    """
+    graph = road_graph(dataset)
+    residential = dataset.projections.get('residential', METRIC_EPSG)
+    zone_xy = shapely.get_coordinates(np.asarray(residential.geometry.centroid.values))
+    minutes = graph.point_travel_times(zone_xy, facility_travel_times(dataset, facility_type))
+
+    population = residential['population'].to_numpy(dtype=float)
+    total_pop = population.sum()
+    reachable = np.isfinite(minutes)
+
+    coverage = {
+        f'within_{t}_min_pct': round(float(population[minutes <= t].sum() / total_pop * 100), 2) if total_pop > 0 else 0
+        for t in thresholds
+    }
+    reached_pop = population[reachable].sum()
+    mean_minutes = (minutes[reachable] * population[reachable]).sum() / reached_pop if reached_pop > 0 else None
+
+    zones = [
+        {'name': name, 'travel_minutes': round(float(m), 1) if np.isfinite(m) else None}
+        for name, m in zip(residential['name'].tolist(), minutes)
+    ]
+
+    return {
+        'facility_type': facility_type,
+        'graph': {'nodes': graph.n_nodes, 'edges': len(graph.edges), 'length_km': round(graph.total_length_km, 2)},
+        'summary': {
+            'population_weighted_minutes': round(float(mean_minutes), 1) if mean_minutes is not None else None,
+            'unreachable_zones': int((~reachable).sum()),
+            **coverage
+        },
+        'zones': zones
+    }
+
+
+def isochrone_layer(dataset, facility_type: str, thresholds) -> gpd.GeoDataFrame:
+    """
+    Isochrone polygons (WGS84) for a facility type, cached per dataset
+    version and threshold set (in the dataset's bounded LRU)
+    """
+    thresholds = tuple(sorted(thresholds))
+
+    def build():
+        graph = road_graph(dataset)
+        polygons = graph.isochrones(facility_travel_times(dataset, facility_type), thresholds)
+        layer = gpd.GeoDataFrame({'facility_type': facility_type, 'minutes': list(thresholds)},
+                                 geometry=polygons, crs=f"EPSG:{METRIC_EPSG}")
+        return layer.to_crs("EPSG:4326")
+
+    return dataset.derived(('isochrones', facility_type, thresholds), build, bounded=True)
@@ -0,0 +1,122 @@
+import gzip
+import re
+from typing import Dict, Iterable, Optional
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+# Layers served by the city data endpoint, in response order
+CITY_LAYERS = ('residential', 'commercial', 'facilities', 'roads', 'green_space')
+
+# Same coordinate precision the `geojson` package applied (~0.1 m)
+COORDINATE_PRECISION = 6
+
+
+def layer_to_geojson_bytes(gdf: gpd.GeoDataFrame) -> bytes:
+    """
+    Serialize a layer straight to UTF-8 GeoJSON bytes (single pass, no dict)
+    """
+    rounded = gdf.set_geometry(shapely.transform(
+        gdf.geometry.values, lambda coords: np.round(coords, COORDINATE_PRECISION)
+    ))
+    return rounded.to_json().encode('utf-8')
+
+
+def _compress(payload: bytes) -> bytes:
+    # mtime=0 keeps the compressed bytes stable for a given payload
+    return gzip.compress(payload, compresslevel=6, mtime=0)
+
+
+_ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed (or covered by
+    `*`) with a non-zero quality value
+    """
+    quality = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            quality[coding.lower()] = q
+    return quality.get('gzip', quality.get('x-gzip', quality.get('*', 0.0))) > 0
+
+
+def geojson_etag(version: str, compressed: bool) -> str:
+    """
+    Strong ETag of one representation of a cached GeoJSON payload: the gzip
+    and identity bytes differ, so they must not share a validator
+    """
+    return f'"{version}-gzip"' if compressed else f'"{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match evaluation: `*`, or any listed tag equal to `etag` under
+    weak comparison (W/ prefixes ignored)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in _ENTITY_TAG.findall(if_none_match)
+
+
+def cached_geojson(dataset, key: tuple, build, compressed: bool = False, bounded: bool = False) -> bytes:
+    """
+    GeoJSON bytes of a layer derived from a dataset build (`build()` returns
+    the GeoDataFrame), serialized once per dataset version and compressed
+    once, if requested; `bounded` for keys holding request parameters (see
+    CityDataset.derived)
+    """
+    if compressed:
+        return dataset.derived(key + ('gzip',),
+                               lambda: _compress(cached_geojson(dataset, key, build, bounded=bounded)), bounded)
+    return dataset.derived(key, lambda: layer_to_geojson_bytes(build()), bounded)
+
+
+def layer_geojson(dataset, layer: str, compressed: bool = False) -> bytes:
+    """
+    GeoJSON bytes for one layer of a dataset build
+    """
+    return cached_geojson(dataset, ('geojson', layer), lambda: dataset[layer], compressed)
+
+
+def splice_city_payload(city_id: str, layer_bytes: Dict[str, bytes]) -> bytes:
+    """
+    Assemble `{"city": ..., "layers": {...}}` from already-encoded layers
+    """
+    parts = [b'{"city": "', city_id.encode('utf-8'), b'", "layers": {']
+    for i, (layer, payload) in enumerate(layer_bytes.items()):
+        if i:
+            parts.append(b', ')
+        parts.extend([b'"', layer.encode('utf-8'), b'": ', payload])
+    parts.append(b'}}')
+    return b''.join(parts)
+
+
+def city_geojson(dataset, layers: Iterable[str] = CITY_LAYERS, compressed: bool = False) -> bytes:
+    """
+    Full `{"city": ..., "layers": {...}}` payload, assembled by splicing the
+    cached per-layer bytes together instead of re-encoding them
+    (layers missing from the dataset are left out)
+    """
+    layers = tuple(layer for layer in layers if layer in dataset)
+    if compressed:
+        return dataset.derived(('geojson', 'city', layers, 'gzip'),
+                               lambda: _compress(city_geojson(dataset, layers)))
+
+    def build():
+        return splice_city_payload(dataset.city_id, {layer: layer_geojson(dataset, layer) for layer in layers})
+
+    return dataset.derived(('geojson', 'city', layers), build)
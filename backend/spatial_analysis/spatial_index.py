@@ -0,0 +1,87 @@
+from typing import List, Optional, Sequence, Tuple
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+from shapely.geometry import box
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a 'minx,miny,maxx,maxy' query string. Raises ValueError.
+    """
+    parts = [float(v) for v in bbox.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox must be minx,miny,maxx,maxy")
+    minx, miny, maxx, maxy = parts
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox min must not exceed max")
+    return (minx, miny, maxx, maxy)
+
+
+def zoom_tolerance(zoom: int, tile_size: int = 256) -> float:
+    """
+    Size of one screen pixel in degrees at a web-map zoom level, used as the
+    default simplification tolerance for viewport queries
+    """
+    return 360.0 / (tile_size * 2 ** zoom)
+
+
+class LayerIndex:
+    """
+    STRtree over one layer's geometries, built once per dataset version.
+    Queries cost O(log n + k) for k matching features.
+    """
+
+    def __init__(self, gdf: gpd.GeoDataFrame):
+        self.gdf = gdf
+        self.geometries = np.asarray(gdf.geometry.values)
+        self.tree = STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def query_bbox(self, bbox: Sequence[float]) -> np.ndarray:
+        """
+        Positional indices (ascending) of features intersecting the bbox
+        """
+        return np.sort(self.tree.query(box(*bbox), predicate='intersects'))
+
+    def select(self, bbox: Optional[Sequence[float]] = None,
+               tolerance: Optional[float] = None,
+               fields: Optional[List[str]] = None) -> gpd.GeoDataFrame:
+        """
+        Features intersecting `bbox` (all if None), optionally simplified and
+        reduced to the requested attribute columns
+        """
+        positions = self.query_bbox(bbox) if bbox is not None else np.arange(len(self))
+
+        columns = [c for c in self.gdf.columns if c != self.gdf.geometry.name]
+        if fields is not None:
+            columns = [c for c in columns if c in fields]
+
+        geoms = self.geometries[positions]
+        if tolerance:
+            geoms = shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+        subset = self.gdf.iloc[positions][columns]
+        return gpd.GeoDataFrame(subset, geometry=geoms, crs=self.gdf.crs)
+
+
+def layer_index(dataset, layer: str) -> LayerIndex:
+    """
+    Spatial index for a dataset layer, built on first use per dataset version
+    """
+    return dataset.derived(('sindex', layer), lambda: LayerIndex(dataset[layer]))
+
+
+def query_layer(dataset, layer: str, bbox=None, zoom: int = None,
+                tolerance: float = None, fields: List[str] = None) -> gpd.GeoDataFrame:
+    """
+    Viewport query on a dataset layer. Without an explicit tolerance,
+    geometries are simplified to one pixel at `zoom` (if given).
+    """
+    if tolerance is None and zoom is not None:
+        tolerance = zoom_tolerance(zoom)
+    return layer_index(dataset, layer).select(bbox=bbox, tolerance=tolerance, fields=fields)
@@ -0,0 +1,135 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+from typing import Dict, Tuple
+
+# Same rough km -> degree conversion used for the Nairobi sample layers
+KM_PER_DEGREE = 111
+
+
+def _labels(prefix: str, n: int) -> np.ndarray:
+    return np.char.add(prefix, np.arange(n).astype(str))
+
+
+def generate_synthetic_city(n_zones: int = 1000,
+                            n_commercial: int = None,
+                            n_facilities: int = None,
+                            n_road_segments: int = None,
+                            n_green_spaces: int = None,
+                            seed: int = 0,
+                            center: Tuple[float, float] = (-1.2864, 36.8172),
+                            extent_km: float = None) -> Dict[str, gpd.GeoDataFrame]:
+    """
+    Generate a deterministic synthetic city with the same layer schema as
+    `generate_nairobi_sample_data`, for load and scale testing.
+    All geometries are built with vectorized Shapely 2 constructors.
+
+    Args:
+        n_zones: residential zones (tiled on a grid covering the extent)
+        n_commercial: commercial zones (default n_zones // 4)
+        n_facilities: hospitals and schools (default n_zones // 10)
+        n_road_segments: road segments on a street lattice (default 2 * n_zones)
+        n_green_spaces: parks / forests (default n_zones // 20)
+        seed: RNG seed; the same arguments always produce the same city
+        center: (lat, lon) of the city center
+        extent_km: side of the square study area (default grows with n_zones
+            so zone size stays around 0.5 km²)
+    """
+    rng = np.random.default_rng(seed)
+    n_commercial = n_zones // 4 if n_commercial is None else n_commercial
+    n_facilities = max(n_zones // 10, 2) if n_facilities is None else n_facilities
+    n_road_segments = 2 * n_zones if n_road_segments is None else n_road_segments
+    n_green_spaces = max(n_zones // 20, 1) if n_green_spaces is None else n_green_spaces
+    extent_km = np.sqrt(max(n_zones, 1) * 0.5) if extent_km is None else extent_km
+
+    center_lat, center_lon = center
+    half = extent_km / 2 / KM_PER_DEGREE
+    min_lon, min_lat = center_lon - half, center_lat - half
+    extent_deg = extent_km / KM_PER_DEGREE
+
+    # Residential: grid cells in random order, slightly inset so zones do not touch
+    side = int(np.ceil(np.sqrt(max(n_zones, 1))))
+    cell = extent_deg / side
+    cells = rng.permutation(side * side)[:n_zones]
+    col, row = cells % side, cells // side
+    inset = cell * rng.uniform(0.02, 0.15, n_zones)
+    res_geoms = shapely.box(min_lon + col * cell + inset, min_lat + row * cell + inset,
+                            min_lon + (col + 1) * cell - inset, min_lat + (row + 1) * cell - inset)
+    res_area = ((cell - 2 * inset) * KM_PER_DEGREE) ** 2
+    density = np.clip(rng.lognormal(np.log(10000), 0.8, n_zones), 1000, 60000).astype(np.int64)
+    residential = gpd.GeoDataFrame({
+        'name': _labels('Zone ', n_zones),
+        'type': 'residential',
+        'density': density,
+        'area_km2': res_area.round(3),
+        'population': (density * res_area).astype(np.int64)
+    }, geometry=res_geoms, crs="EPSG:4326")
+
+    # Commercial: square zones scattered over the extent
+    com_area = rng.uniform(0.2, 3.0, n_commercial)
+    com_size = np.sqrt(com_area) / KM_PER_DEGREE
+    com_x = min_lon + rng.uniform(0, extent_deg, n_commercial)
+    com_y = min_lat + rng.uniform(0, extent_deg, n_commercial)
+    commercial = gpd.GeoDataFrame({
+        'name': _labels('Commercial ', n_commercial),
+        'type': 'commercial',
+        'area_km2': com_area.round(3),
+        'businesses': rng.poisson(800, n_commercial)
+    }, geometry=shapely.box(com_x - com_size / 2, com_y - com_size / 2,
+                            com_x + com_size / 2, com_y + com_size / 2), crs="EPSG:4326")
+
+    # Facilities: ~30% hospitals, the rest schools
+    is_hospital = rng.random(n_facilities) < 0.3
+    capacity = np.where(is_hospital,
+                        rng.integers(50, 2000, n_facilities),
+                        rng.integers(200, 5000, n_facilities))
+    facilities = gpd.GeoDataFrame({
+        'name': _labels('Facility ', n_facilities),
+        'type': np.where(is_hospital, 'hospital', 'school'),
+        'capacity': capacity
+    }, geometry=shapely.points(min_lon + rng.uniform(0, extent_deg, n_facilities),
+                               min_lat + rng.uniform(0, extent_deg, n_facilities)),
+        crs="EPSG:4326")
+
+    # Roads: jittered street lattice; a random subset of its edges, every
+    # fifth lattice line is an arterial
+    k = int(np.ceil(np.sqrt(max(n_road_segments, 1) / 2))) + 1
+    step = extent_deg / (k - 1)
+    nodes_x = min_lon + np.arange(k)[None, :] * step + rng.normal(0, step * 0.1, (k, k))
+    nodes_y = min_lat + np.arange(k)[:, None] * step + rng.normal(0, step * 0.1, (k, k))
+    ii, jj = np.meshgrid(np.arange(k), np.arange(k), indexing='ij')
+    horizontal = np.stack([ii[:, :-1].ravel(), jj[:, :-1].ravel(), ii[:, :-1].ravel(), jj[:, 1:].ravel()], axis=1)
+    vertical = np.stack([ii[:-1, :].ravel(), jj[:-1, :].ravel(), ii[1:, :].ravel(), jj[:-1, :].ravel()], axis=1)
+    edges = np.concatenate([horizontal, vertical])
+    edges = edges[np.sort(rng.permutation(len(edges))[:n_road_segments])]
+    coords = np.stack([
+        np.stack([nodes_x[edges[:, 0], edges[:, 1]], nodes_y[edges[:, 0], edges[:, 1]]], axis=1),
+        np.stack([nodes_x[edges[:, 2], edges[:, 3]], nodes_y[edges[:, 2], edges[:, 3]]], axis=1)
+    ], axis=1)
+    is_horizontal = edges[:, 0] == edges[:, 2]
+    arterial = np.where(is_horizontal, edges[:, 0], edges[:, 1]) % 5 == 0
+    roads = gpd.GeoDataFrame({
+        'name': _labels('Road ', len(edges)),
+        'type': np.where(arterial, 'major_road', 'street')
+    }, geometry=shapely.linestrings(coords), crs="EPSG:4326")
+
+    # Green space: square parks, with the occasional large forest
+    is_forest = rng.random(n_green_spaces) < 0.1
+    green_area = np.where(is_forest, rng.uniform(2.0, 10.0, n_green_spaces), rng.uniform(0.02, 0.8, n_green_spaces))
+    green_size = np.sqrt(green_area) / KM_PER_DEGREE
+    green_x = min_lon + rng.uniform(0, extent_deg, n_green_spaces)
+    green_y = min_lat + rng.uniform(0, extent_deg, n_green_spaces)
+    green_space = gpd.GeoDataFrame({
+        'name': _labels('Park ', n_green_spaces),
+        'type': np.where(is_forest, 'forest', 'park'),
+        'area_km2': green_area.round(3)
+    }, geometry=shapely.box(green_x - green_size / 2, green_y - green_size / 2,
+                            green_x + green_size / 2, green_y + green_size / 2), crs="EPSG:4326")
+
+    return {
+        'residential': residential,
+        'commercial': commercial,
+        'facilities': facilities,
+        'roads': roads,
+        'green_space': green_space
+    }
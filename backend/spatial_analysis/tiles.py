@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import mapbox_vector_tile
+import numpy as np
+import shapely
+from shapely.geometry import box
+
+from spatial_analysis.projection import WEB_MERCATOR_EPSG
+
+# Web Mercator (EPSG:3857) half-width of the world in meters
+ORIGIN_SHIFT = 20037508.342789244
+
+# Tile grid resolution (MVT spec default)
+TILE_EXTENT = 4096
+
+# Clip tiles with a small margin so strokes do not show seams at tile edges
+TILE_BUFFER_PX = 64
+
+MAX_ZOOM = 22
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Web Mercator bounds (minx, miny, maxx, maxy) of an XYZ tile
+    """
+    span = 2 * ORIGIN_SHIFT / (2 ** z)
+    minx = -ORIGIN_SHIFT + x * span
+    maxy = ORIGIN_SHIFT - y * span
+    return (minx, maxy - span, minx + span, maxy)
+
+
+def simplify_tolerance(z: int) -> float:
+    """
+    Simplification tolerance in meters for a zoom level: one tile grid unit,
+    i.e. detail that would be quantized away anyway
+    """
+    return 2 * ORIGIN_SHIFT / (2 ** z) / TILE_EXTENT
+
+
+def mercator_layer(dataset, layer: str):
+    """
+    Web Mercator copy of a layer, projected once per dataset version
+    """
+    return dataset.projections.get(layer, WEB_MERCATOR_EPSG)
+
+
+def render_tile(dataset, layer: str, z: int, x: int, y: int) -> bytes:
+    """
+    Cut one Mapbox Vector Tile out of a dataset layer. Returns b'' for tiles
+    with no features.
+    """
+    gdf = mercator_layer(dataset, layer)
+    bounds = tile_bounds(z, x, y)
+    margin = (bounds[2] - bounds[0]) * TILE_BUFFER_PX / TILE_EXTENT
+    clip_box = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+    hits = gdf.sindex.query(box(*clip_box), predicate='intersects')
+    if len(hits) == 0:
+        return b''
+
+    subset = gdf.iloc[np.sort(hits)]
+    geoms = shapely.simplify(subset.geometry.values, simplify_tolerance(z), preserve_topology=True)
+    geoms = shapely.clip_by_rect(geoms, *clip_box)
+    keep = ~shapely.is_empty(geoms)
+    if not keep.any():
+        return b''
+
+    properties = subset.drop(columns=subset.geometry.name)[keep].to_dict('records')
+    features = [
+        {'geometry': geom, 'properties': {k: v for k, v in props.items() if v is not None}}
+        for geom, props in zip(geoms[keep], properties)
+    ]
+
+    return mapbox_vector_tile.encode(
+        [{'name': layer, 'features': features}],
+        default_options={
+            'quantize_bounds': bounds,
+            'extents': TILE_EXTENT,
+            'y_coord_down': False
+        }
+    )
+
+
+class TileCache:
+    """
+    Bounded in-memory LRU of encoded tiles. Keys include the dataset version,
+    so tiles of a superseded build simply age out.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 50000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._tiles: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is None:
+                self.misses += 1
+                return None
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+    def put(self, key: tuple, tile: bytes):
+        if len(tile) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._tiles[key] = tile
+            self._size += len(tile)
+            while self._tiles and (self._size > self.max_bytes or len(self._tiles) > self.max_entries):
+                _, evicted = self._tiles.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_or_render(self, dataset, layer: str, z: int, x: int, y: int) -> bytes:
+        key = (dataset.city_id, dataset.version, layer, z, x, y)
+        tile = self.get(key)
+        if tile is None:
+            tile = render_tile(dataset, layer, z, x, y)
+            self.put(key, tile)
+        return tile
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'tiles': len(self._tiles),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
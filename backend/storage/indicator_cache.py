@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from indicators.engine import INDICATOR_SET_VERSION
+from indicators.zone_table import decode_tables, encode_tables
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorCache:
+    """
+    Materialized indicator results in MongoDB, shared by all API workers.
+
+    One document per (city, dataset version, indicator-set version), stored
+    under a composite `_id` so a read is a single primary-key lookup. A TTL
+    index on `created_at` expires entries; a new dataset version or indicator
+    definition simply misses and is computed again.
+
+    MongoDB failures never fail a request: reads fall back to computing, and
+    failed writes are logged and skipped.
+    """
+
+    def __init__(self, db, collection: str = 'indicator_cache', ttl_seconds: int = 7 * 24 * 3600):
+        self.collection = db[collection]
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def cache_id(city_id: str, dataset_version: str) -> str:
+        return f"{city_id}:{dataset_version}:{INDICATOR_SET_VERSION}"
+
+    async def ensure_indexes(self):
+        await self.collection.create_index('created_at', expireAfterSeconds=self.ttl_seconds,
+                                           name='indicator_cache_ttl')
+        await self.collection.create_index([('city', 1), ('created_at', -1)], name='city_created_at')
+
+    async def get(self, city_id: str, dataset_version: str) -> Optional[Dict]:
+        try:
+            document = await self.collection.find_one({'_id': self.cache_id(city_id, dataset_version)},
+                                                      {'indicators': 1})
+        except PyMongoError as e:
+            self.errors += 1
+            logger.warning(f"Indicator cache read failed: {e}")
+            return None
+        if document is None:
+            return None
+        return decode_tables(document['indicators'])
+
+    async def put(self, city_id: str, dataset_version: str, indicators: Dict):
+        document = {
+            'city': city_id,
+            'dataset_version': dataset_version,
+            'indicator_set_version': INDICATOR_SET_VERSION,
+            'indicators': encode_tables(indicators),
+            'created_at': datetime.now(timezone.utc)
+        }
+        try:
+            await self.collection.replace_one({'_id': self.cache_id(city_id, dataset_version)}, document, upsert=True)
+        except PyMongoError as e:
+            self.errors += 1
+            logger.warning(f"Indicator cache write failed: {e}")
+
+    async def get_or_compute(self, city_id: str, dataset_version: str,
+                             compute: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, bool]:
+        """
+        Read-through: the cached result if present, else `await compute()`,
+        which is then stored. Returns (indicators, served_from_cache).
+        """
+        indicators = await self.get(city_id, dataset_version)
+        if indicators is not None:
+            self.hits += 1
+            return indicators, True
+
+        self.misses += 1
+        indicators = await compute()
+        await self.put(city_id, dataset_version, indicators)
+        return indicators, False
+
+    async def resolve(self, engine, data, compute: Callable[[], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """
+        Indicators for a dataset build from the first tier that has them:
+        the engine memo ('memo'), this cache ('cache', then primed into the
+        engine), or `await compute()` ('computed', written back here).
+        Returns (indicators, tier).
+        """
+        indicators = engine.cached(data)
+        if indicators is not None:
+            return indicators, 'memo'
+
+        indicators, from_cache = await self.get_or_compute(data.city_id, data.version, compute)
+        if from_cache:
+            engine.prime(data, indicators)
+            return indicators, 'cache'
+        return indicators, 'computed'
+
+    async def invalidate(self, city_id: str = None):
+        """
+        Drop cached results for a city (all versions), or everything
+        """
+        await self.collection.delete_many({} if city_id is None else {'city': city_id})
+
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'ttl_seconds': self.ttl_seconds,
+            'indicator_set_version': INDICATOR_SET_VERSION
+        }
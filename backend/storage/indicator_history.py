@@ -0,0 +1,142 @@
+import logging
+import re
+import numpy as np
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from indicators.engine import INDICATOR_SET_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Downsampling bucket units accepted by $dateTrunc
+HISTORY_BUCKETS = ('minute', 'hour', 'day', 'week', 'month', 'year')
+
+# Dotted path into a snapshot's values, e.g. "citywide.hospital.score_per_1000"
+_METRIC_PATH = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def snapshot_values(result):
+    """
+    Compact form of one indicator result: numeric summary fields only, with
+    nesting kept; zone tables, lists and labels are dropped
+    """
+    if isinstance(result, Mapping):
+        values = {}
+        for key, value in result.items():
+            compact = snapshot_values(value)
+            if compact is not None and compact != {}:
+                values[key] = compact
+        return values
+    if isinstance(result, np.generic):
+        result = result.item()
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, (int, float)):
+        return result
+    return None
+
+
+class IndicatorHistory:
+    """
+    Time series of indicator snapshots in MongoDB.
+
+    One small document per (city, indicator, run) holding only the numeric
+    summary values, indexed on (city, indicator, timestamp) so time-range
+    queries are index scans. Downsampling runs server-side in an aggregation
+    pipeline ($dateTrunc buckets), so only one row per bucket leaves MongoDB.
+    """
+
+    def __init__(self, db, collection: str = 'indicator_snapshots'):
+        self.collection = db[collection]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([('city', 1), ('indicator', 1), ('timestamp', 1)],
+                                           name='city_indicator_timestamp')
+        await self.collection.create_index([('city', 1), ('timestamp', 1)], name='city_timestamp')
+
+    async def record(self, city_id: str, dataset_version: str, indicators: Dict,
+                     source: str = 'dataset', timestamp: datetime = None):
+        """
+        Store one snapshot per indicator of a computation run. Failures are
+        logged, never raised.
+        """
+        timestamp = timestamp or datetime.now(timezone.utc)
+        documents = [
+            {
+                'city': city_id,
+                'indicator': name,
+                'timestamp': timestamp,
+                'dataset_version': dataset_version,
+                'indicator_set_version': INDICATOR_SET_VERSION,
+                'source': source,
+                'values': snapshot_values(result)
+            }
+            for name, result in indicators.items()
+        ]
+        if not documents:
+            return
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except PyMongoError as e:
+            logger.warning(f"Indicator snapshot write failed: {e}")
+
+    def pipeline(self, city_id: str, indicator: Optional[str] = None, metric: Optional[str] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 bucket: str = 'day', bin_size: int = 1, limit: int = 500) -> List[Dict]:
+        """
+        Aggregation pipeline for a downsampled time range. With `metric`
+        (a dotted path into the values), each bucket reports its mean, min,
+        max and last value; otherwise the last snapshot of each bucket.
+        """
+        if bucket not in HISTORY_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(HISTORY_BUCKETS)}")
+        if metric is not None and not _METRIC_PATH.match(metric):
+            raise ValueError("metric must be a dotted field path")
+
+        match = {'city': city_id}
+        if indicator is not None:
+            match['indicator'] = indicator
+        if start is not None or end is not None:
+            match['timestamp'] = {}
+            if start is not None:
+                match['timestamp']['$gte'] = start
+            if end is not None:
+                match['timestamp']['$lt'] = end
+
+        group = {
+            '_id': {
+                'indicator': '$indicator',
+                'bucket': {'$dateTrunc': {'date': '$timestamp', 'unit': bucket, 'binSize': bin_size}}
+            },
+            'count': {'$sum': 1},
+            'dataset_version': {'$last': '$dataset_version'}
+        }
+        if metric is not None:
+            field = f'$values.{metric}'
+            group.update({'mean': {'$avg': field}, 'min': {'$min': field},
+                          'max': {'$max': field}, 'last': {'$last': field}})
+        else:
+            group['values'] = {'$last': '$values'}
+
+        project = {'_id': 0, 'indicator': '$_id.indicator', 'timestamp': '$_id.bucket',
+                   'count': 1, 'dataset_version': 1}
+        project.update({key: 1 for key in group if key not in project and key != '_id'})
+
+        return [
+            {'$match': match},
+            {'$sort': {'timestamp': 1}},
+            {'$group': group},
+            {'$sort': {'_id.indicator': 1, '_id.bucket': 1}},
+            {'$limit': limit},
+            {'$project': project}
+        ]
+
+    async def query(self, city_id: str, **kwargs) -> List[Dict]:
+        """
+        Downsampled history (see `pipeline` for the arguments)
+        """
+        cursor = self.collection.aggregate(self.pipeline(city_id, **kwargs))
+        return await cursor.to_list(length=None)
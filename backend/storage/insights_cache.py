@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from ai_planner.prompts import PROMPT_VERSION, insights_key
+
+logger = logging.getLogger(__name__)
+
+
+class InsightsCache:
+    """
+    Two-tier cache of LLM planning insights, keyed by insights_key (hash of
+    the rendered indicator prompt, model and prompt version).
+
+    - memory: bounded LRU with per-entry expiry, served in microseconds
+    - MongoDB: shared by all API workers and restarts; a TTL index on
+      `created_at` expires entries, and reads also check the age since TTL
+      deletion is lazy
+
+    Only successful generations are stored (results carrying an `error`
+    are returned but never cached). Concurrent misses on the same key wait
+    for a single LLM call. MongoDB failures are logged and fall back to
+    generating.
+    """
+
+    def __init__(self, db=None, collection: str = 'insights_cache', max_entries: int = 256,
+                 ttl_seconds: int = 24 * 3600):
+        self.collection = db[collection] if db is not None else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def ensure_indexes(self):
+        if self.collection is not None:
+            await self.collection.create_index('created_at', expireAfterSeconds=self.ttl_seconds,
+                                               name='insights_cache_ttl')
+
+    def _memory_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, insights = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return insights
+
+    def _memory_put(self, key: str, insights: Dict, age_seconds: float = 0.0):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds - age_seconds, insights)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _db_get(self, key: str) -> Optional[Dict]:
+        if self.collection is None:
+            return None
+        try:
+            document = await self.collection.find_one({'_id': key}, {'insights': 1, 'created_at': 1})
+        except PyMongoError as e:
+            self.errors += 1
+            logger.warning(f"Insights cache read failed: {e}")
+            return None
+        if document is None:
+            return None
+
+        created_at = document['created_at']
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        age = (datetime.now(timezone.utc) - created_at).total_seconds()
+        if age >= self.ttl_seconds:
+            return None
+        self._memory_put(key, document['insights'], age)
+        return document['insights']
+
+    async def _db_put(self, key: str, model: str, insights: Dict):
+        if self.collection is None:
+            return
+        document = {
+            'model': model,
+            'prompt_version': PROMPT_VERSION,
+            'insights': insights,
+            'created_at': datetime.now(timezone.utc)
+        }
+        try:
+            await self.collection.replace_one({'_id': key}, document, upsert=True)
+        except PyMongoError as e:
+            self.errors += 1
+            logger.warning(f"Insights cache write failed: {e}")
+
+    async def get_or_generate(self, indicators: Dict, model: str,
+                              generate: Callable[[Dict, str], Awaitable[Dict]]) -> Tuple[Dict, bool]:
+        """
+        Cached insights for (indicators, model), else `await generate(indicators,
+        model)`. Returns (insights, served_from_cache); callers get their own copy.
+        """
+        key = insights_key(indicators, model)
+        if key is None:
+            return await generate(indicators, model), False
+
+        insights = self._memory_get(key)
+        if insights is not None:
+            self.memory_hits += 1
+            return deepcopy(insights), True
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            insights, cached = await asyncio.shield(pending)
+            return deepcopy(insights), cached
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            insights = await self._db_get(key)
+            if insights is not None:
+                self.db_hits += 1
+                result = (insights, True)
+            else:
+                self.misses += 1
+                insights = await generate(indicators, model)
+                if not insights.get('error'):
+                    self._memory_put(key, insights)
+                    await self._db_put(key, model, insights)
+                result = (insights, False)
+            future.set_result(result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: waiters re-raise it, no "never retrieved" warning
+            raise
+        finally:
+            del self._pending[key]
+        return deepcopy(result[0]), result[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'ttl_seconds': self.ttl_seconds,
+            'prompt_version': PROMPT_VERSION
+        }
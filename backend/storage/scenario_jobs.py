@@ -0,0 +1,124 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from indicators.zone_table import ZoneTable
+from common.hashing import canonical_hash
+from storage.indicator_history import snapshot_values
+
+JOB_KINDS = ('simulate', 'compare')
+
+
+def job_result(value):
+    """
+    BSON / JSON-safe form of a simulator result: projected indicators keep
+    only their numeric summaries (zone tables stay with /indicators, so a
+    compare over hundreds of scenarios fits one document), numpy values become
+    Python numbers and non-finite floats (an empty scenario's cost per
+    beneficiary) become None
+    """
+    if isinstance(value, dict):
+        return {
+            key: snapshot_values(item) if key == 'projected_indicators' else job_result(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [job_result(item) for item in value]
+    if isinstance(value, ZoneTable):
+        return value.to_records()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class ScenarioJobStore:
+    """
+    Scenario simulation jobs in MongoDB: status, progress and result.
+
+    A job's `_id` is derived from a canonical hash of its kind, city,
+    dataset version, indicator set version, simulator version and payload, so submitting the same
+    work twice (from any API worker) upserts onto the existing job instead of
+    queueing a duplicate. Failed jobs, and queued / running jobs whose owner
+    stopped updating them for `stale_seconds`, are requeued on resubmission.
+    A TTL index on `created_at` expires old jobs.
+    """
+
+    def __init__(self, db, collection: str = 'scenario_jobs', ttl_seconds: int = 7 * 24 * 3600,
+                 stale_seconds: int = 15 * 60):
+        self.collection = db[collection]
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+
+    @staticmethod
+    def job_id(kind: str, city_id: str, dataset_version: str, indicator_set_version: int,
+               simulator_version: int, payload) -> str:
+        return canonical_hash({
+            'kind': kind, 'city': city_id, 'dataset_version': dataset_version,
+            'indicator_set_version': indicator_set_version, 'simulator_version': simulator_version,
+            'payload': payload
+        })[:32]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index('created_at', expireAfterSeconds=self.ttl_seconds,
+                                           name='scenario_jobs_ttl')
+        await self.collection.create_index([('city', 1), ('created_at', -1)], name='city_created_at')
+
+    async def submit(self, kind: str, city_id: str, dataset_version: str, indicator_set_version: int,
+                     simulator_version: int, payload, total: int) -> Tuple[str, bool]:
+        """
+        Queue a job unless an identical one exists. Returns (job_id, created);
+        `created` is False when the submission was deduplicated.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"kind must be one of {', '.join(JOB_KINDS)}")
+        job_id = self.job_id(kind, city_id, dataset_version, indicator_set_version, simulator_version, payload)
+        now = datetime.now(timezone.utc)
+        queued = {'status': 'queued', 'progress': {'done': 0, 'total': total},
+                  'result': None, 'error': None, 'updated_at': now}
+
+        inserted = await self.collection.update_one(
+            {'_id': job_id},
+            {'$setOnInsert': {
+                'kind': kind, 'city': city_id, 'dataset_version': dataset_version,
+                'indicator_set_version': indicator_set_version, 'simulator_version': simulator_version,
+                'payload': payload, 'created_at': now, **queued
+            }},
+            upsert=True
+        )
+        if inserted.upserted_id is not None:
+            return job_id, True
+
+        # Retry failed or abandoned jobs; the status / updated_at guard makes
+        # the takeover atomic when several workers resubmit at once
+        stale = now - timedelta(seconds=self.stale_seconds)
+        requeued = await self.collection.update_one(
+            {'_id': job_id, '$or': [
+                {'status': 'failed'},
+                {'status': {'$in': ['queued', 'running']}, 'updated_at': {'$lt': stale}}
+            ]},
+            {'$set': queued}
+        )
+        return job_id, requeued.modified_count == 1
+
+    async def get(self, job_id: str, include_payload: bool = False) -> Optional[Dict]:
+        projection = None if include_payload else {'payload': 0}
+        return await self.collection.find_one({'_id': job_id}, projection)
+
+    async def _update(self, job_id: str, fields: Dict):
+        fields['updated_at'] = datetime.now(timezone.utc)
+        await self.collection.update_one({'_id': job_id}, {'$set': fields})
+
+    async def start(self, job_id: str):
+        await self._update(job_id, {'status': 'running'})
+
+    async def progress(self, job_id: str, done: int):
+        await self._update(job_id, {'progress.done': done})
+
+    async def complete(self, job_id: str, result: Dict):
+        await self._update(job_id, {'status': 'completed', 'result': job_result(result)})
+
+    async def fail(self, job_id: str, error: str):
+        await self._update(job_id, {'status': 'failed', 'error': error})
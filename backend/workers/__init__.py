@@ -0,0 +1 @@
+# Workers module
@@ -0,0 +1,161 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+
+class TaskTimeoutError(Exception):
+    """Raised when a pooled task does not finish within its timeout"""
+
+
+class _PoolMetrics:
+    """
+    Submission counters for one pool. Work that has been submitted but not
+    finished beyond the pool's worker count is reported as queued.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.submitted += 1
+
+    def finish(self, seconds: float, failed: bool = False, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timed_out += 1
+            elif failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            done = self.completed + self.failed + self.timed_out
+            in_flight = self.submitted - done
+            return {
+                'workers': self.workers,
+                'in_flight': in_flight,
+                'running': min(in_flight, self.workers),
+                'queue_depth': max(in_flight - self.workers, 0),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'avg_latency_ms': round(self.total_seconds / done * 1000, 2) if done else 0,
+                'max_latency_ms': round(self.max_seconds * 1000, 2)
+            }
+
+
+class WorkerPools:
+    """
+    Executors for CPU-bound work so request handlers never block the event loop:
+
+    - a process pool for heavy pure-Python work (PDF rendering, large
+      batch evaluations) that would otherwise hold the GIL
+    - a thread pool for GeoPandas / Shapely 2 work, which releases the GIL
+      and needs the in-process dataset and indicator caches
+
+    Pools are created lazily. A timed-out task is abandoned (its future
+    cancelled if it has not started) and the caller gets TaskTimeoutError.
+    """
+
+    def __init__(self, process_workers: int = None, thread_workers: int = None,
+                 default_timeout: float = 120.0):
+        cpus = os.cpu_count() or 2
+        self.process_workers = process_workers or min(4, cpus)
+        self.thread_workers = thread_workers or min(32, cpus + 4)
+        self.default_timeout = default_timeout
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._process_metrics = _PoolMetrics(self.process_workers)
+        self._thread_metrics = _PoolMetrics(self.thread_workers)
+
+    @classmethod
+    def from_env(cls) -> 'WorkerPools':
+        return cls(
+            process_workers=int(os.environ.get('WORKER_PROCESSES', '0')) or None,
+            thread_workers=int(os.environ.get('WORKER_THREADS', '0')) or None,
+            default_timeout=float(os.environ.get('TASK_TIMEOUT_SECONDS', '120'))
+        )
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                # spawn: forking a process that runs threads and an event loop is unsafe
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._process_pool
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.thread_workers, thread_name_prefix='urbanpulse-worker'
+                )
+            return self._thread_pool
+
+    async def _run(self, executor, metrics: _PoolMetrics, fn: Callable, args, kwargs, timeout):
+        timeout = self.default_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+        metrics.start()
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            metrics.finish(time.perf_counter() - started, timed_out=True)
+            raise TaskTimeoutError(f"{getattr(fn, '__name__', 'task')} exceeded {timeout}s")
+        except BaseException:
+            metrics.finish(time.perf_counter() - started, failed=True)
+            raise
+        metrics.finish(time.perf_counter() - started)
+        return result
+
+    async def run_in_process(self, fn: Callable, *args, timeout: float = None, **kwargs):
+        """
+        Run a picklable top-level function in the process pool
+        """
+        return await self._run(self.process_pool, self._process_metrics, fn, args, kwargs, timeout)
+
+    async def run_in_thread(self, fn: Callable, *args, timeout: float = None, **kwargs):
+        """
+        Run a function in the thread pool (for GIL-releasing or cache-bound work)
+        """
+        return await self._run(self.thread_pool, self._thread_metrics, fn, args, kwargs, timeout)
+
+    def metrics(self) -> Dict:
+        return {
+            'process_pool': {**self._process_metrics.snapshot(), 'started': self._process_pool is not None},
+            'thread_pool': {**self._thread_metrics.snapshot(), 'started': self._thread_pool is not None},
+            'default_timeout_seconds': self.default_timeout
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=False, cancel_futures=True)
+                self._thread_pool = None
@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from spatial_analysis.registry import CityDataset  # noqa: E402
+from spatial_analysis.synthetic_city import generate_synthetic_city  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def city():
+    """Small deterministic synthetic city (dataset build)"""
+    return CityDataset('test', generate_synthetic_city(200, seed=7))
+
+
+@pytest.fixture(scope='session')
+def indicators(city):
+    """Engine-computed indicators of the test city (zone tables kept columnar)"""
+    from indicators.engine import IndicatorEngine
+    return IndicatorEngine().compute(city)
+
+
+@pytest.fixture(scope='session')
+def mongo_url():
+    """URL of a local mongod for storage tests (TEST_MONGO_URL); skips when none answers"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    url = os.environ.get('TEST_MONGO_URL', 'mongodb://localhost:27017')
+    client = MongoClient(url, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"no mongod at {url}")
+    finally:
+        client.close()
+    return url
+
+
+@pytest.fixture
+def with_db(mongo_url):
+    """Run `await test(db)` on a throwaway database, dropped afterwards"""
+    import asyncio
+    import uuid
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    def run(test):
+        async def main():
+            client = AsyncIOMotorClient(mongo_url)
+            db = client[f"urbanpulse_test_{uuid.uuid4().hex[:12]}"]
+            try:
+                await test(db)
+            finally:
+                await client.drop_database(db.name)
+                client.close()
+        asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def random_intervention(city):
+    """
+    Factory of random interventions: every type (plus unknown / missing /
+    mixed-case types), int and float cost and capacity overrides, and with
+    located=True zone, coordinate and route locations
+    """
+    names = city['residential']['name'].tolist()
+    types = ['hospital', 'brt', 'park', 'school', 'road', 'Hospital', 'SCHOOL', 'tram', None]
+
+    def make(rng, located=False):
+        intervention = {}
+        kind = rng.choice(types)
+        if kind is not None:
+            intervention['type'] = kind
+        if rng.random() < 0.3:
+            intervention['cost'] = rng.choice([rng.randint(1, 10 ** 8), rng.uniform(1e5, 1e8)])
+        if rng.random() < 0.3:
+            intervention['capacity'] = rng.choice([rng.randint(0, 2000), rng.uniform(0, 2000)])
+        if located and rng.random() < 0.5:
+            where = rng.random()
+            if where < 0.5:
+                intervention['location'] = rng.choice(names)
+            elif where < 0.8:
+                intervention['route'] = rng.sample(names, 2)
+            else:
+                point = city['residential'].geometry.iloc[rng.randrange(len(names))].centroid
+                intervention['lon'], intervention['lat'] = point.x, point.y
+        return intervention
+    return make
@@ -0,0 +1,149 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import Point, Polygon
+
+from indicators.accessibility import (
+    count_within, facility_counts, gaussian_decay, two_step_floating_catchment, zone_accessibility_scores
+)
+from indicators.urban_metrics import calculate_capacity_accessibility, calculate_service_accessibility
+from spatial_analysis.projection import METRIC_EPSG
+
+
+def brute_force_counts(origins, targets, radius):
+    return np.array([int((shapely.distance(targets, origin) <= radius).sum()) for origin in origins])
+
+
+def record_path_score(residential_proj, facilities_proj, radius=5000):
+    """Per-zone loop the bulk query replaced"""
+    scores = []
+    for _, zone in residential_proj.iterrows():
+        centroid = zone.geometry.centroid
+        near = {ftype: int((facilities_proj[facilities_proj['type'] == ftype].distance(centroid) <= radius).sum())
+                for ftype in ('hospital', 'school')}
+        pop = zone['population']
+        hospital_ratio = near['hospital'] * 1000 / pop if pop > 0 else 0
+        school_ratio = near['school'] * 1000 / pop if pop > 0 else 0
+        scores.append((hospital_ratio * 0.6 + school_ratio * 0.4) * 100)
+    return round(min(np.mean(scores), 100), 2)
+
+
+def test_count_within_boundary_duplicates_and_chunks():
+    origins = shapely.points([(0, 0), (10, 0), (100, 100), (3, 4)])
+    # (3, 4) is exactly 5 from the origin: the radius is inclusive
+    targets = shapely.points([(3, 4), (3, 4), (8, 0), (15.0001, 0), (-5, 0)])
+    expected = [3, 1, 0, 2]
+    assert brute_force_counts(origins, targets, 5).tolist() == expected
+    assert count_within(origins, targets, 5).tolist() == expected
+    assert count_within(origins, targets, 5, chunk_size=3).tolist() == expected
+    assert count_within(origins, targets, 5, chunk_size=1).tolist() == expected
+
+
+def test_count_within_empty_inputs():
+    points = shapely.points([(0, 0), (1, 1)])
+    assert count_within(points, points[:0], 10).tolist() == [0, 0]
+    assert count_within(points[:0], points, 10).tolist() == []
+
+
+def test_facility_counts_match_brute_force(city):
+    residential = city.projections.get('residential', METRIC_EPSG)
+    facilities = city.projections.get('facilities', METRIC_EPSG)
+    centroids = np.asarray(residential.geometry.centroid.values)
+    counts = facility_counts(residential, facilities, 5000, ('hospital', 'school', 'stadium'))
+
+    for ftype in ('hospital', 'school'):
+        targets = np.asarray(facilities.geometry.values)[facilities['type'].to_numpy() == ftype]
+        assert counts[ftype].tolist() == brute_force_counts(centroids, targets, 5000).tolist()
+    # A type with no facilities counts zero everywhere
+    assert counts['stadium'].tolist() == [0] * len(residential)
+
+
+def test_service_accessibility_matches_record_path(city):
+    residential = city.projections.get('residential', METRIC_EPSG)
+    facilities = city.projections.get('facilities', METRIC_EPSG)
+    result = calculate_service_accessibility(city['facilities'], city['residential'], facilities, residential)
+    assert result['accessibility_score'] == record_path_score(residential, facilities)
+    # Projecting on the fly gives the same answer as the cached projections
+    assert calculate_service_accessibility(city['facilities'], city['residential']) == result
+
+
+def test_zero_population_zones_score_zero():
+    scores = zone_accessibility_scores(np.array([2, 2, 0]), np.array([1, 0, 5]), np.array([0, 1000, 500]))
+    np.testing.assert_allclose(scores, [0, 120, 400])
+
+    square = Polygon([(0, 0), (1000, 0), (1000, 1000), (0, 1000)])
+    residential = gpd.GeoDataFrame({'population': [0, 0]}, geometry=[square, square], crs=METRIC_EPSG)
+    facilities = gpd.GeoDataFrame({'type': ['hospital', 'school'], 'capacity': [100, 500]},
+                                  geometry=[Point(500, 500), Point(0, 0)], crs=METRIC_EPSG)
+    result = calculate_service_accessibility(facilities, residential, facilities, residential)
+    assert result['accessibility_score'] == 0
+    assert result['coverage'] == {'hospitals_per_100k': 0, 'schools_per_100k': 0}
+
+
+def test_empty_layers():
+    residential = gpd.GeoDataFrame({'population': []}, geometry=[], crs=METRIC_EPSG)
+    facilities = gpd.GeoDataFrame({'type': [], 'capacity': []}, geometry=[], crs=METRIC_EPSG)
+    assert calculate_service_accessibility(facilities, residential) == {'accessibility_score': 0, 'coverage': {}}
+    assert facility_counts(residential, facilities, 5000, ('hospital',))['hospital'].tolist() == []
+
+
+def brute_force_2sfca(zone_xy, population, facility_xy, supply, catchment):
+    """Dense zones x facilities 2SFCA"""
+    weight = gaussian_decay(np.hypot(*(zone_xy[:, None, :] - facility_xy[None, :, :]).transpose(2, 0, 1)), catchment)
+    demand = population @ weight
+    ratio = np.divide(supply, demand, out=np.zeros_like(supply), where=demand > 0)
+    return weight @ ratio
+
+
+def test_gaussian_decay_endpoints():
+    np.testing.assert_allclose(gaussian_decay(np.array([0, 1000, 1000.001, 5000]), 1000), [1, 0, 0, 0])
+    assert 0 < gaussian_decay(np.array([500.0]), 1000)[0] < 1
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 50000])
+def test_2sfca_matches_dense_reference(chunk_size):
+    rng = np.random.default_rng(4)
+    zone_xy = rng.uniform(0, 20000, (60, 2))
+    population = rng.integers(0, 5000, 60).astype(float)
+    population[:5] = 0
+    facility_xy = rng.uniform(0, 20000, (12, 2))
+    supply = rng.uniform(10, 500, 12)
+
+    got = two_step_floating_catchment(zone_xy, population, facility_xy, supply, 4000, chunk_size)
+    np.testing.assert_allclose(got, brute_force_2sfca(zone_xy, population, facility_xy, supply, 4000), rtol=1e-12)
+
+
+def test_2sfca_allocates_reachable_supply_only():
+    zone_xy = np.array([[0.0, 0.0], [1000.0, 0.0], [50000.0, 0.0]])
+    population = np.array([1000.0, 3000.0, 0.0])
+    # The second facility only reaches the unpopulated zone, the third nothing
+    facility_xy = np.array([[500.0, 0.0], [50000.0, 100.0], [90000.0, 0.0]])
+    supply = np.array([40.0, 70.0, 90.0])
+    access = two_step_floating_catchment(zone_xy, population, facility_xy, supply, 5000)
+
+    # Capacity shared by the population that can reach it, none invented
+    assert (access * population).sum() == pytest.approx(40)
+    assert access[0] == pytest.approx(access[1]) == pytest.approx(40 / 4000)
+    assert access[2] == 0 and np.isfinite(access).all()
+
+
+def test_2sfca_degenerate_inputs():
+    zone_xy = np.array([[0.0, 0.0], [100.0, 0.0]])
+    facility_xy = np.array([[0.0, 0.0]])
+    assert two_step_floating_catchment(zone_xy, np.zeros(2), facility_xy, np.array([10.0]), 5000).tolist() == [0, 0]
+    assert two_step_floating_catchment(zone_xy, np.ones(2), np.empty((0, 2)), np.empty(0), 5000).tolist() == [0, 0]
+    assert two_step_floating_catchment(np.empty((0, 2)), np.empty(0), facility_xy, np.array([10.0]), 5000).tolist() == []
+
+
+def test_capacity_accessibility_unpopulated_city():
+    square = Polygon([(0, 0), (1000, 0), (1000, 1000), (0, 1000)])
+    residential = gpd.GeoDataFrame({'name': ['A', 'B'], 'population': [0, 0]},
+                                   geometry=[square, square], crs=METRIC_EPSG)
+    facilities = gpd.GeoDataFrame({'type': ['hospital', 'school'], 'capacity': [100, 500]},
+                                  geometry=[Point(500, 500), Point(0, 0)], crs=METRIC_EPSG)
+    result = calculate_capacity_accessibility(facilities, residential, facilities, residential)
+    for ftype in ('hospital', 'school'):
+        assert result['citywide'][ftype] == {'score_per_1000': 0, 'median_zone_score': 0,
+                                             'zones_without_access': 2, 'population_without_access': 0}
+    assert [zone['hospital_score'] for zone in result['zones']] == [0, 0]
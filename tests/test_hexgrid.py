@@ -0,0 +1,115 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely import affinity
+from shapely.geometry import MultiPolygon, Point, Polygon
+
+from spatial_analysis.hexgrid import (
+    covering_lattice, hex_centers, hex_polygons, overlap_areas, point_to_hex, population_hexgrid, city_hexgrid
+)
+from spatial_analysis.projection import METRIC_EPSG
+from spatial_analysis.registry import CityDataset
+from spatial_analysis.synthetic_city import generate_synthetic_city
+
+OFFSET = (250000, 9850000)  # somewhere inside the metric CRS
+
+
+def layers(zones, populations, facilities=(), facility_types=()):
+    residential = gpd.GeoDataFrame({'population': populations},
+                                   geometry=[affinity.translate(z, *OFFSET) for z in zones],
+                                   crs=METRIC_EPSG)
+    points = gpd.GeoDataFrame({'type': list(facility_types)},
+                              geometry=[affinity.translate(p, *OFFSET) for p in facilities],
+                              crs=METRIC_EPSG)
+    return residential, points
+
+
+def test_city_cell_populations_sum_to_zone_totals(city):
+    residential = city.projections.get('residential', METRIC_EPSG)
+    total = residential['population'].sum()
+    for size in (150, 500, 2000):
+        grid = population_hexgrid(residential, city.projections.get('facilities', METRIC_EPSG), size)
+        assert grid['total_population'] == pytest.approx(total, abs=1)
+        # Per-cell values are rounded to whole people
+        assert abs(sum(grid['population']) - total) <= grid['cells'] / 2 + 1
+        assert all(len(grid[key]) == grid['cells'] for key in ('q', 'r', 'lon', 'lat', 'population', 'density'))
+        assert sum(map(sum, grid['facilities'].values())) == len(city['facilities'])
+
+
+def test_zone_split_by_area_and_empty_zones_dropped():
+    square = Polygon([(0, 0), (3000, 0), (3000, 3000), (0, 3000)])
+    empty = Polygon([(10000, 0), (11000, 0), (11000, 1000), (10000, 1000)])
+    # A concave L and a zone with a hole go through numpy and GEOS clipping
+    ell = Polygon([(5000, 0), (8000, 0), (8000, 1000), (6000, 1000), (6000, 3000), (5000, 3000)])
+    holed = Polygon([(0, 5000), (3000, 5000), (3000, 8000), (0, 8000)],
+                    [[(1000, 6000), (2000, 6000), (2000, 7000), (1000, 7000)]])
+    residential, facilities = layers([square, empty, ell, holed], [9000, 0, 5000, 8000],
+                                     [Point(10500, 500)], ['hospital'])
+    grid = population_hexgrid(residential, facilities, 400)
+
+    assert grid['total_population'] == 22000
+    # The empty zone only shows up through its facility's cell
+    x, y = hex_centers(np.array(grid['q']), np.array(grid['r']), 400)
+    far = x > OFFSET[0] + 9000
+    assert far.sum() == 1
+    assert np.array(grid['population'])[far].tolist() == [0]
+    assert np.array(grid['facilities']['hospital'])[far].tolist() == [1]
+
+
+def test_multipart_zone():
+    parts = MultiPolygon([Polygon([(0, 0), (1000, 0), (1000, 1000), (0, 1000)]),
+                          Polygon([(5000, 0), (6000, 0), (6000, 1000), (5000, 1000)])])
+    residential, facilities = layers([parts], [1000])
+    grid = population_hexgrid(residential, facilities, 300)
+    assert grid['total_population'] == 1000
+    assert grid['facilities'] == {}
+
+
+def test_overlap_areas_match_geos():
+    rng = np.random.default_rng(0)
+    zones = []
+    for _ in range(40):
+        # Star-shaped (often concave) rings; over 64 vertices goes through GEOS
+        n = rng.integers(3, 100)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+        radii = rng.uniform(200, 1500, n)
+        center = rng.uniform(-2000, 2000, 2)
+        zones.append(Polygon(np.column_stack([center[0] + radii * np.cos(angles),
+                                              center[1] + radii * np.sin(angles)])))
+    zones = np.array(zones, dtype=object)
+    q, r = covering_lattice(shapely.total_bounds(zones), 500)
+    cells = hex_polygons(q, r, 500)
+    zone_idx, cell_idx = shapely.STRtree(cells).query(zones, predicate='intersects')
+
+    got = overlap_areas(zones, zone_idx, q[cell_idx], r[cell_idx], 500)
+    want = shapely.area(shapely.intersection(zones[zone_idx], cells[cell_idx]))
+    np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-6)
+    # Shares of each zone add back up to its area
+    np.testing.assert_allclose(np.bincount(zone_idx, weights=got, minlength=len(zones)), shapely.area(zones))
+
+
+def test_point_to_hex_inverts_centers():
+    q, r = np.meshgrid(np.arange(-20, 20), np.arange(-20, 20))
+    q, r = q.ravel(), r.ravel()
+    x, y = hex_centers(q, r, 250)
+    rng = np.random.default_rng(1)
+    # Anywhere inside the inscribed circle maps back to the same cell
+    angle, radius = rng.uniform(0, 2 * np.pi, len(q)), rng.uniform(0, 250 * np.sqrt(3) / 2 * 0.999, len(q))
+    got_q, got_r = point_to_hex(x + radius * np.cos(angle), y + radius * np.sin(angle), 250)
+    assert (got_q == q).all() and (got_r == r).all()
+
+
+def test_too_many_cells_rejected():
+    with pytest.raises(ValueError):
+        covering_lattice((0, 0, 1e6, 1e6), 100)
+
+
+def test_city_hexgrid_cache_is_bounded():
+    dataset = CityDataset('hex', generate_synthetic_city(20, seed=3))
+    first = city_hexgrid(dataset, 1000)
+    assert city_hexgrid(dataset, 1000.0) is first
+    for size in range(1001, 1001 + dataset.max_variants):
+        city_hexgrid(dataset, size)
+    assert len(dataset._variants) == dataset.max_variants
+    assert city_hexgrid(dataset, 1000) is not first
@@ -0,0 +1,72 @@
+import asyncio
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from indicators.engine import IndicatorEngine
+from indicators.zone_table import ZoneTable, decode_tables, encode_tables, iter_tables, shape_tables
+from storage.indicator_cache import IndicatorCache
+
+
+def counting_compute(engine, data, calls):
+    async def compute():
+        calls.append(1)
+        return engine.compute(data)
+    return compute
+
+
+def test_encode_decode_round_trip(indicators):
+    document = bson.decode(bson.encode({'indicators': encode_tables(indicators)}))['indicators']
+    decoded = decode_tables(document)
+    assert shape_tables(decoded) == shape_tables(indicators)
+    assert shape_tables(decoded, layout='columns') == shape_tables(indicators, layout='columns')
+    tables = list(iter_tables(decoded))
+    assert tables and all(isinstance(table, ZoneTable) for table in tables)
+    assert decoded['population_density']['zones'][0] == indicators['population_density']['zones'][0]
+
+
+def test_three_tiers(with_db, city):
+    async def test(db):
+        cache = IndicatorCache(db)
+        await cache.ensure_indexes()
+        engine, calls = IndicatorEngine(), []
+
+        computed, tier = await cache.resolve(engine, city, counting_compute(engine, city, calls))
+        assert tier == 'computed' and len(calls) == 1
+        stored = await db['indicator_cache'].find_one({'_id': cache.cache_id(city.city_id, city.version)})
+        assert stored['dataset_version'] == city.version
+
+        memo, tier = await cache.resolve(engine, city, counting_compute(engine, city, calls))
+        assert tier == 'memo' and len(calls) == 1
+        assert memo['population_density'] is computed['population_density']
+
+        cold = IndicatorEngine()
+        cached, tier = await cache.resolve(cold, city, counting_compute(cold, city, calls))
+        assert tier == 'cache' and len(calls) == 1
+        assert shape_tables(cached) == shape_tables(computed)
+        assert cold.cached(city) is not None
+        assert (cache.hits, cache.misses, cache.errors) == (1, 1, 0)
+    with_db(test)
+
+
+def test_new_dataset_version_misses(with_db, city):
+    async def test(db):
+        cache = IndicatorCache(db)
+        indicators = IndicatorEngine().compute(city)
+        await cache.put(city.city_id, city.version, indicators)
+        assert await cache.get(city.city_id, 'other-version') is None
+        assert shape_tables(await cache.get(city.city_id, city.version)) == shape_tables(indicators)
+    with_db(test)
+
+
+def test_falls_back_when_mongo_fails(city):
+    async def test():
+        client = AsyncIOMotorClient('mongodb://127.0.0.1:1', serverSelectionTimeoutMS=100)
+        cache = IndicatorCache(client['unreachable'])
+        engine, calls = IndicatorEngine(), []
+        indicators, tier = await cache.resolve(engine, city, counting_compute(engine, city, calls))
+        client.close()
+        assert tier == 'computed' and len(calls) == 1
+        assert cache.errors == 2  # failed read and write-back, both logged
+        assert shape_tables(indicators) == shape_tables(engine.compute(city))
+    asyncio.run(test())
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from indicators.engine import INDICATOR_SET_VERSION
+from storage.indicator_history import IndicatorHistory, snapshot_values
+
+T0 = datetime(2026, 3, 1, 9, 30, tzinfo=timezone.utc)
+EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)  # $dateTrunc bin alignment
+
+
+def test_snapshot_values_keeps_numeric_summaries_only():
+    result = {
+        'accessibility_score': np.float64(41.5),
+        'total_hospitals': np.int64(3),
+        'flag': True,
+        'np_flag': np.bool_(False),
+        'method': '2SFCA',
+        'zones': [{'name': 'A', 'score': 1}],
+        'citywide': {'hospital': {'score_per_1000': 0.25, 'label': 'low'}, 'school': {'label': 'x'}},
+        'coverage': {}
+    }
+    values = snapshot_values(result)
+    assert values == {'accessibility_score': 41.5, 'total_hospitals': 3,
+                      'citywide': {'hospital': {'score_per_1000': 0.25}}}
+    assert type(values['accessibility_score']) is float and type(values['total_hospitals']) is int
+    assert snapshot_values({}) == {} and snapshot_values('text') is None
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'bucket': 'fortnight'},
+    {'metric': '$where'},
+    {'metric': 'a..b'},
+    {'metric': 'values.1st'},
+    {'metric': ''},
+])
+def test_pipeline_rejects_bad_arguments(kwargs):
+    with pytest.raises(ValueError):
+        IndicatorHistory({'indicator_snapshots': None}).pipeline('nairobi', **kwargs)
+
+
+def test_pipeline_time_range_is_half_open():
+    history = IndicatorHistory({'indicator_snapshots': None})
+    match = history.pipeline('nairobi', start=T0)[0]['$match']
+    assert match == {'city': 'nairobi', 'timestamp': {'$gte': T0}}
+    match = history.pipeline('nairobi', 'land_use', end=T0)[0]['$match']
+    assert match == {'city': 'nairobi', 'indicator': 'land_use', 'timestamp': {'$lt': T0}}
+    assert 'timestamp' not in history.pipeline('nairobi')[0]['$match']
+
+
+def reference_buckets(snapshots, hours):
+    """Group (timestamp, value-or-None) pairs into `hours`-hour bins in Python"""
+    buckets = {}
+    for timestamp, value in sorted(snapshots):
+        start = EPOCH + (timestamp - EPOCH) // timedelta(hours=hours) * timedelta(hours=hours)
+        buckets.setdefault(start, []).append(value)
+    rows = []
+    for start, values in sorted(buckets.items()):
+        present = [v for v in values if v is not None]
+        rows.append({'timestamp': start.replace(tzinfo=None), 'count': len(values),
+                     'mean': sum(present) / len(present) if present else None,
+                     'min': min(present, default=None), 'max': max(present, default=None),
+                     'last': values[-1]})
+    return rows
+
+
+def test_metric_buckets_match_reference(with_db):
+    # Every 25 minutes over ten hours; some runs (never a bucket's last) lack the metric
+    snapshots = [(T0 + timedelta(minutes=25 * i), None if i in (3, 9, 16) else float(i % 5))
+                 for i in range(24)]
+
+    async def test(db):
+        history = IndicatorHistory(db)
+        await history.ensure_indexes()
+        # Insert out of order; another city and indicator must not leak in
+        for timestamp, value in reversed(snapshots):
+            values = {'citywide': {'score': value}} if value is not None else {'method': 'n/a'}
+            await history.record('nairobi', 'v1', {'access': values, 'land_use': {'score': 99}},
+                                 timestamp=timestamp)
+        await history.record('mombasa', 'v1', {'access': {'citywide': {'score': 99}}}, timestamp=T0)
+
+        rows = await history.query('nairobi', indicator='access', metric='citywide.score',
+                                   bucket='hour', bin_size=2)
+        expected = reference_buckets(snapshots, 2)
+        assert all(row['last'] is not None for row in expected)
+        assert [{key: row.get(key) for key in expected[0]} for row in rows] == expected
+        assert {row['indicator'] for row in rows} == {'access'}
+
+        # Bounds: start inclusive, end exclusive, and the row limit
+        start, end = snapshots[2][0], snapshots[10][0]
+        rows = await history.query('nairobi', indicator='access', start=start, end=end, bucket='minute')
+        assert [row['timestamp'] for row in rows] == [t.replace(tzinfo=None) for t, _ in snapshots[2:10]]
+        assert len(await history.query('nairobi', bucket='minute', limit=5)) == 5
+
+        stored = await db['indicator_snapshots'].find_one({'city': 'mombasa'})
+        assert stored['indicator_set_version'] == INDICATOR_SET_VERSION
+    with_db(test)
+
+
+def test_without_metric_each_bucket_keeps_its_last_snapshot(with_db):
+    async def test(db):
+        history = IndicatorHistory(db)
+        for day, score in ((0, 1), (0, 2), (1, 3), (3, 4)):
+            await history.record('nairobi', f'v{score}', {'access': {'score': score}},
+                                 timestamp=T0 + timedelta(days=day, hours=score))
+        rows = await history.query('nairobi', bucket='day')
+        assert [(row['values'], row['count'], row['dataset_version']) for row in rows] == [
+            ({'score': 2}, 2, 'v2'), ({'score': 3}, 1, 'v3'), ({'score': 4}, 1, 'v4')
+        ]
+        assert rows[0]['timestamp'] == datetime(2026, 3, 1)
+    with_db(test)
@@ -0,0 +1,132 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from ai_planner import prompts
+from ai_planner.prompts import insights_key
+from storage.insights_cache import InsightsCache
+
+INDICATORS = {'population_density': {'total_population': 1000, 'avg_density': 5.0,
+                                     'zones': [{'name': 'Kibera', 'density': 300}]}}
+
+
+def llm(calls, gate=None, result=None):
+    """Stand-in generate(): counts calls, optionally waits for `gate`"""
+    async def generate(indicators, model):
+        calls.append(model)
+        if gate is not None:
+            await gate.wait()
+        if isinstance(result, Exception):
+            raise result
+        return dict(result or {'issues': [{'title': 'density'}], 'recommendations': [], 'model_used': model})
+    return generate
+
+
+def test_concurrent_identical_requests_share_one_call():
+    async def main():
+        cache, calls, gate = InsightsCache(), [], asyncio.Event()
+        tasks = [asyncio.create_task(cache.get_or_generate(INDICATORS, 'gpt', llm(calls, gate))) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert len(cache._pending) == 1
+        gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == ['gpt']
+        assert [cached for _, cached in results] == [False] * 5
+        assert all(insights == results[0][0] for insights, _ in results)
+        # Everyone gets their own copy
+        results[0][0]['issues'].clear()
+        assert results[1][0]['issues'] == [{'title': 'density'}]
+        assert not cache._pending
+
+        insights, cached = await cache.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert cached and insights['issues'] == [{'title': 'density'}] and calls == ['gpt']
+        assert (cache.memory_hits, cache.misses) == (1, 1)
+    asyncio.run(main())
+
+
+def test_failures_are_not_cached():
+    async def main():
+        cache, calls, gate = InsightsCache(), [], asyncio.Event()
+        failed = {'error': 'rate limited', 'issues': [], 'recommendations': []}
+        assert await cache.get_or_generate(INDICATORS, 'gpt', llm(calls, result=failed)) == (failed, False)
+        assert cache.stats()['entries'] == 0
+
+        # A raising call propagates to every waiter and leaves nothing pending
+        down = llm(calls, gate, RuntimeError('down'))
+        tasks = [asyncio.create_task(cache.get_or_generate(INDICATORS, 'gpt', down)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not cache._pending and len(calls) == 2
+
+        insights, cached = await cache.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert not cached and len(calls) == 3
+    asyncio.run(main())
+
+
+def test_prompt_version_model_and_indicators_change_the_key(monkeypatch):
+    async def main(calls):
+        cache = InsightsCache()
+        await cache.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        await cache.get_or_generate(INDICATORS, 'claude', llm(calls))
+        changed = {'population_density': {**INDICATORS['population_density'], 'total_population': 1001}}
+        await cache.get_or_generate(changed, 'gpt', llm(calls))
+        assert len(calls) == 3
+
+        key = insights_key(INDICATORS, 'gpt')
+        monkeypatch.setattr(prompts, 'PROMPT_VERSION', prompts.PROMPT_VERSION + 1)
+        assert insights_key(INDICATORS, 'gpt') != key
+        _, cached = await cache.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert not cached and len(calls) == 4
+
+    asyncio.run(main([]))
+
+
+def test_unpromptable_indicators_and_expiry_bypass_the_cache():
+    async def main():
+        calls = []
+        malformed = {'population_density': {'zones': [{}]}}
+        assert insights_key(malformed, 'gpt') is None
+        cache = InsightsCache()
+        for _ in range(2):
+            assert not (await cache.get_or_generate(malformed, 'gpt', llm(calls)))[1]
+        assert len(calls) == 2 and cache.stats()['entries'] == 0
+
+        expired = InsightsCache(ttl_seconds=0)
+        for _ in range(2):
+            assert not (await expired.get_or_generate(INDICATORS, 'gpt', llm(calls)))[1]
+        assert len(calls) == 4
+    asyncio.run(main())
+
+
+def test_mongodb_tier_is_shared(with_db):
+    async def test(db):
+        calls = []
+        await InsightsCache(db).get_or_generate(INDICATORS, 'gpt', llm(calls))
+        warm = InsightsCache(db)
+        insights, cached = await warm.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert cached and warm.db_hits == 1 and len(calls) == 1
+        stored = await db['insights_cache'].find_one({'_id': insights_key(INDICATORS, 'gpt')})
+        assert stored['prompt_version'] == prompts.PROMPT_VERSION and stored['insights'] == insights
+
+        # Documents older than the TTL are ignored even before MongoDB deletes them
+        await db['insights_cache'].update_many({}, {'$set': {
+            'created_at': datetime.now(timezone.utc) - timedelta(days=2)
+        }})
+        _, cached = await InsightsCache(db).get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert not cached and len(calls) == 2
+    with_db(test)
+
+
+def test_unreachable_mongodb_falls_back_to_generating():
+    async def main():
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient('mongodb://localhost:1', serverSelectionTimeoutMS=100)
+        cache, calls = InsightsCache(client['unreachable']), []
+        insights, cached = await cache.get_or_generate(INDICATORS, 'gpt', llm(calls))
+        assert not cached and insights['model_used'] == 'gpt' and cache.errors == 2
+        # ... and still serves the result from memory
+        assert (await cache.get_or_generate(INDICATORS, 'gpt', llm(calls)))[1]
+        client.close()
+    asyncio.run(main())
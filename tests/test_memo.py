@@ -0,0 +1,124 @@
+import math
+import random
+from fractions import Fraction
+
+import pytest
+
+from scenario.memo import ScenarioMemo
+from scenario.simulator import ScenarioSimulator
+from scenario.spatial_impact import spatial_impact_model
+
+SUMS = ('total_cost_usd', 'people_benefited', 'accessibility_gain', 'equity_impact_score')
+
+
+def assert_close_metrics(got, want, rel):
+    """Same keys and types, ints and strings exact, floats within `rel`"""
+    assert list(got) == list(want)
+    for key in want:
+        assert type(got[key]) is type(want[key]), key
+        if isinstance(want[key], float) and not math.isinf(want[key]):
+            assert got[key] == pytest.approx(want[key], rel=rel, abs=0), key
+        else:
+            assert got[key] == want[key], key
+
+
+def exact_sums(simulator, interventions):
+    """Every sum of the effects, added exactly and rounded once"""
+    effects = [simulator._simulate_intervention(intervention) for intervention in interventions]
+    totals = {}
+    for name, column in zip(SUMS, (0, 1, 2, 4)):
+        values = [effect[column] for effect in effects]
+        if all(isinstance(v, int) for v in values):
+            totals[name] = sum(values)
+        else:
+            totals[name] = float(sum(map(Fraction, values)))
+    return totals
+
+
+def simulated_metrics(simulator, interventions):
+    return simulator.simulate_scenario({'name': 'edited', 'description': '', 'interventions': interventions})['metrics']
+
+
+def random_edits(simulator, make, steps, located, seed):
+    """
+    Random add / remove edits, each made on the key of the previous result;
+    yields (memo result, intervention list it stands for)
+    """
+    rng = random.Random(seed)
+    memo = ScenarioMemo()
+    current = [make(rng, located) for _ in range(rng.randint(0, 5))]
+    result = memo.edit(simulator, 'v1', interventions=current)
+    yield result, current
+    for _ in range(steps):
+        add = [make(rng, located) for _ in range(rng.randint(0, 2))] if len(current) < 12 else []
+        remove = rng.sample(current, rng.randint(0, min(2, len(current))))
+        # Re-adding a removed intervention lands on a cached key
+        if remove and rng.random() < 0.1:
+            add.append(dict(remove[0]))
+        result = memo.edit(simulator, 'v1', result['key'], add=add, remove=remove)
+        current = list(current)
+        for intervention in remove:
+            current.remove(intervention)
+        current += add
+        yield result, current
+
+
+def test_edit_sequence_matches_simulate_scenario(indicators, random_intervention):
+    simulator = ScenarioSimulator(indicators)
+    for result, current in random_edits(simulator, random_intervention, 2000, located=False, seed=3):
+        totals = result['aggregate'].totals(simulator)
+        # Memo float totals are the exactly rounded sums ...
+        exact = exact_sums(simulator, current)
+        assert {name: totals[name] for name in SUMS} == exact
+        assert [type(totals[name]) for name in SUMS] == [type(exact[name]) for name in SUMS]
+        # ... within the float rounding of simulate_scenario's left-to-right sums
+        rel = max(len(current), 2) * 2 ** -53
+        assert_close_metrics(simulator.metrics(totals),
+                             simulated_metrics(simulator, current), rel)
+
+
+def test_edit_sequence_matches_simulate_scenario_with_zone_model(city, indicators, random_intervention):
+    simulator = ScenarioSimulator(indicators, spatial=spatial_impact_model(city))
+    edits = list(random_edits(simulator, random_intervention, 500, located=True, seed=4))
+    assert any(result['aggregate'].located for result, _ in edits)
+    for result, current in edits:
+        assert_close_metrics(simulator.metrics(result['aggregate'].totals(simulator)),
+                             simulated_metrics(simulator, current), 1e-9)
+
+
+def test_totals_do_not_depend_on_edit_order(city, indicators, random_intervention):
+    simulator = ScenarioSimulator(indicators, spatial=spatial_impact_model(city))
+    rng = random.Random(5)
+    for located in (False, True):
+        interventions = [random_intervention(rng, located) for _ in range(10)]
+        memo = ScenarioMemo()
+        forward = memo.edit(simulator, 'v1', interventions=[], add=interventions)
+        shuffled = ScenarioMemo().edit(simulator, 'v1', interventions=[],
+                                       add=rng.sample(interventions, len(interventions)))
+        assert forward['key'] == shuffled['key']
+        assert forward['aggregate'].totals(simulator) == shuffled['aggregate'].totals(simulator)
+
+
+def test_edit_errors(indicators):
+    simulator = ScenarioSimulator(indicators)
+    memo = ScenarioMemo()
+    with pytest.raises(KeyError):
+        memo.edit(simulator, 'v1', base_key='ab' * 32, add=[{'type': 'park'}])
+    base = memo.edit(simulator, 'v1', interventions=[{'type': 'park'}])
+    with pytest.raises(ValueError):
+        memo.edit(simulator, 'v1', base['key'], remove=[{'type': 'park'}, {'type': 'park'}])
+    with pytest.raises(ValueError):
+        memo.edit(simulator, 'v1', base['key'], remove=[{'type': 'school'}])
+
+
+def test_null_and_missing_types_count_as_unknown(indicators):
+    simulator = ScenarioSimulator(indicators)
+    memo = ScenarioMemo()
+    base = memo.edit(simulator, 'v1', interventions=[{'type': None}, {'type': 'Park'}])
+    totals = base['aggregate'].totals(simulator)
+    assert totals['total_cost_usd'] == 1000000 + 3000000
+    assert totals['confidence_level'] == 'MEDIUM'
+    edited = memo.edit(simulator, 'v1', base['key'], add=[{}], remove=[{'type': None}])
+    assert edited['aggregate'].totals(simulator)['confidence_level'] == 'MEDIUM'
+    edited = memo.edit(simulator, 'v1', edited['key'], remove=[{}])
+    assert edited['aggregate'].totals(simulator)['confidence_level'] == 'HIGH'
@@ -0,0 +1,109 @@
+import asyncio
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from scenario import optimizer
+from scenario.optimizer import (
+    PortfolioProblem, build_problem, greedy_portfolio, knapsack_portfolio, local_search, optimize_stream
+)
+from scenario.simulator import ScenarioSimulator
+
+
+class InlinePools:
+    """WorkerPools stand-in that runs tasks in the calling event loop"""
+    process_workers = 2
+
+    async def run_in_thread(self, fn, *args):
+        return fn(*args)
+
+    async def run_in_process(self, fn, *args):
+        return fn(*args)
+
+
+def brute_force(problem: PortfolioProblem) -> float:
+    best = 0.0
+    for counts in itertools.product(*(range(m + 1) for m in problem.max_counts)):
+        value, cost = problem.total(np.array(counts))
+        if cost <= problem.budget + 1e-9:
+            best = max(best, value)
+    return best
+
+
+def random_problem(rng: random.Random, integer_costs: bool, deadline=None) -> PortfolioProblem:
+    n = rng.randint(1, 5)
+    costs = [rng.randint(1, 40) * 1000 if integer_costs else rng.uniform(500, 40000) for _ in range(n)]
+    return PortfolioProblem(
+        [{'type': f'k{i}'} for i in range(n)],
+        costs=costs,
+        values=[rng.choice([0, rng.randint(1, 100), rng.uniform(0, 100)]) for _ in range(n)],
+        months=[rng.choice([12, 18, 24, 36]) for _ in range(n)],
+        max_counts=[rng.randint(0, 4) for _ in range(n)],
+        budget=rng.uniform(0, 120000),
+        deadline_months=deadline
+    )
+
+
+def assert_feasible(problem: PortfolioProblem, counts):
+    counts = np.asarray(counts)
+    assert np.all((counts >= 0) & (counts <= problem.max_counts))
+    assert problem.total(counts)[1] <= problem.budget + 1e-9
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_dp_matches_brute_force(seed):
+    problem = random_problem(random.Random(seed), integer_costs=True)
+    counts = knapsack_portfolio(problem)
+    assert counts is not None
+    assert_feasible(problem, counts)
+    assert problem.total(counts)[0] == pytest.approx(brute_force(problem))
+
+
+def test_local_search_near_brute_force():
+    """
+    A heuristic: always feasible and at least greedy, optimal on nearly every
+    small instance and never far off
+    """
+    misses = 0
+    for seed in range(100):
+        problem = random_problem(random.Random(10_000 + seed), integer_costs=False)
+        if len(problem):
+            assert knapsack_portfolio(problem) is None  # fractional costs: no DP
+        counts = local_search(problem, seed=seed)
+        assert_feasible(problem, counts)
+        value, optimum = problem.total(counts)[0], brute_force(problem)
+        assert value >= problem.total(greedy_portfolio(problem))[0] - 1e-9
+        assert value >= 0.9 * optimum
+        misses += value < optimum - 1e-9
+    assert misses <= 2
+
+
+def test_deadline_filters_candidates(indicators):
+    simulator = ScenarioSimulator(indicators)
+    problem = build_problem(simulator, 'beneficiaries', budget=4e7, deadline_months=24, max_per_type=3)
+    assert {c['type'] for c in problem.candidates} == {'hospital', 'park', 'road'}
+    counts = knapsack_portfolio(problem)
+    assert_feasible(problem, counts)
+    assert problem.total(counts)[0] == pytest.approx(brute_force(problem))
+
+
+@pytest.mark.parametrize('exact', [True, False])
+def test_stream_respects_budget_and_deadline(indicators, monkeypatch, exact):
+    if not exact:
+        monkeypatch.setattr(optimizer, 'DP_MAX_CELLS', 0)
+    simulator = ScenarioSimulator(indicators)
+    problem = build_problem(simulator, 'equity', budget=6e7, deadline_months=30, max_per_type=4)
+
+    async def collect():
+        return [event async for event in optimize_stream(simulator, problem, 'equity', InlinePools(), rounds=2)]
+    events = asyncio.run(collect())
+
+    done = events[-1]
+    assert done['event'] == 'done' and done['exact'] is exact
+    assert done['method'] == ('dynamic_programming' if exact else 'local_search')
+    assert done['objective_value'] == pytest.approx(brute_force(problem))
+    for event in events[:-1]:
+        assert event['metrics']['total_cost_usd'] <= problem.budget
+        assert event['metrics']['implementation_time_months'] <= 30
@@ -0,0 +1,52 @@
+import json
+from copy import deepcopy
+
+from fastapi.encoders import jsonable_encoder
+
+from indicators.zone_table import shape_tables
+from scenario.overlay import IndicatorOverlay
+from scenario.simulator import ScenarioSimulator
+
+
+def deep_copied(baseline, score):
+    expected = deepcopy(baseline)
+    expected['service_accessibility']['accessibility_score'] = score
+    return expected
+
+
+def test_overlay_equals_deep_copy(indicators):
+    before = shape_tables(indicators)
+    overlay = IndicatorOverlay(indicators).set(('service_accessibility', 'accessibility_score'), 77.5)
+    expected = deep_copied(indicators, 77.5)
+
+    assert overlay == expected
+    assert overlay.to_dict() == expected
+    assert dict(overlay) == expected
+    assert overlay['service_accessibility']['accessibility_score'] == 77.5
+    assert overlay['population_density']['zones'] == indicators['population_density']['zones']
+    assert overlay != indicators
+    assert shape_tables(indicators) == before  # baseline untouched
+
+
+def test_overlay_serializes_like_deep_copy(indicators):
+    overlay = IndicatorOverlay(indicators).set(('service_accessibility', 'accessibility_score'), 77.5)
+    expected = deep_copied(indicators, 77.5)
+
+    encoded = jsonable_encoder(overlay)
+    assert encoded == jsonable_encoder(expected)
+    assert encoded == json.loads(json.dumps(shape_tables(expected)))
+    assert shape_tables(overlay) == shape_tables(expected)
+    zones = encoded['population_density']['zones']
+    assert isinstance(zones, list) and set(zones[0]) == {'name', 'density', 'population', 'area_km2'}
+
+
+def test_scenario_projection_matches_deep_copy(indicators):
+    simulator = ScenarioSimulator(indicators)
+    result = simulator.simulate_scenario({'name': 'a', 'description': '', 'interventions': [
+        {'type': 'hospital'}, {'type': 'school', 'capacity': 500}
+    ]})
+    score = min(indicators['service_accessibility']['accessibility_score']
+                + result['metrics']['accessibility_gain'], 100)
+    expected = deep_copied(indicators, score)
+    assert result['projected_indicators'] == expected
+    assert jsonable_encoder(result)['projected_indicators'] == jsonable_encoder(expected)
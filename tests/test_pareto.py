@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from scenario.pareto import crowding_distance, non_dominated_ranks, pareto_ranking
+
+
+def brute_force_ranks(points: np.ndarray) -> np.ndarray:
+    """Peel fronts: a point is in the current front if no remaining point dominates it"""
+    ranks = np.full(len(points), -1)
+    remaining = set(range(len(points)))
+    front = 0
+    while remaining:
+        current = [i for i in remaining if not any(
+            np.all(points[j] <= points[i]) and np.any(points[j] < points[i]) for j in remaining
+        )]
+        ranks[current] = front
+        remaining -= set(current)
+        front += 1
+    return ranks
+
+
+def brute_force_crowding(points: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    distance = np.zeros(len(points))
+    for front in np.unique(ranks):
+        members = np.flatnonzero(ranks == front)
+        for j in range(points.shape[1]):
+            ordered = members[np.argsort(points[members, j], kind='stable')]
+            values = points[ordered, j]
+            span = values[-1] - values[0]
+            distance[ordered[0]] = distance[ordered[-1]] = np.inf
+            for k in range(1, len(ordered) - 1):
+                distance[ordered[k]] += (values[k + 1] - values[k - 1]) / span if span > 0 else 0
+    return distance
+
+
+def random_points(rng, n, k):
+    # Small integer grid: many ties and exact duplicates
+    points = rng.integers(0, 6, size=(n, k)).astype(float)
+    points[rng.integers(0, n, n // 5)] = points[rng.integers(0, n, n // 5)]
+    return points
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 4])
+@pytest.mark.parametrize('seed', range(10))
+def test_ranks_match_brute_force(k, seed):
+    points = random_points(np.random.default_rng(seed), 120, k)
+    np.testing.assert_array_equal(non_dominated_ranks(points), brute_force_ranks(points))
+
+
+@pytest.mark.parametrize('k', [2, 3])
+def test_ranks_of_continuous_points(k):
+    points = np.random.default_rng(k).normal(size=(400, k))
+    np.testing.assert_array_equal(non_dominated_ranks(points), brute_force_ranks(points))
+
+
+def test_duplicates_share_a_front():
+    points = np.array([[1.0, 2.0], [1.0, 2.0], [2.0, 1.0], [2.0, 2.0], [2.0, 2.0], [3.0, 3.0]])
+    np.testing.assert_array_equal(non_dominated_ranks(points), [0, 0, 0, 1, 1, 2])
+    assert len(non_dominated_ranks(np.zeros((0, 3)))) == 0
+
+
+@pytest.mark.parametrize('k', [2, 3, 4])
+@pytest.mark.parametrize('seed', range(5))
+def test_crowding_matches_brute_force(k, seed):
+    points = random_points(np.random.default_rng(100 + seed), 80, k)
+    ranks = non_dominated_ranks(points)
+    np.testing.assert_allclose(crowding_distance(points, ranks), brute_force_crowding(points, ranks))
+
+
+def test_crowding_boundaries():
+    # One front on a line: extremes inf, interior gaps normalized by the span
+    points = np.array([[0.0, 4.0], [1.0, 3.0], [3.0, 1.0], [4.0, 0.0]])
+    ranks = non_dominated_ranks(points)
+    np.testing.assert_array_equal(ranks, 0)
+    np.testing.assert_allclose(crowding_distance(points, ranks), [np.inf, 1.5, 1.5, np.inf])
+    # Fronts of one or two points are all boundary
+    pair = np.array([[0.0, 1.0], [1.0, 0.0], [2.0, 2.0]])
+    assert np.all(np.isinf(crowding_distance(pair, non_dominated_ranks(pair))))
+    assert len(crowding_distance(np.zeros((0, 2)), np.zeros(0, dtype=int))) == 0
+
+
+def test_pareto_ranking_directions_and_order():
+    metrics = [
+        {'total_cost_usd': 10, 'people_benefited': 100},   # frontier
+        {'total_cost_usd': 20, 'people_benefited': 100},   # dominated by the first
+        {'total_cost_usd': 30, 'people_benefited': 300},   # frontier
+        {'total_cost_usd': 15, 'people_benefited': 150},   # frontier, interior
+    ]
+    ranking = pareto_ranking(metrics, ('total_cost_usd', 'people_benefited'))
+    np.testing.assert_array_equal(ranking['rank'], [1, 2, 1, 1])
+    assert np.isinf(ranking['crowding_distance'][[0, 2]]).all()
+    assert ranking['order'].tolist() == [0, 2, 3, 1]
+    with pytest.raises(ValueError):
+        pareto_ranking(metrics, ('total_cost_usd', 'unknown'))
+    with pytest.raises(ValueError):
+        pareto_ranking(metrics, ())
@@ -0,0 +1,81 @@
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point, Polygon
+
+from spatial_analysis.registry import CityDataset
+from spatial_analysis.road_network import RoadGraph, isochrone_layer, network_accessibility
+
+
+def graph(*lines, road_type='street'):
+    return RoadGraph(gpd.GeoDataFrame({'type': [road_type] * len(lines)},
+                                      geometry=[LineString(line) for line in lines], crs=32737))
+
+
+def node_times(g, source):
+    times = g.travel_time_field(np.array([source], dtype=float))
+    return {tuple(xy): t for xy, t in zip(g.node_xy.tolist(), times)}
+
+
+def test_crossing_roads_are_connected():
+    g = graph([(0, 0), (1000, 0)], [(500, -500), (500, 500)])
+    times = node_times(g, (0, 0))
+    assert g.n_nodes == 5
+    assert len(g.edges) == 4
+    # 500 m along the first road, then 500 m up the second, at 20 km/h
+    assert times[(500.0, 500.0)] == pytest.approx(3.0)
+
+
+def test_t_junction_and_overlap_split_segments():
+    g = graph([(0, 0), (1000, 0)], [(200, 300), (200, 0)], [(800, 0), (1500, 0)])
+    assert sorted(map(tuple, g.node_xy.tolist())) == [
+        (0.0, 0.0), (200.0, 0.0), (200.0, 300.0), (800.0, 0.0), (1000.0, 0.0), (1500.0, 0.0)
+    ]
+    times = node_times(g, (200, 300))
+    assert times[(1500.0, 0.0)] == pytest.approx((300 + 1300) / 1000 / 20 * 60)
+    assert g.total_length_km == pytest.approx(2.0)
+
+
+def test_shared_vertices_unchanged():
+    g = graph([(0, 0), (100, 0), (100, 100)], [(100, 0), (200, 0)])
+    assert g.n_nodes == 4
+    assert len(g.edges) == 3
+
+
+def small_city(populations):
+    """Two residential zones on a 2 km road with a hospital at its west end"""
+    zones = [Polygon([(x, -100), (x + 200, -100), (x + 200, 100), (x, 100)]) for x in (400, 1600)]
+    return CityDataset('roads', {
+        'residential': gpd.GeoDataFrame({'name': ['West', 'East'], 'population': populations},
+                                        geometry=zones, crs=32737),
+        'facilities': gpd.GeoDataFrame({'type': ['hospital']}, geometry=[Point(0, 0)], crs=32737),
+        'roads': gpd.GeoDataFrame({'type': ['street']}, geometry=[LineString([(0, 0), (2000, 0)])], crs=32737),
+    })
+
+
+def test_network_accessibility_weights_by_population():
+    result = network_accessibility(small_city([300, 100]), 'hospital', thresholds=(8,))
+    west, east = (z['travel_minutes'] for z in result['zones'])
+    assert west < 8 < east
+    assert result['summary']['within_8_min_pct'] == 75.0
+    assert result['summary']['population_weighted_minutes'] == pytest.approx((300 * west + 100 * east) / 400, abs=0.1)
+
+
+def test_network_accessibility_without_population_is_json_safe():
+    result = network_accessibility(small_city([0, 0]), 'hospital')
+    assert result['summary']['unreachable_zones'] == 0
+    assert result['summary']['population_weighted_minutes'] is None
+    assert result['summary']['within_15_min_pct'] == 0
+    json.dumps(result, allow_nan=False)
+
+
+def test_isochrone_cache_is_bounded():
+    city = small_city([300, 100])
+    first = isochrone_layer(city, 'hospital', (5.0, 10.0))
+    assert isochrone_layer(city, 'hospital', (10.0, 5.0)) is first
+    for minutes in range(city.max_variants):
+        isochrone_layer(city, 'hospital', (1.0 + minutes / 10,))
+    assert len(city._variants) == city.max_variants
+    assert isochrone_layer(city, 'hospital', (5.0, 10.0)) is not first
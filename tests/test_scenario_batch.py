@@ -0,0 +1,75 @@
+import math
+import random
+
+import pytest
+
+from scenario.memo import ScenarioMemo
+from scenario.simulator import ScenarioSimulator
+from scenario.spatial_impact import spatial_impact_model
+
+
+def assert_same_metrics(got, want):
+    assert list(got) == list(want)
+    for key in want:
+        assert type(got[key]) is type(want[key]), key
+        if isinstance(want[key], float) and math.isinf(want[key]):
+            assert got[key] == want[key], key
+        else:
+            assert got[key] == want[key], key
+
+
+def random_scenarios(rng, make, n, located=False):
+    return [
+        {'name': f's{i}', 'description': '', 'interventions': [make(rng, located) for _ in range(rng.randint(0, 8))]}
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize('score', [0.0, 2.5, 55.0, 99.0])
+def test_batch_matches_scalar(indicators, random_intervention, score):
+    baseline = dict(indicators, service_accessibility={**indicators['service_accessibility'],
+                                                       'accessibility_score': score})
+    simulator = ScenarioSimulator(baseline)
+    scenarios = random_scenarios(random.Random(score), random_intervention, 300)
+    for got, scenario in zip(simulator.simulate_batch(scenarios), scenarios):
+        assert_same_metrics(got, simulator.simulate_scenario(scenario)['metrics'])
+
+
+def test_batch_matches_scalar_with_zone_model(city, indicators, random_intervention):
+    simulator = ScenarioSimulator(indicators, spatial=spatial_impact_model(city))
+    scenarios = random_scenarios(random.Random(1), random_intervention, 200, located=True)
+    assert any(simulator._locate(iv) is not None for s in scenarios for iv in s['interventions'])
+    for got, scenario in zip(simulator.simulate_batch(scenarios), scenarios):
+        assert_same_metrics(got, simulator.simulate_scenario(scenario)['metrics'])
+
+
+def test_simulate_results_match_scalar(indicators, random_intervention):
+    simulator = ScenarioSimulator(indicators)
+    scenarios = random_scenarios(random.Random(2), random_intervention, 50)
+    for result, scenario in zip(simulator.simulate_results(scenarios), scenarios):
+        want = simulator.simulate_scenario(scenario)
+        assert_same_metrics(result['metrics'], want['metrics'])
+        assert result['projected_indicators'] == want['projected_indicators']
+
+
+@pytest.mark.parametrize('types, confidence', [
+    ([], 'LOW'),
+    ([None], 'LOW'),
+    (['HOSPITAL', None], 'MEDIUM'),
+    (['park', 'school', 'road', 'brt', 5], 'HIGH'),
+    (['park', 'school', 'road', '', ['brt']], 'MEDIUM'),
+    (['park', 'tram', 'Metro'], 'LOW'),
+])
+def test_odd_types_and_confidence_boundaries(indicators, types, confidence):
+    simulator = ScenarioSimulator(indicators)
+    scenario = {'name': 'odd', 'description': '', 'interventions': [{'type': t} for t in types] + (
+        [{}] if types == [None] else []
+    )}
+    scalar = simulator.simulate_scenario(scenario)['metrics']
+    assert scalar['confidence_level'] == confidence
+    assert_same_metrics(simulator.simulate_batch([scenario])[0], scalar)
+
+    aggregate = ScenarioMemo().edit(simulator, 'v1', interventions=scenario['interventions'])['aggregate']
+    assert simulator.metrics(aggregate.totals(simulator)) == scalar
+    if not types:
+        assert scalar['cost_per_beneficiary'] == float('inf')
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import bson
+import numpy as np
+import pytest
+
+from indicators.zone_table import ZoneTable
+from storage.scenario_jobs import ScenarioJobStore, job_result
+
+JOB = ('compare', 'test', 'v1', 4, 2)
+
+
+def test_job_result_is_bson_safe():
+    zones = ZoneTable({'name': np.array(['Kibera'], dtype=object), 'density': np.array([1.5])})
+    result = job_result({
+        'scenarios': [{
+            'metrics': {'total_cost_usd': np.int64(0), 'people_benefited': 0,
+                        'cost_per_beneficiary': float('inf'), 'score': np.float64(np.nan)},
+            'projected_indicators': {'population_density': {'mean': np.float64(2.5), 'zones': zones,
+                                                            'unit': 'people/km2', 'flag': True}}
+        }],
+        'zones': zones,
+        'pair': (np.int32(1), 2.0)
+    })
+    assert result == {
+        'scenarios': [{
+            'metrics': {'total_cost_usd': 0, 'people_benefited': 0, 'cost_per_beneficiary': None, 'score': None},
+            'projected_indicators': {'population_density': {'mean': 2.5}}
+        }],
+        'zones': [{'name': 'Kibera', 'density': 1.5}],
+        'pair': [1, 2.0]
+    }
+    assert type(result['scenarios'][0]['metrics']['total_cost_usd']) is int
+    assert bson.decode(bson.encode(result)) == result
+
+
+def test_job_id_covers_every_version():
+    base = ScenarioJobStore.job_id(*JOB, [{'name': 'a'}])
+    assert base == ScenarioJobStore.job_id(*JOB, [{'name': 'a'}])
+    kind, city, dataset, indicator_set, simulator = JOB
+    assert len({
+        base,
+        ScenarioJobStore.job_id('simulate', city, dataset, indicator_set, simulator, [{'name': 'a'}]),
+        ScenarioJobStore.job_id(kind, city, 'v2', indicator_set, simulator, [{'name': 'a'}]),
+        ScenarioJobStore.job_id(kind, city, dataset, indicator_set + 1, simulator, [{'name': 'a'}]),
+        ScenarioJobStore.job_id(kind, city, dataset, indicator_set, simulator + 1, [{'name': 'a'}]),
+        ScenarioJobStore.job_id(*JOB, [{'name': 'b'}]),
+    }) == 6
+
+
+def test_submit_deduplicates(with_db):
+    async def test(db):
+        store = ScenarioJobStore(db)
+        job_id, created = await store.submit(*JOB, [{'name': 'a'}], total=1)
+        assert created
+        assert await store.submit(*JOB, [{'name': 'a'}], total=1) == (job_id, False)
+        # A new indicator set is new work
+        kind, city, dataset, indicator_set, simulator = JOB
+        other, created = await store.submit(kind, city, dataset, indicator_set + 1, simulator,
+                                            [{'name': 'a'}], total=1)
+        assert created and other != job_id
+
+        job = await store.get(job_id)
+        assert job['status'] == 'queued' and job['indicator_set_version'] == indicator_set
+        assert 'payload' not in job
+        assert (await store.get(job_id, include_payload=True))['payload'] == [{'name': 'a'}]
+
+        with pytest.raises(ValueError):
+            await store.submit('optimize', *JOB[1:], [], total=0)
+    with_db(test)
+
+
+def test_failed_and_stale_jobs_are_requeued(with_db):
+    async def test(db):
+        store = ScenarioJobStore(db, stale_seconds=60)
+        ids = {}
+        for name in ('failed', 'completed', 'running', 'stale'):
+            ids[name], _ = await store.submit(*JOB, [{'name': name}], total=1)
+        await store.start(ids['running'])
+        await store.progress(ids['running'], 1)
+        await store.complete(ids['completed'], {'cost_per_beneficiary': float('inf')})
+        await store.fail(ids['failed'], 'boom')
+        await db['scenario_jobs'].update_one({'_id': ids['stale']}, {'$set': {
+            'status': 'running', 'updated_at': datetime.now(timezone.utc) - timedelta(seconds=120)
+        }})
+
+        requeued = {name: (await store.submit(*JOB, [{'name': name}], total=1))[1] for name in ids}
+        assert requeued == {'failed': True, 'completed': False, 'running': False, 'stale': True}
+
+        jobs = {name: await store.get(job_id) for name, job_id in ids.items()}
+        assert jobs['failed']['status'] == 'queued' and jobs['failed']['error'] is None
+        assert jobs['stale']['status'] == 'queued' and jobs['stale']['progress'] == {'done': 0, 'total': 1}
+        assert jobs['running']['status'] == 'running' and jobs['running']['progress']['done'] == 1
+        assert jobs['completed']['result'] == {'cost_per_beneficiary': None}
+    with_db(test)
@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+
+from spatial_analysis.serialization import (
+    accepts_gzip, city_geojson, etag_matches, geojson_etag, layer_geojson
+)
+
+
+@pytest.mark.parametrize('header, accepted', [
+    (None, False),
+    ('', False),
+    ('identity', False),
+    ('gzip', True),
+    ('br, gzip, deflate', True),
+    ('GZIP;q=0.5', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.0, br', False),
+    ('*', True),
+    ('*;q=0', False),
+    ('*, gzip;q=0', False),
+    ('x-gzip', True),
+    ('gzip;q=nonsense', False),
+    ('deflate;q=1, *;q=0.1', True),
+])
+def test_accepts_gzip(header, accepted):
+    assert accepts_gzip(header) is accepted
+
+
+def test_etags_differ_per_encoding():
+    assert geojson_etag('abc', False) == '"abc"'
+    assert geojson_etag('abc', True) == '"abc-gzip"'
+
+
+@pytest.mark.parametrize('header, etag, matches', [
+    (None, '"v1"', False),
+    ('"v1"', '"v1"', True),
+    ('"v1"', '"v1-gzip"', False),
+    ('"v1-gzip"', '"v1"', False),
+    ('"v0", "v1-gzip"', '"v1-gzip"', True),
+    ('W/"v1"', '"v1"', True),
+    ('*', '"v1"', True),
+    (' * ', '"v1-gzip"', True),
+    ('v1', '"v1"', False),
+    ('"v10"', '"v1"', False),
+])
+def test_etag_matches(header, etag, matches):
+    assert etag_matches(header, etag) is matches
+
+
+def test_cached_layers_decompress_to_identity_bytes(city):
+    plain = layer_geojson(city, 'residential')
+    assert layer_geojson(city, 'residential') is plain
+    assert gzip.decompress(layer_geojson(city, 'residential', compressed=True)) == plain
+    payload = json.loads(gzip.decompress(city_geojson(city, compressed=True)))
+    assert payload['city'] == 'test'
+    assert payload['layers']['residential'] == json.loads(plain)
@@ -0,0 +1,136 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+from shapely import affinity
+from shapely.geometry import Point, Polygon
+
+from scenario.interventions import INTERVENTIONS
+from scenario.simulator import ScenarioSimulator
+from scenario.spatial_impact import ACCESS_FACILITIES, SpatialImpactModel, check_locations, spatial_impact_model
+from spatial_analysis.projection import METRIC_EPSG
+
+
+@pytest.fixture(scope='module')
+def model(city):
+    return spatial_impact_model(city)
+
+
+def lon_lat(city, zone=0):
+    point = city['residential'].geometry.iloc[zone].centroid
+    return [point.x, point.y]
+
+
+def test_locate_resolves_every_form(city, model):
+    names = city['residential']['name'].tolist()
+    assert model.locate({}) is None
+    assert model.locate({'location': None, 'route': None}) is None
+    assert model.locate({'location': names[3]}).equals(Point(model.centroids[3]))
+    assert model.locate({'location': tuple(lon_lat(city, 3))}).distance(model.centroids[3]) < 1
+    lon, lat = lon_lat(city, 4)
+    assert model.locate({'lon': lon, 'lat': lat}).distance(model.centroids[4]) < 1
+    route = model.locate({'route': [names[0], lon_lat(city, 1), names[2]]})
+    assert shapely.get_num_coordinates(route) == 3
+    # route wins over location
+    assert model.locate({'route': names[:2], 'location': 'nowhere'}).geom_type == 'LineString'
+
+
+@pytest.mark.parametrize('intervention', [
+    {'location': 'Kibra'},
+    {'location': ''},
+    {'location': [36.8]},
+    {'location': [36.8, -1.3, 0]},
+    {'location': [36.8, 'south']},
+    {'location': [True, -1.3]},
+    {'location': [float('nan'), -1.3]},
+    {'location': [200, -1.3]},
+    {'location': [36.8, -91]},
+    {'location': {'lon': 36.8, 'lat': -1.3}},
+    {'lon': 36.8},
+    {'lat': -1.3},
+    {'route': 'Kibera to Karen'},
+    {'route': []},
+    {'route': [[36.8, -1.3]]},
+    {'route': [[36.8, -1.3], 'Kibra']},
+])
+def test_unresolvable_locations_are_rejected(model, intervention):
+    with pytest.raises(ValueError):
+        model.locate(intervention)
+
+
+def test_simulator_rejects_instead_of_falling_back(city, indicators, model):
+    simulator = ScenarioSimulator(indicators, spatial=model)
+    scenario = {'name': 'typo', 'description': '', 'interventions': [{'type': 'hospital', 'location': 'Kibra'}]}
+    with pytest.raises(ValueError, match='Kibra'):
+        simulator.simulate_scenario(scenario)
+    with pytest.raises(ValueError):
+        simulator.simulate_batch([scenario])
+    with pytest.raises(ValueError):
+        check_locations(model, [scenario])
+    # Types without a zone model never use the location
+    check_locations(model, [{'interventions': [{'type': 'tram', 'location': 'Kibra'}, {'type': None, 'lon': 1}]}])
+    check_locations(None, [scenario])
+    # Without a zone model locations are not used at all
+    assert ScenarioSimulator(indicators).simulate_scenario(scenario)['metrics']['people_benefited'] > 0
+
+
+def brute_force_zones(model, geometry, radius):
+    return np.flatnonzero(shapely.distance(model.centroids, geometry) <= radius)
+
+
+@pytest.mark.parametrize('facility_type', ACCESS_FACILITIES)
+def test_placing_changes_only_zones_in_radius(city, model, facility_type):
+    params = INTERVENTIONS[facility_type]
+    column = ACCESS_FACILITIES.index(facility_type)
+    state = model.new_state()
+    placed = [model.locate({'location': lon_lat(city, zone)}) for zone in (0, 0, 57)]
+    gains = [state.place(facility_type, geometry, params, params['capacity'])[1] for geometry in placed]
+
+    within = [brute_force_zones(model, geometry, params['service_radius_m']) for geometry in placed]
+    assert state.touched.tolist() == sorted(set(np.concatenate(within).tolist()))
+    expected = np.zeros(len(model))
+    for zones in within:
+        expected[zones] += 1
+    added = np.zeros((len(model), len(ACCESS_FACILITIES)))
+    added[state.touched] = state.added
+    assert added[:, column].tolist() == expected.tolist()
+    assert not added[:, 1 - column].any()
+
+    # The running score change equals a full recomputation
+    full = model.scores(np.arange(len(model)), model.counts + added).sum()
+    assert model.score_sum + state.score_delta == pytest.approx(full, rel=1e-12)
+    assert sum(gains) == pytest.approx(state.citywide_score() - model.citywide_score(model.score_sum), abs=1e-9)
+
+
+def test_place_beneficiaries(city, model):
+    state = model.new_state()
+    geometry = model.locate({'location': lon_lat(city, 10)})
+    zones = brute_force_zones(model, geometry, INTERVENTIONS['park']['service_radius_m'])
+    beneficiaries, gain = state.place('park', geometry, INTERVENTIONS['park'], 0)
+    assert beneficiaries == int(round(model.population[zones].sum()))
+    # Parks are not an accessibility facility: table gain, zone state untouched
+    assert gain == INTERVENTIONS['park']['access_gain']
+    assert len(state.touched) == 0 and state.score_delta == 0
+
+    school = INTERVENTIONS['school']
+    beneficiaries, _ = state.place('school', geometry, school, 3)
+    assert beneficiaries == min(3 * school['beneficiaries_per_capacity'],
+                                int(round(model.population[brute_force_zones(model, geometry, 5000)].sum())))
+
+
+def test_unpopulated_and_empty_zone_models():
+    square = Polygon([(0, 0), (500, 0), (500, 500), (0, 500)])
+    residential = gpd.GeoDataFrame({'name': ['A', 'B'], 'population': [0, 0]},
+                                   geometry=[square, affinity.translate(square, 20000)], crs=METRIC_EPSG)
+    facilities = gpd.GeoDataFrame({'type': ['hospital']}, geometry=[Point(250, 250)], crs=METRIC_EPSG)
+    model = SpatialImpactModel(residential, facilities)
+    state = model.new_state()
+    beneficiaries, gain = state.place('hospital', model.locate({'location': 'A'}), INTERVENTIONS['hospital'], 150)
+    assert beneficiaries == 0
+    assert np.isfinite(gain)
+    assert state.touched.tolist() == [0]
+
+    empty = SpatialImpactModel(residential.iloc[:0], facilities)
+    assert empty.citywide_score(0.0) == 0.0
+    with pytest.raises(ValueError):
+        empty.locate({'location': 'A'})
@@ -0,0 +1,43 @@
+import math
+
+import mapbox_vector_tile
+
+from spatial_analysis.registry import CityDataset
+from spatial_analysis.synthetic_city import generate_synthetic_city
+from spatial_analysis.tiles import TileCache, render_tile
+
+
+def covering_tile(dataset, z):
+    """XYZ tile containing the first residential zone"""
+    point = dataset['residential'].geometry.iloc[0].centroid
+    n = 2 ** z
+    x = int((point.x + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(point.y))) / math.pi) / 2 * n)
+    return z, x, y
+
+
+def test_get_or_render_caches_per_dataset_version(city):
+    cache = TileCache()
+    z, x, y = covering_tile(city, 12)
+    tile = cache.get_or_render(city, 'residential', z, x, y)
+    assert tile == render_tile(city, 'residential', z, x, y)
+    assert mapbox_vector_tile.decode(tile)['residential']['features']
+    assert cache.get_or_render(city, 'residential', z, x, y) is tile
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A rebuilt city with different data misses instead of serving stale tiles
+    rebuilt = CityDataset(city.city_id, generate_synthetic_city(200, seed=8))
+    assert rebuilt.version != city.version
+    cache.get_or_render(rebuilt, 'residential', z, x, y)
+    assert (cache.hits, cache.misses) == (1, 2) and cache.stats()['tiles'] == 2
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    cache = TileCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    assert cache.get('a') == b'1234'
+    cache.put('c', b'1234')
+    assert cache.get('b') is None and cache.get('a') == b'1234'
+    cache.put('huge', b'x' * 11)
+    assert cache.get('huge') is None and cache.stats()['bytes'] == 8
@@ -0,0 +1,23 @@
+import pytest
+
+from scenario.uncertainty import UNCERTAINTY, merge_uncertainty
+
+
+@pytest.mark.parametrize('overrides', [
+    {'school': {'cost': 5}},
+    {'school': 5},
+    {'school': {'cost': None}},
+    {'school': {'cost': {'distribution': 'lognormal'}}},
+    {'school': {'cost': {'distribution': 'cauchy'}}},
+    {'school': {'capacity': {'distribution': 'fixed'}}},
+])
+def test_invalid_overrides_raise_value_error(overrides):
+    with pytest.raises(ValueError):
+        merge_uncertainty(overrides)
+
+
+def test_overrides_merge_per_parameter():
+    merged = merge_uncertainty({'brt': {'cost': {'distribution': 'uniform', 'low': 0.9, 'high': 1.6}}})
+    assert merged['brt']['cost'] == {'distribution': 'uniform', 'low': 0.9, 'high': 1.6}
+    assert merged['brt']['time_months'] == UNCERTAINTY['brt']['time_months']
+    assert UNCERTAINTY['brt']['cost']['distribution'] == 'lognormal'
@@ -0,0 +1,85 @@
+import geopandas as gpd
+import pytest
+from shapely import affinity
+from shapely.geometry import LineString, Polygon
+
+from indicators.urban_metrics import (
+    calculate_green_space_coverage, calculate_land_use_ratio, calculate_road_density, study_area_km2
+)
+from spatial_analysis.projection import METRIC_EPSG, WGS84_EPSG
+
+OFFSET = (250000, 9850000)  # somewhere inside the metric CRS
+
+
+def square(x, y, side):
+    return affinity.translate(Polygon([(0, 0), (side, 0), (side, side), (0, side)]), OFFSET[0] + x, OFFSET[1] + y)
+
+
+def layer(geometries, **columns):
+    """Metric-CRS layer and its WGS84 counterpart"""
+    proj = gpd.GeoDataFrame(columns, geometry=list(geometries), crs=METRIC_EPSG)
+    return proj.to_crs(WGS84_EPSG), proj
+
+
+def test_green_zone_shares_add_up_to_geometry_totals(city):
+    green, green_proj = city['green_space'], city.projections.get('green_space', METRIC_EPSG)
+    residential_proj = city.projections.get('residential', METRIC_EPSG)
+    result = calculate_green_space_coverage(green, city['residential'], green_proj, residential_proj)
+
+    zone_green = sum(zone['green_km2'] for zone in result['zones'])
+    assert zone_green == pytest.approx(result['residential_green_km2'], abs=0.001 * len(result['zones']) + 0.01)
+    assert result['residential_green_km2'] <= result['total_green_space_km2']
+    space_green = sum(space['area_km2'] for space in result['spaces'])
+    assert space_green == pytest.approx(result['total_green_space_km2'], abs=0.001 * len(result['spaces']) + 0.01)
+    assert result['study_area_km2'] == round(study_area_km2(green_proj, residential_proj), 2)
+
+
+def test_green_totals_ignore_stale_area_attribute():
+    residential, residential_proj = layer([square(0, 0, 2000), square(3000, 0, 2000)],
+                                          name=['A', 'B'], population=[1000, 0], area_km2=[4, 4])
+    # The attribute claims 10 km²; the polygon is 1 km², half of it inside zone A
+    green, green_proj = layer([square(1500, 0, 1000)], name=['Park'], type=['park'], area_km2=[10])
+    result = calculate_green_space_coverage(green, residential, green_proj, residential_proj)
+
+    assert result['total_green_space_km2'] == 1
+    assert result['spaces'] == [{'name': 'Park', 'type': 'park', 'area_km2': 1}]
+    assert result['residential_green_km2'] == 0.5
+    assert [zone['green_km2'] for zone in result['zones']] == [0.5, 0]
+    assert result['per_capita_m2'] == 1000
+    assert result['study_area_km2'] == 10
+
+
+def test_land_use_and_road_density_use_the_dataset_extent():
+    residential, residential_proj = layer([square(0, 0, 2000), square(8000, 3000, 2000)],
+                                          population=[100, 100], area_km2=[99, 99])
+    commercial, commercial_proj = layer([square(4000, 0, 1000)], area_km2=[99])
+    land_use = calculate_land_use_ratio(residential, commercial, residential_proj, commercial_proj)
+
+    # Extent 10 km × 5 km; areas from the polygons, not the area_km2 attribute
+    assert land_use['total_metro_area_km2'] == 50
+    assert land_use['residential_area_km2'] == 8
+    assert land_use['built_up_area_km2'] == 9
+    assert land_use['open_land_km2'] == 41
+    assert land_use['built_up_percentage'] == 18
+
+    road = LineString([(OFFSET[0], OFFSET[1] + 1000), (OFFSET[0] + 10000, OFFSET[1] + 1000)])
+    roads, roads_proj = layer([road], name=['Ngong Road'], type=['primary'])
+    density = calculate_road_density(roads, roads_proj, residential_proj=residential_proj)
+    assert density['total_length_km'] == 10
+    assert density['road_density_km_per_km2'] == 0.2
+    # Without zones the roads' own extent is the study area (a line has none)
+    assert calculate_road_density(roads, roads_proj)['road_density_km_per_km2'] == 0
+
+
+def test_empty_layers():
+    residential, residential_proj = layer([], name=[], population=[], area_km2=[])
+    land_use = calculate_land_use_ratio(residential, residential, residential_proj, residential_proj)
+    assert land_use['total_metro_area_km2'] == 0 and land_use['built_up_percentage'] == 0
+
+    green = calculate_green_space_coverage(residential.assign(type=[]), residential,
+                                           residential_proj.assign(type=[]), residential_proj)
+    assert green['total_green_space_km2'] == green['residential_green_km2'] == 0
+    assert green['green_space_percentage'] == 0 and green['zones'] == [] and green['spaces'] == []
+
+    roads, roads_proj = layer([], name=[], type=[])
+    assert calculate_road_density(roads, roads_proj, residential_proj=residential_proj)['road_density_km_per_km2'] == 0
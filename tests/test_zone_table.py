@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from indicators.urban_metrics import calculate_all_indicators
+from indicators.zone_table import ZoneTable, iter_tables, shape_tables
+
+
+def make_table():
+    return ZoneTable({
+        'name': np.array(['Kibera', 'Karen', 'Embakasi'], dtype=object),
+        'density': np.array([300.5, 20.0, 150.25]),
+        'population': np.array([1000, 50, 700], dtype=np.int64)
+    }, sort_by='density', descending=True)
+
+
+def test_index_string_column():
+    table = make_table()
+    row = table[0]
+    assert row == {'name': 'Kibera', 'density': 300.5, 'population': 1000}
+    assert type(row['name']) is str
+    assert type(row['density']) is float
+    assert type(row['population']) is int
+    assert table[-1]['name'] == 'Karen'
+    assert [r['name'] for r in table[1:]] == ['Embakasi', 'Karen']
+
+
+def test_equals_row_list():
+    table = make_table()
+    assert table == table.to_records()
+    assert table == make_table()
+    assert table != table.sort('density')
+
+
+def test_jsonable_encoder_gives_row_list():
+    table = make_table()
+    assert jsonable_encoder({'zones': table}) == {'zones': table.to_records()}
+
+
+def test_public_indicators_are_json_ready(city):
+    indicators = calculate_all_indicators(city)
+    assert not list(iter_tables(indicators))
+    encoded = json.loads(json.dumps(indicators))
+    assert encoded == jsonable_encoder(indicators)
+    assert encoded['population_density']['zones'][0]['name']
+
+
+def test_engine_indicators_encode_like_shaped(city, indicators):
+    assert list(iter_tables(indicators))
+    shaped = shape_tables(indicators)
+    assert jsonable_encoder(indicators) == json.loads(json.dumps(shaped))
+    assert shaped == jsonable_encoder(calculate_all_indicators(city))